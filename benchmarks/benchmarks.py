@@ -0,0 +1,204 @@
+"""Benchmarks of rcsb-api against a local mock of the RCSB PDB APIs
+
+Every benchmark runs against :py:class:`rcsbapi.dev_tools.mock_server.MockRCSBServer`, so results don't depend on
+the network or the load of the live services. Rate limits are lifted, so request overhead can be measured.
+
+Run with asv (`pip install asv`) from the repository root:
+    asv run --python=same --quick        # one pass against the working tree
+    asv continuous master HEAD           # compare a branch against master
+
+Benchmarks are plain classes, so a single one can also be timed directly, e.g.:
+    python -m timeit -s "from benchmarks.benchmarks import ConstructQuery as B; b = B(); b.setup('15 fields')" "b.time_construct_query('15 fields')"
+"""
+
+import logging
+
+from rcsbapi.config import config
+from rcsbapi.dev_tools.mock_server import MockRCSBServer, entry_id
+
+from .startup import SUBPACKAGES, measure
+
+# Autocompletion warnings would dominate the timings
+logging.getLogger("rcsbapi").setLevel(logging.ERROR)
+
+FIELDS = {
+    "1 field": ["exptl.method"],
+    "5 fields": [
+        "exptl.method",
+        "rcsb_entry_info.resolution_combined",
+        "rcsb_accession_info.initial_release_date",
+        "polymer_entities.rcsb_id",
+        "citation.title",
+    ],
+    "15 fields": [
+        "exptl.method",
+        "rcsb_entry_info.resolution_combined",
+        "rcsb_entry_info.deposited_atom_count",
+        "rcsb_accession_info.initial_release_date",
+        "struct.title",
+        "struct_keywords.pdbx_keywords",
+        "citation.title",
+        "citation.pdbx_database_id_DOI",
+        "polymer_entities.rcsb_id",
+        "polymer_entities.entity_poly.pdbx_seq_one_letter_code_can",
+        "polymer_entities.rcsb_entity_source_organism.ncbi_scientific_name",
+        "polymer_entities.rcsb_polymer_entity_container_identifiers.reference_sequence_identifiers.database_accession",
+        "nonpolymer_entities.nonpolymer_comp.chem_comp.id",
+        "assemblies.rcsb_assembly_info.polymer_entity_instance_count",
+        "assemblies.pdbx_struct_assembly.oligomeric_details",
+    ],
+}
+
+
+class MockServerBenchmark:
+    """Base class: starts a mock server for each benchmark, points the package at it and lifts the rate limits"""
+
+    server_options: dict = {}
+
+    def setup(self, *params):
+        self.server = MockRCSBServer(**self.options(*params)).start()
+        self._redirect = self.server.redirect()
+        self._redirect.__enter__()  # pylint: disable=unnecessary-dunder-call
+        self._rates = (config.DATA_API_REQUESTS_PER_SECOND, config.SEARCH_API_REQUESTS_PER_SECOND)
+        config.DATA_API_REQUESTS_PER_SECOND = 0
+        config.SEARCH_API_REQUESTS_PER_SECOND = 0
+
+    def options(self, *params):  # pylint: disable=unused-argument
+        return self.server_options
+
+    def teardown(self, *params):
+        config.DATA_API_REQUESTS_PER_SECOND, config.SEARCH_API_REQUESTS_PER_SECOND = self._rates
+        self._redirect.__exit__(None, None, None)
+        self.server.stop()
+
+
+class SchemaLoad(MockServerBenchmark):
+    """Fetching and parsing the Data API and Search API schemas"""
+
+    def setup(self, *params):
+        super().setup(*params)
+        import rcsbapi.data  # noqa: F401  # pylint: disable=import-outside-toplevel,unused-import
+        import rcsbapi.search  # noqa: F401  # pylint: disable=import-outside-toplevel,unused-import
+
+    def time_data_schema(self):
+        from rcsbapi.data import DataSchema  # pylint: disable=import-outside-toplevel
+        DataSchema()
+
+    def peakmem_data_schema(self):
+        from rcsbapi.data import DataSchema  # pylint: disable=import-outside-toplevel
+        DataSchema()
+
+    def time_search_schema(self):
+        from rcsbapi import const  # pylint: disable=import-outside-toplevel
+        from rcsbapi.search.search_query import Attr  # pylint: disable=import-outside-toplevel
+        from rcsbapi.search.search_schema import SearchSchema  # pylint: disable=import-outside-toplevel
+        # The default schema URLs are bound when the module is imported, so pass the redirected ones
+        SearchSchema(
+            Attr,
+            struct_attr_schema_url=const.const.SEARCH_API_STRUCTURE_ATTRIBUTE_SCHEMA_URL,
+            chem_attr_schema_url=const.const.SEARCH_API_CHEMICAL_ATTRIBUTE_SCHEMA_URL,
+        )
+
+
+class ConstructQuery(MockServerBenchmark):
+    """`DataSchema.construct_query` for increasing numbers of requested fields"""
+
+    params = list(FIELDS)
+    param_names = ["return_data_list"]
+
+    def setup(self, *params):
+        super().setup(*params)
+        from rcsbapi.data import DATA_SCHEMA  # pylint: disable=import-outside-toplevel
+        self.schema = DATA_SCHEMA
+
+    def time_construct_query(self, fields):
+        self.schema.construct_query("entries", ["4HHB"], list(FIELDS[fields]))
+
+
+class DataQueryExec(MockServerBenchmark):
+    """`DataQuery.exec` of many input_ids, which is split into batches of 50 input_ids"""
+
+    params = ([50, 500, 2000], [0.0, 0.01])
+    param_names = ["input_ids", "latency"]
+    timeout = 120
+
+    def options(self, num_ids, latency):  # pylint: disable=arguments-differ
+        return {"latency": latency}
+
+    def setup(self, *params):
+        super().setup(*params)
+        from rcsbapi.data import DataQuery  # pylint: disable=import-outside-toplevel
+        self.query = DataQuery("entries", [entry_id(idx) for idx in range(params[0])], list(FIELDS["5 fields"]))
+
+    def time_exec(self, num_ids, latency):
+        self.query.exec()
+
+    def time_iter_batches(self, num_ids, latency):
+        for _ in self.query.iter_batches():
+            pass
+
+
+class SessionPaging(MockServerBenchmark):
+    """Iterating over 20,000 search results page by page"""
+
+    params = [1000, 10000]
+    param_names = ["rows"]
+    server_options = {"search_hits": 20000}
+
+    def setup(self, *params):
+        super().setup(*params)
+        from rcsbapi.search import TextQuery  # pylint: disable=import-outside-toplevel
+        self.query = TextQuery("hemoglobin")
+
+    def time_paging(self, rows):
+        for _ in self.query(rows=rows):
+            pass
+
+    def track_pages(self, rows):
+        self.server.requests.clear()
+        for _ in self.query(rows=rows):
+            pass
+        return self.server.requests["search"]
+
+    track_pages.unit = "requests"  # type: ignore[attr-defined]
+
+
+class SearchAllHits(MockServerBenchmark):
+    """Iterating over 20,000 search results streamed in a single `return_all_hits` request"""
+
+    server_options = {"search_hits": 20000}
+
+    def setup(self, *params):
+        super().setup(*params)
+        from rcsbapi.search import TextQuery  # pylint: disable=import-outside-toplevel
+        self.query = TextQuery("hemoglobin")
+
+    def time_all_hits(self):
+        for _ in self.query(return_all_hits=True):
+            pass
+
+
+class Startup:
+    """Cold start of each subpackage, measured in fresh interpreters (see startup.py)"""
+
+    params = SUBPACKAGES
+    param_names = ["subpackage"]
+    timeout = 300
+
+    def setup_cache(self):
+        return {subpackage: measure(subpackage, repeat=3) for subpackage in SUBPACKAGES}
+
+    def track_import_time(self, results, subpackage):
+        return results[subpackage]["import_time"]["median"]
+
+    track_import_time.unit = "seconds"  # type: ignore[attr-defined]
+
+    def track_peak_rss(self, results, subpackage):
+        return results[subpackage]["peak_rss_mb"]
+
+    track_peak_rss.unit = "MB"  # type: ignore[attr-defined]
+
+    def track_requests(self, results, subpackage):
+        return sum(results[subpackage]["requests"].values())
+
+    track_requests.unit = "requests"  # type: ignore[attr-defined]
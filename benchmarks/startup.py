@@ -0,0 +1,210 @@
+"""Import-time (cold start) benchmark of the rcsbapi subpackages
+
+`import rcsbapi.data` and `import rcsbapi.search` fetch and parse the API schemas and build their indexes.
+Each import is measured in a fresh interpreter, with the API endpoints pointed at a local
+:py:class:`rcsbapi.dev_tools.mock_server.MockRCSBServer` and any other network access blocked. For each
+subpackage, this reports:
+
+* import time (median and best of `--repeat` runs)
+* peak resident memory of the interpreter after the import
+* requests made, per endpoint, and blocked attempts to reach other hosts
+* stages of the import: time of the schema fetches, parsing and index/graph building (from a profiled run,
+  so they are inflated by the profiler and are best read as proportions), and cumulative import time of the
+  heavy dependencies (from `python -X importtime`)
+
+Usage:
+    python -m benchmarks.startup [--repeat N] [--json startup.json] [rcsbapi.data ...]
+
+The JSON output can be kept as a CI artifact to compare releases. The `Startup` benchmarks in
+`benchmarks.py` run the same measurements under asv.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from rcsbapi.dev_tools.mock_server import DATA_PATH, SEARCH_QUERY_PATH, MockRCSBServer
+
+SUBPACKAGES = ["rcsbapi.data", "rcsbapi.search"]
+
+# (label, file name, function name) of the functions timed as stages of each import
+STAGES = {
+    "rcsbapi.data": [
+        ("fetch introspection schema", "data_schema.py", "_fetch_schema"),
+        ("fetch root types", "data_schema.py", "_request_root_types"),
+        ("decode JSON", "json_codec.py", "decode_response"),
+        ("graphql build_client_schema", "build_client_schema.py", "build_client_schema"),
+        ("type and field indexes", "data_schema.py", "_construct_type_dict"),
+        ("field name list", "data_schema.py", "_construct_name_list"),
+        ("root dict", "data_schema.py", "_construct_root_dict"),
+        ("build schema graph", "data_schema.py", "_recurse_build_schema"),
+        ("apply edge weights", "data_schema.py", "_apply_weights"),
+    ],
+    "rcsbapi.search": [
+        ("fetch attribute schemas", "search_schema.py", "_fetch_schema"),
+        ("load packaged schemas", "search_schema.py", "_load_json_schema"),
+        ("decode JSON", "json_codec.py", "decode_response"),
+        ("build attribute tree", "search_schema.py", "_make_schema_group"),
+    ],
+}
+
+DEPENDENCIES = ["requests", "graphql", "rustworkx", "rcsbapi.json_codec", "rcsbapi.data.data_schema", "rcsbapi.search.search_schema"]
+
+# Runs in a fresh interpreter: argv = [subpackage, endpoints (JSON), stages (JSON), "profile" or "time"]
+_CHILD = r"""
+import dataclasses, importlib, json, resource, socket, sys, time
+
+subpackage, endpoints, stages, mode = sys.argv[1], json.loads(sys.argv[2]), json.loads(sys.argv[3]), sys.argv[4]
+LOCAL = ("127.0.0.1", "::1", "localhost")
+blocked = []
+_connect, _getaddrinfo = socket.socket.connect, socket.getaddrinfo
+
+def connect(self, address):
+    if isinstance(address, tuple) and address[0] not in LOCAL:
+        blocked.append(address[0])
+        raise OSError("Network access is blocked by the startup benchmark")
+    return _connect(self, address)
+
+def getaddrinfo(host, *args, **kwargs):
+    if host not in LOCAL:
+        blocked.append(host)
+        raise socket.gaierror("Network access is blocked by the startup benchmark")
+    return _getaddrinfo(host, *args, **kwargs)
+
+socket.socket.connect, socket.getaddrinfo = connect, getaddrinfo
+import rcsbapi.const
+rcsbapi.const.const = dataclasses.replace(rcsbapi.const.const, **endpoints)
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+result = {}
+if mode == "profile":
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    importlib.import_module(subpackage)
+    profiler.disable()
+    profiler.create_stats()
+    times = {}
+    for (filename, _, function), (_, _, _, cumulative, _) in profiler.stats.items():
+        for label, stage_file, stage_function in stages:
+            if function == stage_function and filename.endswith(stage_file):
+                times[label] = times.get(label, 0.0) + cumulative
+    result["stages"] = times
+else:
+    start = time.perf_counter()
+    importlib.import_module(subpackage)
+    result["import_time"] = time.perf_counter() - start
+result["rss_before"] = rss_before
+result["peak_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+result["blocked"] = blocked
+print(json.dumps(result))
+"""
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def _run_child(server: MockRCSBServer, subpackage: str, mode: str, importtime: bool = False) -> Dict[str, Any]:
+    endpoints = {
+        "DATA_API_ENDPOINT": server.url + DATA_PATH,
+        "RCSB_SEARCH_API_QUERY_URL": server.url + SEARCH_QUERY_PATH,
+        "SEARCH_API_STRUCTURE_ATTRIBUTE_SCHEMA_URL": server.url + "/rcsbsearch/v2/metadata/schema",
+        "SEARCH_API_CHEMICAL_ATTRIBUTE_SCHEMA_URL": server.url + "/rcsbsearch/v2/metadata/chemical/schema",
+    }
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", _CHILD, subpackage, json.dumps(endpoints), json.dumps(STAGES.get(subpackage, [])), mode]
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join([str(Path(__file__).parent.parent)] + [path for path in [os.environ.get("PYTHONPATH")] if path]))
+    completed = subprocess.run(command, capture_output=True, text=True, env=environment, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {subpackage} failed:\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    if importtime:
+        result["dependencies"] = _parse_importtime(completed.stderr)
+    return result
+
+
+def _parse_importtime(output: str) -> Dict[str, float]:
+    """Cumulative import time (seconds) of the modules in DEPENDENCIES"""
+    times: Dict[str, float] = {}
+    for match in _IMPORTTIME.finditer(output):
+        module = match.group(4)
+        if module in DEPENDENCIES:
+            times[module] = int(match.group(2)) / 1e6
+    return times
+
+
+def _to_mb(max_rss: int) -> float:
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return max_rss / 1e6 if platform.system() == "Darwin" else max_rss / 1e3
+
+
+def measure(subpackage: str, repeat: int = 5, server: Optional[MockRCSBServer] = None) -> Dict[str, Any]:
+    """Measure the cold start of one subpackage
+
+    Args:
+        subpackage (str): module to import (e.g., "rcsbapi.data")
+        repeat (int, optional): number of timed imports. Defaults to 5.
+        server (Optional[MockRCSBServer], optional): running mock server. Defaults to a new one.
+
+    Returns:
+        Dict[str, Any]: import times, memory (MB), requests and stage timings (seconds)
+    """
+    if server is None:
+        with MockRCSBServer() as new_server:
+            return measure(subpackage, repeat, new_server)
+    server.requests.clear()
+    runs = [_run_child(server, subpackage, "time") for _ in range(repeat)]
+    requests_per_import = {endpoint: count // repeat for endpoint, count in server.requests.items()}
+    profiled = _run_child(server, subpackage, "profile")
+    importtime = _run_child(server, subpackage, "time", importtime=True)
+    times = [run["import_time"] for run in runs]
+    return {
+        "import_time": {"median": statistics.median(times), "min": min(times)},
+        "rss_before_mb": _to_mb(min(run["rss_before"] for run in runs)),
+        "peak_rss_mb": _to_mb(max(run["peak_rss"] for run in runs)),
+        "requests": requests_per_import,
+        "blocked_requests": sorted({host for run in runs for host in run["blocked"]}),
+        "stages": profiled["stages"],
+        "dependencies": importtime["dependencies"],
+    }
+
+
+def report(subpackage: str, result: Dict[str, Any]) -> str:
+    lines = [
+        f"{subpackage}",
+        f"  import time        {result['import_time']['median'] * 1000:10.1f} ms (median), {result['import_time']['min'] * 1000:.1f} ms (best)",
+        f"  peak RSS           {result['peak_rss_mb']:10.1f} MB ({result['rss_before_mb']:.1f} MB before importing)",
+        f"  requests           {sum(result['requests'].values()):10d} " + ", ".join(f"{endpoint}: {count}" for endpoint, count in sorted(result["requests"].items())),
+    ]
+    if result["blocked_requests"]:
+        lines.append(f"  BLOCKED requests to: {', '.join(result['blocked_requests'])}")
+    lines.append("  stages (profiled)")
+    for label, seconds in sorted(result["stages"].items(), key=lambda item: [stage[0] for stage in STAGES.get(subpackage, [])].index(item[0])):
+        lines.append(f"    {label:<32}{seconds * 1000:10.1f} ms")
+    lines.append("  dependency imports (cumulative)")
+    for module, seconds in result["dependencies"].items():
+        lines.append(f"    {module:<32}{seconds * 1000:10.1f} ms")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> None:  # type: ignore
+    parser = argparse.ArgumentParser(description="Measure import time, memory and requests of the rcsbapi subpackages")
+    parser.add_argument("subpackages", nargs="*", default=SUBPACKAGES, help="modules to import (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed imports per subpackage (default: %(default)s)")
+    parser.add_argument("--json", type=Path, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    results = {}
+    with MockRCSBServer() as server:
+        for subpackage in args.subpackages:
+            results[subpackage] = measure(subpackage, args.repeat, server)
+            print(report(subpackage, results[subpackage]))
+    if args.json is not None:
+        args.json.write_text(json.dumps({"python": platform.python_version(), "results": results}, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Command-line interface for bulk exports
+
+Examples:
+    # Fetch data for the entry IDs in ids.txt (one per line) into NDJSON, resuming if interrupted
+    rcsbapi data entries -i ids.txt -f exptl.method -f rcsb_entry_info.resolution_combined -o entries.ndjson --resume
+
+    # Dump the IDs of all entries matching a search
+    rcsbapi search --where exptl.method exact_match "ELECTRON MICROSCOPY" -o em_ids.txt
+"""
+from __future__ import annotations
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Any, Iterator, List, Optional, Sequence
+
+from . import __version__
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+
+def _read_ids(path: str) -> List[str]:
+    """Read identifiers from a file (or stdin for "-"), one per line. Blank lines and lines starting with "#" are skipped."""
+    file = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")  # pylint: disable=consider-using-with
+    try:
+        return [line.strip() for line in file if line.strip() and not line.lstrip().startswith("#")]
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+def _parse_value(value: str) -> Any:
+    """Parse a search value as JSON (numbers, booleans, lists), falling back to a plain string"""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="rcsbapi", description="Bulk exports from the RCSB PDB Data and Search APIs")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    data = subparsers.add_parser("data", help="export Data API records for a list of identifiers")
+    data.add_argument("input_type", help='Data API input type (e.g., "entries", "polymer_entities")')
+    data.add_argument("-i", "--ids", required=True, help='file with one identifier per line ("-" for stdin)')
+    data.add_argument("-f", "--field", dest="fields", action="append", required=True, help="field to return (repeatable), as in DataQuery's return_data_list")
+    data.add_argument("-o", "--output", required=True, help="output file")
+    data.add_argument("--format", choices=["ndjson", "parquet"], default="ndjson", help="output format (default: ndjson)")
+    data.add_argument("--compression", help='Parquet compression codec (default: "snappy")')
+    data.add_argument("--explode", help="Parquet only: list field to expand into one row per element")
+    data.add_argument("--workers", type=int, default=config.DATA_API_MAX_WORKERS, help="concurrent requests (default: %(default)s)")
+    data.add_argument("--batch-size", type=int, default=50, help="identifiers per request (default: %(default)s)")
+    data.add_argument("--rate-limit", type=int, default=config.DATA_API_REQUESTS_PER_SECOND, help="maximum requests per second, 0 for no limit (default: %(default)s)")
+    data.add_argument("--resume", action="store_true", help="NDJSON only: keep a journal next to the output and continue an interrupted export")
+    data.set_defaults(run=_run_data)
+
+    search = subparsers.add_parser("search", help="dump the identifiers matching a search")
+    search.add_argument("text", nargs="?", help="full-text query")
+    search.add_argument("--where", nargs=3, action="append", default=[], metavar=("ATTRIBUTE", "OPERATOR", "VALUE"), help="attribute query (repeatable, combined with AND)")
+    search.add_argument("-o", "--output", default="-", help='output file (default: "-" for stdout)')
+    search.add_argument("--format", choices=["ids", "ndjson", "parquet"], default="ids", help="ids: one identifier per line (default: ids)")
+    search.add_argument("--return-type", default="entry", help="type of the returned identifiers (default: %(default)s)")
+    search.add_argument("--computational", action="store_true", help="include computed structure models")
+    search.add_argument("--rows", type=int, default=10000, help="page size (default: %(default)s)")
+    search.add_argument("--all-hits", action="store_true", help="stream all results in a single request instead of paging")
+    search.add_argument("--rate-limit", type=int, default=config.SEARCH_API_REQUESTS_PER_SECOND, help="maximum requests per second, 0 for no limit (default: %(default)s)")
+    search.add_argument("--cache-dir", help="ids only: directory for cached search results (stored as <hash>.json files)")
+    search.set_defaults(run=_run_search)
+    return parser
+
+
+def _run_data(args: argparse.Namespace) -> int:
+    from .data import DataQuery, DataQueryJob  # pylint: disable=import-outside-toplevel
+    from .pipeline import SearchDataPipeline  # pylint: disable=import-outside-toplevel
+    from .sinks import ParquetSink  # pylint: disable=import-outside-toplevel
+
+    config.DATA_API_REQUESTS_PER_SECOND = args.rate_limit
+    ids = _read_ids(args.ids)
+    if not ids:
+        logger.warning("No identifiers in %s", args.ids)
+    query = DataQuery(input_type=args.input_type, input_ids=ids, return_data_list=args.fields, suppress_autocomplete_warning=True)
+
+    if args.format == "ndjson":
+        if args.explode or args.compression:
+            raise ValueError("--explode and --compression are only supported for Parquet output")
+        job = DataQueryJob(query, args.output, batch_size=args.batch_size, workers=args.workers)
+        if not args.resume:
+            for path in (args.output, job.journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        num_records = job.run()
+        if not args.resume:
+            os.remove(job.journal_path)
+    else:
+        if args.resume:
+            raise ValueError("--resume is only supported for NDJSON output")
+        pipeline = SearchDataPipeline(
+            query.get_input_ids(),
+            input_type=query.get_input_type(),
+            return_data_list=args.fields,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            suppress_autocomplete_warning=True,
+        )
+        with ParquetSink(args.output, compression=args.compression or "snappy") as sink:
+            sink.set_columns(query.get_columns(), args.explode)
+            sink.write_many(pipeline)
+            num_records = sink.num_records
+    logger.info("Wrote %d records to %s", num_records, args.output)
+    return 0
+
+
+def _iter_ids(session: Any) -> Iterator[str]:
+    for result in session:
+        yield (result if isinstance(result, str) else result["identifier"]) + "\n"
+
+
+def _run_search(args: argparse.Namespace) -> int:
+    from .search import AttributeQuery, TextQuery  # pylint: disable=import-outside-toplevel
+    from .search.search_query import Session  # pylint: disable=import-outside-toplevel
+    from .sinks import NDJSONSink, ParquetSink  # pylint: disable=import-outside-toplevel
+
+    if args.cache_dir and args.format != "ids":
+        # Exports stream results into the sink without holding them, so they aren't cached
+        raise ValueError("--cache-dir is only supported for --format ids")
+    config.SEARCH_API_REQUESTS_PER_SECOND = args.rate_limit
+    if args.cache_dir:
+        config.SEARCH_CACHE_DIR = args.cache_dir
+        config.SEARCH_CACHE_RESULTS = True
+
+    queries: List[Any] = [TextQuery(args.text)] if args.text else []
+    queries.extend(AttributeQuery(attribute, operator, _parse_value(value)) for attribute, operator, value in args.where)
+    if not queries:
+        raise ValueError("Give a full-text query and/or --where ATTRIBUTE OPERATOR VALUE")
+    query = queries[0]
+    for other in queries[1:]:
+        query = query & other
+
+    session = Session(
+        query,
+        return_type=args.return_type,
+        rows=args.rows,
+        return_content_type=["experimental", "computational"] if args.computational else ["experimental"],
+        return_all_hits=args.all_hits,
+    )
+    if args.format == "ids":
+        if args.output == "-":
+            sys.stdout.writelines(_iter_ids(session))
+        else:
+            with open(args.output, "w", encoding="utf-8") as file:
+                file.writelines(_iter_ids(session))
+    else:
+        if args.output == "-":
+            raise ValueError(f"--format {args.format} requires an --output file")
+        sink_class = NDJSONSink if args.format == "ndjson" else ParquetSink
+        with sink_class(args.output) as sink:
+            session.export(sink)
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the `rcsbapi` command
+
+    Args:
+        argv (Optional[Sequence[str]], optional): command-line arguments. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: exit status
+    """
+    parser = _make_parser()
+    args = parser.parse_args(argv)
+    if args.verbose:
+        logging.getLogger("rcsbapi").setLevel(logging.INFO)
+    try:
+        return args.run(args)
+    except (ValueError, OSError) as error:
+        parser.exit(1, f"rcsbapi: error: {error}\n")
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,8 +19,20 @@ logger = logging.getLogger(__name__)
 
 class Config:
     DATA_API_TIMEOUT: int = 60
+    DATA_API_REQUESTS_PER_SECOND: int = 5
+    DATA_API_MAX_WORKERS: int = 4
+    DATA_API_VALIDATE_QUERIES: bool = True
+    DATA_SCHEMA_COMPACT: bool = False
     SEARCH_API_REQUESTS_PER_SECOND: int = 10
+    SEARCH_API_MAX_WORKERS: int = 4
+    SEARCH_CACHE_TTL: int = 600
+    SEARCH_CACHE_RESULTS: bool = False
+    SEARCH_CACHE_DIR: str = ""
+    SEARCH_OPTIMIZE_QUERIES: bool = True
     SUPPRESS_AUTOCOMPLETE_WARNING: bool = False
+    DATA_QUERY_PROFILING: bool = False
+    JSON_BACKEND: str = "auto"
+    SCHEMA_RELOAD_INTERVAL: int = 3600
 
     def __setattr__(self, name, value):
         """Verify attribute exists when a user tries to set a configuration parameter, and ensure proper typing.
@@ -1,9 +1,11 @@
 """RCSB PDB Data API"""
 
+from .. import shared_schema
 from .data_schema import DataSchema
 
-DATA_SCHEMA = DataSchema()
+DATA_SCHEMA: DataSchema = shared_schema.attached("data") or DataSchema()
 
 from .data_query import DataQuery  # noqa:E402
+from .data_job import DataQueryJob  # noqa:E402
 
-__all__ = ["DataQuery", "DataSchema"]
+__all__ = ["DataQuery", "DataQueryJob", "DataSchema"]
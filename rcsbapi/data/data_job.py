@@ -0,0 +1,168 @@
+"""Checkpointed, resumable bulk Data API exports
+
+A :py:class:`DataQueryJob` requests the input_ids of a :py:class:`DataQuery` in batches and appends each
+batch's records to an NDJSON file. After a batch is written, its ID range and the output byte offsets are
+committed to a SQLite journal. If the job is interrupted, running it again truncates any partially written
+batch, skips the batches in the journal and continues with the rest. Running a finished job again makes no requests.
+A journal is only resumed if the output still holds everything it records.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Set, Union
+
+from .. import json_codec
+from ..config import config
+from .data_query import DataQuery
+
+logger = logging.getLogger(__name__)
+
+_JOURNAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS batches (
+    batch INTEGER PRIMARY KEY,
+    first_id TEXT NOT NULL,
+    last_id TEXT NOT NULL,
+    num_records INTEGER NOT NULL,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL
+);
+"""
+
+
+class DataQueryJob:
+    """Resumable export of a DataQuery to an NDJSON file, one record per line.
+
+    Batches run concurrently and are appended to the output in the order they complete,
+    so records aren't necessarily in input_id order.
+
+    Example:
+        >>> query = DataQuery("entries", entry_ids, ["exptl.method"])
+        >>> job = DataQueryJob(query, "entries.ndjson")
+        >>> job.run()  # after an interruption, run again to continue where it stopped
+    """
+
+    def __init__(
+        self,
+        query: DataQuery,
+        output_path: Union[str, os.PathLike],
+        journal_path: Optional[Union[str, os.PathLike]] = None,
+        batch_size: int = 50,
+        workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            query (DataQuery): query to export
+            output_path (Union[str, os.PathLike]): NDJSON output file
+            journal_path (Optional[Union[str, os.PathLike]], optional): SQLite journal of completed batches.
+                Defaults to the output path with a ".journal" suffix.
+            batch_size (int, optional): number of input_ids per request. Defaults to 50.
+            workers (Optional[int], optional): number of concurrent requests. Defaults to `config.DATA_API_MAX_WORKERS`.
+        """
+        self.query = query
+        self.output_path = os.fspath(output_path)
+        self.journal_path = os.fspath(journal_path) if journal_path is not None else self.output_path + ".journal"
+        self.batch_size = batch_size
+        self.workers = workers if workers is not None else config.DATA_API_MAX_WORKERS
+        self._batches = query._batch_ids(batch_size)
+
+    @property
+    def num_batches(self) -> int:
+        return len(self._batches)
+
+    def _fingerprint(self) -> str:
+        """Identifies the job, so a journal isn't resumed with a different query or batching"""
+        return hashlib.sha256(json.dumps([self.query.get_query(), self.batch_size]).encode("utf-8")).hexdigest()
+
+    def _open_journal(self) -> sqlite3.Connection:
+        journal = sqlite3.connect(self.journal_path)
+        journal.executescript(_JOURNAL_SCHEMA)
+        fingerprint = self._fingerprint()
+        row = journal.execute("SELECT value FROM job WHERE key = 'fingerprint'").fetchone()
+        if row is None:
+            with journal:
+                journal.execute("INSERT INTO job VALUES ('fingerprint', ?)", (fingerprint,))
+        elif row[0] != fingerprint:
+            journal.close()
+            raise ValueError(f"Journal {self.journal_path} belongs to a different job. Remove it or choose another journal_path.")
+        return journal
+
+    def completed_batches(self) -> Set[int]:
+        """Indices of the batches recorded in the journal"""
+        if not os.path.exists(self.journal_path):
+            return set()
+        journal = self._open_journal()
+        try:
+            return {row[0] for row in journal.execute("SELECT batch FROM batches")}
+        finally:
+            journal.close()
+
+    def run(self) -> int:
+        """Run (or resume) the job
+
+        Raises:
+            ValueError: the output is shorter than the journal records (e.g., it was deleted or replaced after an earlier run).
+            Exception: the first error raised by a request. Batches completed before it stay in the journal.
+
+        Returns:
+            int: total number of records in the output, including those written by earlier runs
+        """
+        journal = self._open_journal()
+        try:
+            done = {row[0] for row in journal.execute("SELECT batch FROM batches")}
+            end_offset, num_records = journal.execute("SELECT COALESCE(MAX(end_offset), 0), COALESCE(SUM(num_records), 0) FROM batches").fetchone()
+            output_size = os.path.getsize(self.output_path) if os.path.exists(self.output_path) else 0
+            if output_size < end_offset:
+                raise ValueError(
+                    f"Output {self.output_path} is shorter than the {end_offset} bytes recorded in journal {self.journal_path}. "
+                    "Remove the journal to start over."
+                )
+            pending = [idx for idx in range(len(self._batches)) if idx not in done]
+            if not pending:
+                logger.info("All %d batches of %s are complete", len(self._batches), self.output_path)
+                return num_records
+            logger.info("Running %d of %d batches (%d already complete)", len(pending), len(self._batches), len(done))
+
+            with open(self.output_path, "ab") as output:
+                # Drop anything written after the last committed batch
+                output.truncate(end_offset)
+                output.seek(end_offset)
+                with ThreadPoolExecutor(max_workers=max(self.workers, 1)) as executor:
+                    in_flight: Dict[Future, int] = {}
+                    next_idx = 0
+                    try:
+                        while next_idx < len(pending) or in_flight:
+                            # Keep a bounded number of batches in flight, so results don't pile up in memory
+                            while next_idx < len(pending) and len(in_flight) < 2 * max(self.workers, 1):
+                                batch_idx = pending[next_idx]
+                                in_flight[executor.submit(self.query._fetch_batch, self._batches[batch_idx], batch_idx)] = batch_idx
+                                next_idx += 1
+                            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                            for future in finished:
+                                batch_idx = in_flight.pop(future)
+                                end_offset = self._append(output, journal, batch_idx, future.result(), end_offset)
+                                num_records += len(future.result())
+                    finally:
+                        for future in in_flight:
+                            future.cancel()
+            return num_records
+        finally:
+            journal.close()
+
+    def _append(self, output: Any, journal: sqlite3.Connection, batch_idx: int, records: List[Dict[str, Any]], start_offset: int) -> int:
+        """Append a batch to the output, then commit it to the journal. Returns the new end of the output."""
+        output.write("".join(json_codec.dumps(record) + "\n" for record in records).encode("utf-8"))
+        output.flush()
+        os.fsync(output.fileno())
+        end_offset = output.tell()
+        id_batch = self._batches[batch_idx]
+        with journal:
+            journal.execute(
+                "INSERT INTO batches VALUES (?, ?, ?, ?, ?, ?)",
+                (batch_idx, id_batch[0], id_batch[-1], len(records), start_offset, end_offset),
+            )
+        return end_offset
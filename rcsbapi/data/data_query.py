@@ -1,15 +1,27 @@
+import contextlib
+import json
 import logging
 import urllib.parse
 import re
-import time
-from typing import Any, Union, List, Dict, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Iterator, Union, List, Dict, Optional, Tuple
 import requests
-from rcsbapi.data import DATA_SCHEMA
+import rcsbapi.data
 from ..config import config
 from ..const import const
+from ..instrumentation import RequestTimer
+from ..rate_limiter import DATA_RATE_LIMITER
+from . import query_profile
+from .data_table import ColumnPlan, plan_columns, to_arrow, to_pandas
+
+if TYPE_CHECKING:
+    from ..sinks import RecordSink
+    from .data_schema import DataSchema
 
 logger = logging.getLogger(__name__)
 
+# The input ID list of a plural input type is the first list in the query
+_INPUT_ID_LIST = re.compile(r"\[([^]]+)\]")
+
 
 class DataQuery:
     """
@@ -45,16 +57,22 @@ class DataQuery:
                 if len(value) > input_id_limit:
                     logger.warning("More than %d input_ids. For a more readable response, reduce number of ids.", input_id_limit)
 
+        self._schema: "DataSchema" = rcsbapi.data.DATA_SCHEMA
+        """Schema the query is built with. Kept for the life of the query, even if the schemas are reloaded."""
         self._input_type, self._input_ids = self._process_input_ids(input_type, input_ids)
-        self._return_data_list = return_data_list
-        self._query = DATA_SCHEMA.construct_query(
-            input_type=self._input_type,
-            input_ids=self._input_ids,
-            return_data_list=return_data_list,
-            add_rcsb_id=add_rcsb_id,
-            suppress_autocomplete_warning=suppress_autocomplete_warning
-        )
-        """GraphQL query as a string"""
+        self._return_data_list = list(return_data_list)
+        profiling = query_profile.profiling(self._input_type, return_data_list) if config.DATA_QUERY_PROFILING else contextlib.nullcontext()
+        with profiling as profile:
+            self._query = self._schema.construct_query(
+                input_type=self._input_type,
+                input_ids=self._input_ids,
+                return_data_list=return_data_list,
+                add_rcsb_id=add_rcsb_id,
+                suppress_autocomplete_warning=suppress_autocomplete_warning
+            )
+            """GraphQL query as a string"""
+        self._profile: Optional[query_profile.QueryProfile] = profile
+        """Timings of query construction, if `config.DATA_QUERY_PROFILING` was enabled"""
         self._response: Optional[Dict[str, Any]] = None
         """JSON response to query, will be assigned after executing"""
 
@@ -72,7 +90,7 @@ class DataQuery:
         """
         # Convert _input_type to plural if applicable
         converted = False
-        if DATA_SCHEMA._root_dict[input_type][0]["kind"] != "LIST":
+        if self._schema._root_dict[input_type][0]["kind"] != "LIST":
             plural_type = const.SINGULAR_TO_PLURAL[input_type]
             if plural_type:
                 input_type = plural_type
@@ -95,7 +113,7 @@ class DataQuery:
 
             else:
                 # If not converted, retrieve id list from dictionary
-                input_ids = list(input_ids[DATA_SCHEMA._root_dict[input_type][0]["name"]])
+                input_ids = list(input_ids[self._schema._root_dict[input_type][0]["name"]])
 
         # Make all input_ids uppercase
         input_ids = [id.upper() for id in input_ids]
@@ -137,6 +155,22 @@ class DataQuery:
         """
         return self._query
 
+    def get_columns(self) -> List[ColumnPlan]:
+        """get columns (leaf fields) of the flattened records, with types taken from this query's schema
+
+        Returns:
+            List[ColumnPlan]: columns, as used by `to_table()` and `export()`
+        """
+        return plan_columns(self._query, self._input_type, self._schema._client_schema)
+
+    def get_profile(self) -> Optional[query_profile.QueryProfile]:
+        """get timings of query construction, recorded if `config.DATA_QUERY_PROFILING` was enabled
+
+        Returns:
+            Optional[QueryProfile]: per-phase timings, graph-operation counts and per-field timings, or None
+        """
+        return self._profile
+
     def get_response(self) -> Union[None, Dict[str, Any]]:
         """get JSON response to executed query
 
@@ -154,6 +188,75 @@ class DataQuery:
         editor_base_link = str(const.DATA_API_ENDPOINT) + "/index.html?query="
         return editor_base_link + urllib.parse.quote(self._query)
 
+    def _records(self) -> List[Dict[str, Any]]:
+        """Records under `response["data"][input_type]`, running the query first if needed"""
+        response = self._response if self._response is not None else self.exec()
+        records = response.get("data", {}).get(self._input_type)
+        if records is None:
+            return []
+        return records if isinstance(records, list) else [records]
+
+    def to_table(self, explode: Optional[str] = None) -> Any:
+        """Flatten the response into a `pyarrow.Table`, with one column per requested field.
+        Runs the query if it hasn't been executed yet. Requires pyarrow.
+
+        Args:
+            explode (Optional[str], optional): dot-separated path of a list field (e.g., "polymer_entities") to
+                expand into one row per element. Defaults to None (one row per input_id; fields below lists become list columns).
+
+        Returns:
+            pyarrow.Table: flattened response, with column types taken from the schema
+        """
+        columns = self.get_columns()
+        return to_arrow(self._records(), columns, explode)
+
+    def to_dataframe(self, explode: Optional[str] = None) -> Any:
+        """Flatten the response into a `pandas.DataFrame`, with one column per requested field.
+        Runs the query if it hasn't been executed yet. Requires pandas (and uses pyarrow if it is installed).
+
+        Args:
+            explode (Optional[str], optional): dot-separated path of a list field (e.g., "polymer_entities") to
+                expand into one row per element. Defaults to None (one row per input_id; fields below lists become list columns).
+
+        Returns:
+            pandas.DataFrame: flattened response, with column types taken from the schema
+        """
+        columns = self.get_columns()
+        return to_pandas(self._records(), columns, explode)
+
+    def iter_batches(self, batch_size: int = 50) -> Iterator[List[Dict[str, Any]]]:
+        """Request input_ids in batches and yield the records of each batch as it arrives.
+        Unlike `exec()`, responses aren't merged or kept.
+
+        Args:
+            batch_size (int, optional): number of input_ids per request. Defaults to 50.
+
+        Yields:
+            List[Dict[str, Any]]: records under `response["data"][input_type]` for one batch
+        """
+        for index, id_batch in enumerate(self._batch_ids(batch_size)):
+            yield self._fetch_batch(id_batch, index)
+
+    def export(self, sink: "RecordSink", batch_size: int = 50, explode: Optional[str] = None) -> int:
+        """Stream records into a sink (e.g., :py:class:`rcsbapi.sinks.NDJSONSink` or :py:class:`rcsbapi.sinks.ParquetSink`)
+        batch by batch, without holding the full response in memory. The sink isn't closed.
+
+        Args:
+            sink (RecordSink): sink to write records to
+            batch_size (int, optional): number of input_ids per request. Defaults to 50.
+            explode (Optional[str], optional): for columnar sinks, dot-separated path of a list field to expand into
+                one row per element, as for `to_table()`. Defaults to None.
+
+        Returns:
+            int: number of records written
+        """
+        sink.set_columns(self.get_columns(), explode)
+        num_records = 0
+        for records in self.iter_batches(batch_size):
+            sink.write_many(records)
+            num_records += len(records)
+        return num_records
+
     def exec(self) -> Dict[str, Any]:
         """POST a GraphQL query and get response
 
@@ -164,29 +267,14 @@ class DataQuery:
         if len(self._input_ids) > batch_size:
             batched_ids = self._batch_ids(batch_size)
             response_json: Dict[str, Any] = {}
-            # count = 0
-            for id_batch in batched_ids:
-                query = re.sub(r"\[([^]]+)\]", f"{id_batch}".replace("'", '"'), self._query)
-                part_response = requests.post(
-                    headers={"Content-Type": "application/graphql"},
-                    data=query,
-                    url=const.DATA_API_ENDPOINT,
-                    timeout=config.DATA_API_TIMEOUT
-                ).json()
-                self._parse_gql_error(part_response)
-                time.sleep(0.2)
+            for index, id_batch in enumerate(batched_ids):
+                part_response = self._post(self._batch_query(id_batch), index)
                 if not response_json:
                     response_json = part_response
                 else:
                     response_json = self._merge_response(response_json, part_response)
         else:
-            response_json = requests.post(
-                headers={"Content-Type": "application/graphql"},
-                data=self._query,
-                url=const.DATA_API_ENDPOINT,
-                timeout=config.DATA_API_TIMEOUT
-            ).json()
-            self._parse_gql_error(response_json)
+            response_json = self._post(self._query)
         if "data" in response_json.keys():
             query_response = response_json["data"][self._input_type]
             if query_response is None:
@@ -197,6 +285,54 @@ class DataQuery:
         self._response = response_json
         return response_json
 
+    def _batch_query(self, id_batch: List[str]) -> str:
+        """Get the query for a batch of input_ids
+
+        Args:
+            id_batch (List[str]): input_ids to substitute into the query
+
+        Returns:
+            str: query in GraphQL syntax
+        """
+        return _INPUT_ID_LIST.sub(lambda _: json.dumps(id_batch), self._query, count=1)
+
+    def _fetch_batch(self, id_batch: List[str], index: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Request a batch of input_ids and return its records under `response["data"][input_type]`
+
+        Args:
+            id_batch (List[str]): input_ids to request
+            index (Optional[int], optional): batch index, reported to request observers. Defaults to None.
+
+        Returns:
+            List[Dict[str, Any]]: records (empty if the input produced no results)
+        """
+        query = self._query if id_batch == self._input_ids else self._batch_query(id_batch)
+        records = self._post(query, index).get("data", {}).get(self._input_type)
+        if records is None:
+            return []
+        return records if isinstance(records, list) else [records]
+
+    def _post(self, query: str, index: Optional[int] = None) -> Dict[str, Any]:
+        """POST a single GraphQL query, within the Data API rate limit
+
+        Args:
+            query (str): query in GraphQL syntax
+            index (Optional[int], optional): batch index, reported to request observers. Defaults to None.
+
+        Returns:
+            Dict[str, Any]: JSON object
+        """
+        DATA_RATE_LIMITER.acquire()  # This prevents the user from bottlenecking the server with requests.
+        with RequestTimer("data", "query", const.DATA_API_ENDPOINT, index=index) as timer:
+            response_json = timer.decode(requests.post(
+                headers={"Content-Type": "application/graphql"},
+                data=query,
+                url=const.DATA_API_ENDPOINT,
+                timeout=config.DATA_API_TIMEOUT
+            ))
+        self._parse_gql_error(response_json)
+        return response_json
+
     def _parse_gql_error(self, response_json: Dict[str, Any]):
         if "errors" in response_json.keys():
             error_msg_list: list[str] = []
@@ -1,12 +1,19 @@
 import re
+import sys
+import zlib
 import logging
-from typing import List, Dict, Union, Any, Optional
-import json
+import threading
+from collections import Counter, OrderedDict
+from typing import List, Dict, Sequence, Tuple, Union, Any, Optional
 import os
 import requests
 # import networkx as nx
-from graphql import validate, parse, build_client_schema
+from graphql import GraphQLSchema, validate, parse, build_client_schema
 import rustworkx as rx
+from .. import json_codec
+from . import query_profile
+from .path_index import PathIndex
+from ..instrumentation import RequestTimer
 from ..config import config
 from ..const import const
 
@@ -22,6 +29,9 @@ use_networkx: bool = False
 
 logger = logging.getLogger(__name__)
 
+_DESCRIPTION_CACHE_TYPES = 64
+"""Number of types whose field descriptions are kept in compact mode (see `DataSchema.get_description`)"""
+
 
 class DataFieldNode:
     """
@@ -35,21 +45,23 @@ class DataFieldNode:
         index (int): graph index
     """
 
-    def __init__(self, kind: str, node_type: str, name: str, description: str):
+    __slots__ = ("name", "description", "redundant", "kind", "of_kind", "type", "index")
+
+    def __init__(self, kind: str, node_type: str, name: str, description: Optional[str]):
         """Initialize FieldNodes
 
         Args:
             kind (str): GraphQL kind, can be "OBJECT", "SCALAR", "LIST"
             node_type (str): If applicable, the GraphQL type returned by the field
             name (str): Name of field
-            description (str): Description of field
+            description (Optional[str]): Description of field (None if it's loaded on demand, see `DataSchema.get_description`)
         """
-        self.name: str = name
-        self.description: str = description
+        self.name: str = sys.intern(name)
+        self.description: Optional[str] = description
         self.redundant: bool = False
-        self.kind: str = kind
+        self.kind: str = sys.intern(kind)
         self.of_kind: str = ""
-        self.type: str = node_type
+        self.type: str = sys.intern(node_type)
         self.index: Optional[int] = None
 
     def __str__(self) -> str:
@@ -69,7 +81,7 @@ class DataFieldNode:
         Args:
             of_kind (str): GraphQL kind of the list returned by a node (a LIST can be "of_kind" OBJECT)
         """
-        self.of_kind = of_kind
+        self.of_kind = sys.intern(of_kind)
 
 
 class DataTypeNode:
@@ -77,13 +89,15 @@ class DataTypeNode:
     Class for nodes representing GraphQL Types in the schema graph.
     """
 
+    __slots__ = ("name", "index", "field_list")
+
     def __init__(self, name: str):
         """Initialize TypeNodes
 
         Args:
             name (str): name of GraphQL type (ex: CoreEntry)
         """
-        self.name = name
+        self.name = sys.intern(name)
         self.index: Optional[int] = None
         self.field_list: List[DataFieldNode] = []
 
@@ -107,16 +121,31 @@ class DataTypeNode:
 class DataSchema:
     """
     GraphQL schema defining available fields, types, and how they are connected.
+
+    A DataSchema isn't modified after it's built, so queries can be constructed from many threads at once.
+    Query construction doesn't modify its arguments.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, compact: Optional[bool] = None, schema: Optional[Dict] = None) -> None:
         """
         GraphQL schema defining available fields, types, and how they are connected.
+
+        Args:
+            compact (Optional[bool], optional): release the introspection JSON and intermediate indexes once the
+                schema graph is built, and load field descriptions on demand. Defaults to `config.DATA_SCHEMA_COMPACT`.
+            schema (Optional[Dict], optional): introspection JSON to build from, if it was already requested. Defaults to fetching it.
         """
         self.pdb_url: str = const.DATA_API_ENDPOINT
         self.timeout: int = config.DATA_API_TIMEOUT
-        self.schema: Dict = self._fetch_schema()
-        """JSON resulting from full introspection of GraphQL query"""
+        self.compact: bool = config.DATA_SCHEMA_COMPACT if compact is None else compact
+        self._raw_schema: Optional[Dict] = schema if schema is not None else self._fetch_schema()
+        """JSON resulting from full introspection of GraphQL query (None once released in compact mode)"""
+        self._packed_schema: bytes = b""
+        """zlib-compressed introspection JSON, kept instead of `_raw_schema` in compact mode"""
+        self._description_index: Optional[Dict[str, Dict[str, str]]] = None
+        self._type_descriptions: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        """field descriptions of the most recently used types, loaded on demand in compact mode"""
+        self._description_lock = threading.Lock()
 
         self._use_networkx: bool = use_networkx
         # if use_networkx:
@@ -132,19 +161,93 @@ class DataSchema:
         Indices of redundant fields are appended to the list under the field name. (ex: {id: [[43, 116, 317...]})"""
         self._root_introspection = self._request_root_types()
         """Request root types of the GraphQL schema and their required arguments"""
-        self._client_schema = build_client_schema(self.schema["data"])
-        """GraphQLSchema object from graphql package, used for query validation"""
+        self._lazy_client_schema: Optional[GraphQLSchema] = None
+        """GraphQLSchema object from graphql package, built on first use (see `_client_schema`)"""
+        self._client_schema_lock = threading.Lock()
         self._type_fields_dict: Dict[str, Dict] = self._construct_type_dict()
         """Dict where keys are type names and the values are their associated fields"""
         self._field_names_list = self._construct_name_list()
         """list of all field names"""
+        self._field_name_counts: Dict[str, int] = dict(Counter(self._field_names_list))
+        """Dict where keys are field names and values are the number of types that have a field of that name"""
+        if not self.compact:
+            self._description_index = self._construct_description_index()
         self._root_dict: Dict[str, List[Dict[str, str]]] = self._construct_root_dict()
         self._schema_graph: rx.PyDiGraph = rx.PyDiGraph()
         self._schema_graph = self._recurse_build_schema(self._schema_graph, "Query")
         self._root_to_idx: Dict[str, int] = self._make_root_to_idx()
-        self._field_names_list = self._construct_name_list()
-        """Dict where keys are field names and values are indices. Redundant field names are represented as <parent_field_name>.<field_name> (ex: {entry.id: 1452})"""
+        self._path_indexes: Dict[int, PathIndex] = {}
+        """index of every path from a root field, by root node index. Built on first use (see `build_path_index`)."""
+        self._path_index_lock = threading.Lock()
+        self._assembly_node_idxs: Tuple[int, ...] = tuple(idx for idx in self._field_to_idx_dict["assemblies"] if idx != self._root_to_idx["assemblies"])
+        """indices of nodes named "assemblies", except the root field"""
         self._apply_weights(["CoreAssembly"], 2)
+        if self.compact:
+            self._release_construction_data()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Locks can't be pickled, and graphql-core's schema is cheaper to rebuild than to pickle
+        state = self.__dict__.copy()
+        del state["_client_schema_lock"], state["_description_lock"], state["_path_index_lock"]
+        state["_lazy_client_schema"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._client_schema_lock = threading.Lock()
+        self._description_lock = threading.Lock()
+        self._path_index_lock = threading.Lock()
+
+    @property
+    def schema(self) -> Dict:
+        """JSON resulting from full introspection of GraphQL query. In compact mode, it's decoded again on each access."""
+        if self._raw_schema is not None:
+            return self._raw_schema
+        return json_codec.loads(zlib.decompress(self._packed_schema))
+
+    def _release_construction_data(self) -> None:
+        """Drop the data only needed to build the schema graph, keeping the introspection JSON compressed"""
+        self._packed_schema = zlib.compress(json_codec.dumps(self._raw_schema).encode("utf-8"))
+        self._raw_schema = None
+        self._description_index = None
+        self._type_fields_dict = {}
+        self._field_names_list = []
+        for node in self._schema_graph.nodes():
+            if isinstance(node, DataTypeNode):
+                node.field_list = []
+
+    @property
+    def _client_schema(self) -> GraphQLSchema:
+        """GraphQLSchema object from graphql package, used for query validation and for typing table columns.
+        Building it is one of the most expensive steps of initialization, so it's only built when first needed.
+        """
+        if self._lazy_client_schema is None:
+            with self._client_schema_lock:
+                if self._lazy_client_schema is None:
+                    with query_profile.phase("build_client_schema"):
+                        self._lazy_client_schema = build_client_schema(self.schema["data"])
+        return self._lazy_client_schema
+
+    def _path_index(self, root_idx: int) -> PathIndex:
+        """Index of every path from a root field node, built on first use"""
+        index = self._path_indexes.get(root_idx)
+        if index is None:
+            with self._path_index_lock:
+                index = self._path_indexes.get(root_idx)
+                if index is None:
+                    with query_profile.phase("build_path_index"):
+                        index = PathIndex(self._schema_graph, root_idx)
+                    self._path_indexes[root_idx] = index
+        return index
+
+    def build_path_index(self, input_types: Optional[List[str]] = None) -> None:
+        """Index the paths from the given input types now, instead of on their first query
+
+        Args:
+            input_types (Optional[List[str]], optional): input types to index (e.g., ["entries"]). Defaults to all input types.
+        """
+        for input_type in self._root_to_idx if input_types is None else input_types:
+            self._path_index(self._root_to_idx[input_type])
 
     def _request_root_types(self) -> Dict:
         """Make an introspection query to get information about schema's root types
@@ -181,8 +284,8 @@ class DataSchema:
         }
         }
         """
-        response = requests.post(headers={"Content-Type": "application/graphql"}, data=root_query, url=self.pdb_url, timeout=self.timeout)
-        return response.json()
+        with RequestTimer("data", "schema", self.pdb_url) as timer:
+            return timer.decode(requests.post(headers={"Content-Type": "application/graphql"}, data=root_query, url=self.pdb_url, timeout=self.timeout))
 
     def _construct_root_dict(self) -> Dict[str, List[Dict[str, str]]]:
         """Build a dictionary to organize information about schema root types.
@@ -216,14 +319,26 @@ class DataSchema:
         Returns:
             Dict: JSON response of introspection request
         """
-        query = self._get_introspection_query()
-        schema_response = requests.post(headers={"Content-Type": "application/graphql"}, data=query, url=self.pdb_url, timeout=self.timeout)
-        if schema_response.status_code == 200:
-            return schema_response.json()
+        schema = self._request_schema()
+        if schema is not None:
+            return schema
         logger.info("Loading data schema from file")
         json_file_path = os.path.join("..", const.DATA_API_SCHEMA_DIR, const.DATA_API_SCHEMA_FILENAME)
-        with open(json_file_path, "r", encoding="utf-8") as schema_file:
-            return json.load(schema_file)
+        with open(json_file_path, "rb") as schema_file:
+            return json_codec.loads(schema_file.read())
+
+    def _request_schema(self) -> Optional[Dict]:
+        """Make an introspection query to get full Data API query, without falling back to the schema file
+
+        Returns:
+            Optional[Dict]: JSON response of introspection request, or None if the request failed
+        """
+        query = self._get_introspection_query()
+        with RequestTimer("data", "schema", self.pdb_url) as timer:
+            schema_response = timer.response = requests.post(headers={"Content-Type": "application/graphql"}, data=query, url=self.pdb_url, timeout=self.timeout)
+            if schema_response.status_code == 200:
+                return timer.decode(schema_response)
+        return None
 
     def _get_introspection_query(self):
         """Returns introspection query that retrieves whole schema"""
@@ -457,13 +572,57 @@ class DataSchema:
             return field_dict["name"]
         return self._find_type_name(field_dict["ofType"])
 
-    def _find_description(self, type_name: str, field_name: str) -> str:
+    def _construct_description_index(self) -> Dict[str, Dict[str, str]]:
+        """Construct dictionary of field descriptions
+
+        Returns:
+            Dict[str, Dict[str, str]]: Dict where keys are GraphQL types and values are dicts of field names to descriptions
+        """
+        description_index: Dict[str, Dict[str, str]] = {}
         for type_dict in self.schema["data"]["__schema"]["types"]:
-            if type_dict["name"] == type_name:
-                for field in type_dict["fields"]:
-                    if field["name"] == field_name:
-                        return field["description"]
-        return ""
+            description_index[type_dict["name"]] = {field["name"]: field["description"] for field in type_dict["fields"] or []}
+        return description_index
+
+    def _find_description(self, type_name: str, field_name: str) -> Optional[str]:
+        if self._description_index is None:
+            return None
+        return self._description_index.get(type_name, {}).get(field_name, "")
+
+    def get_description(self, idx: int) -> str:
+        """Description of a field node. In compact mode, descriptions are loaded from the introspection JSON on demand.
+
+        Args:
+            idx (int): index of a DataFieldNode in the schema graph
+
+        Returns:
+            str: description of the field ("" if it has none)
+        """
+        return self._get_descriptions([idx])[0]
+
+    def _get_descriptions(self, idxs: List[int]) -> List[str]:
+        """Descriptions of field nodes. In compact mode, the introspection JSON is decoded at most once per call,
+        and only the descriptions of the last `_DESCRIPTION_CACHE_TYPES` parent types used are kept.
+        """
+        field_nodes = [self._schema_graph[idx] for idx in idxs]
+        if all(field_node.description is not None for field_node in field_nodes):
+            return [field_node.description for field_node in field_nodes]
+        parent_types = [self._schema_graph[self._schema_graph.predecessor_indices(idx)[0]].name for idx in idxs]
+        with self._description_lock:
+            missing = set(parent_types).difference(self._type_descriptions)
+            if missing:
+                for type_dict in self.schema["data"]["__schema"]["types"]:
+                    if type_dict["name"] in missing:
+                        self._type_descriptions[type_dict["name"]] = {field["name"]: field["description"] for field in type_dict["fields"] or []}
+            type_descriptions = {type_name: self._type_descriptions.get(type_name, {}) for type_name in parent_types}
+            for type_name in type_descriptions:
+                if type_name in self._type_descriptions:
+                    self._type_descriptions.move_to_end(type_name)
+            while len(self._type_descriptions) > _DESCRIPTION_CACHE_TYPES:
+                self._type_descriptions.popitem(last=False)
+        return [
+            field_node.description if field_node.description is not None else (type_descriptions[parent_type].get(field_node.name) or "")
+            for field_node, parent_type in zip(field_nodes, parent_types)
+        ]
 
     def _make_field_node(self, parent_type: str, field_name: str) -> DataFieldNode:
         kind = self._type_fields_dict[parent_type][field_name]["kind"]
@@ -485,15 +644,15 @@ class DataSchema:
             index = self._schema_graph.add_child(parent_type_index, field_node, 1)
         else:
             index = self._schema_graph.add_child(parent_type_index, field_node, 1)
-        if self._field_names_list.count(field_name) > 1:
+        if self._field_name_counts.get(field_name, 0) > 1:
             field_node.redundant = True
         field_node.set_index(index)
 
         assert isinstance(field_node.index, int)  # for mypy
-        if field_name not in self._field_to_idx_dict:
-            self._field_to_idx_dict[field_name] = [field_node.index]
+        if field_node.name not in self._field_to_idx_dict:
+            self._field_to_idx_dict[field_node.name] = [field_node.index]
         else:
-            self._field_to_idx_dict[field_name].append(field_node.index)
+            self._field_to_idx_dict[field_node.name].append(field_node.index)
 
         return field_node
 
@@ -518,6 +677,7 @@ class DataSchema:
             input_dict[name] = description
         return input_dict
 
+    @query_profile.profiled("recurse_fields")
     def _recurse_fields(self, fields: Dict[Any, Any], field_map: Dict[Any, Any], indent=2) -> str:
         query_str = ""
         for target_idx, idx_path in fields.items():
@@ -544,12 +704,14 @@ class DataSchema:
                     query_str += " " * indent + "}\n"
         return query_str
 
+    @query_profile.profiled("get_descendant_fields")
     def _get_descendant_fields(self, node_idx: int, field_name: str, visited=None) -> List[Union[int, Dict]]:
         if visited is None:
             visited = set()
 
         result: List[Union[int, Dict]] = []
-        children_idx = list(self._schema_graph.neighbors(node_idx))
+        # Children in the order of the schema (neighbors() doesn't have a stable order, so queries would differ between calls)
+        children_idx = sorted(set(self._schema_graph.successor_indices(node_idx)))
 
         for idx in children_idx:
             if idx in visited:
@@ -593,6 +755,7 @@ class DataSchema:
             raise ValueError(f"No fields found matching '{search_string}'")
         return field_names
 
+    @query_profile.profiled("regex_checks")
     def _regex_checks(self, input_dict: Dict, input_ids: List[str], attr_list: List[Dict], input_type: str) -> Union[Dict[str, str], Dict[str, List[str]]]:
         plural_types = [key for key, value in self._root_dict.items() for item in value if item["kind"] == "LIST"]
         entities = ["polymer_entities", "branched_entities", "nonpolymer_entities", "nonpolymer_entity", "polymer_entity", "branched_entity"]
@@ -662,10 +825,11 @@ class DataSchema:
         self,
         input_type: str,
         input_ids: Union[List[str], Dict[str, str], Dict[str, List[str]]],
-        return_data_list: List[str],
+        return_data_list: Sequence[str],
         add_rcsb_id=True,
         suppress_autocomplete_warning=False
     ) -> str:
+        return_data_list = list(return_data_list)
         suppress_autocomplete_warning = config.SUPPRESS_AUTOCOMPLETE_WARNING if config.SUPPRESS_AUTOCOMPLETE_WARNING else suppress_autocomplete_warning
         if not (isinstance(input_ids, dict) or isinstance(input_ids, list)):
             raise ValueError("input_ids must be dictionary or list")
@@ -680,10 +844,10 @@ class DataSchema:
             if "." in field:
                 separate_fields = field.split(".")
                 for sep_field in separate_fields:
-                    if sep_field not in self._field_names_list:
+                    if sep_field not in self._field_name_counts:
                         unknown_return_list.append(sep_field)
             else:
-                if field not in self._field_names_list:
+                if field not in self._field_name_counts:
                     unknown_return_list.append(field)
         if unknown_return_list:
             raise ValueError(f"Unknown item in return_data_list: {unknown_return_list}")
@@ -709,7 +873,12 @@ class DataSchema:
             add_rcsb_id=add_rcsb_id,
             suppress_autocomplete_warning=suppress_autocomplete_warning
         )
-        validation_error_list = validate(self._client_schema, parse(query))
+        if not config.DATA_API_VALIDATE_QUERIES:
+            return query
+        with query_profile.phase("graphql_parse"):
+            document = parse(query)
+        with query_profile.phase("graphql_validate"):
+            validation_error_list = validate(self._client_schema, document)
         if not validation_error_list:
             return query
         raise ValueError(validation_error_list)
@@ -789,18 +958,20 @@ class DataSchema:
         # If rcsb_id isn't requested, add it to the query for more readable query results
         added_rcsb_id: bool = False
         if (f"{input_type}.rcsb_id" not in return_data_list) and ("rcsb_id" not in return_data_list) and (add_rcsb_id is True):
-            return_data_list.insert(0, f"{input_type}.rcsb_id")
+            return_data_list = [f"{input_type}.rcsb_id"] + list(return_data_list)
             added_rcsb_id = True
 
         return_data_paths: Dict[int, List[List[int]]] = {}
         complete_path: int = 0
 
         for field in return_data_list:
+            query_profile.start_field(field)
             # Generate list of all possible paths to the final requested field. Try to find matching sequence to user input.
             path_list = field.split(".")
-            possible_paths = self.find_paths(input_type, path_list[-1])
+            possible_paths = self._find_idx_paths(input_type, path_list[-1])
             matching_paths: List[str] = []
-            for path in possible_paths:
+            idx_paths: List[List[int]] = []
+            for path, idx_path in possible_paths:
                 possible_path_list = path.split(".")
                 possible_path_list.insert(0, str(input_type))
 
@@ -810,6 +981,7 @@ class DataSchema:
                 path_list_with_input = [input_type] + path_list
                 if (possible_path_list == path_list) or (possible_path_list == path_list_with_input):
                     matching_paths = [".".join(possible_path_list)]
+                    idx_paths = [idx_path]
                     complete_path += 1
                     break
                 # Else, check for matching path segments.
@@ -817,26 +989,12 @@ class DataSchema:
                     for i in range(len(possible_path_list)):
                         if possible_path_list[i: i + len(path_list)] == path_list:
                             matching_paths.append(".".join(possible_path_list))
-
-            idx_paths: List[List[int]] = []
-            if len(matching_paths) > 0:
-                for path in matching_paths:
-                    idx_paths.extend(self._parse_dot_path(path))
-
-            # remove paths not beginning with input_type
-            full_idx_paths: List[List[int]] = list(idx_paths)
-            input_type_idx = self._root_to_idx[input_type]
-            for path in idx_paths:
-                if path[0] != input_type_idx:
-                    full_idx_paths.remove(path)
-            idx_paths = full_idx_paths
+                            idx_paths.append(idx_path)
 
             # Weigh edges from Query.assemblies to eliminate some trivial cases of parallel paths
             # Ex: "entries.assemblies.polymer_entity_instances.rcsb_id"
             # vs. "entries.polymer_entities.polymer_entity_instances.rcsb_id"
-            assembly_node_idxs = list(self._field_to_idx_dict["assemblies"])
-            assembly_node_idxs.remove(self._root_to_idx["assemblies"])
-            idx_paths = self._weigh_assemblies(idx_paths, assembly_node_idxs)
+            idx_paths = self._weigh_assemblies(idx_paths, self._assembly_node_idxs)
 
             if len(idx_paths) > 1:
                 # Print error message that doesn't include input_type at beginning
@@ -885,6 +1043,7 @@ class DataSchema:
                 idx_paths = shortest_full_paths
             final_idx: int = idx_paths[0][-1]
             return_data_paths[final_idx] = idx_paths
+        query_profile.start_field(None)
 
         if (complete_path != len(return_data_list)) and (suppress_autocomplete_warning is False):
             info_list = []
@@ -974,6 +1133,7 @@ class DataSchema:
                     continue
             return []
 
+    @query_profile.profiled("parse_dot_path")
     def _parse_dot_path(self, dot_path: str) -> List[List[int]]:
         """Parse dot-separated field names into lists of matching node indices
                 ex: "prd.chem_comp.id" --> [[57, 81, 116], [610, 81, 116], [858, 81, 116]]
@@ -990,6 +1150,7 @@ class DataSchema:
         """
         path_list = dot_path.split(".")
         node_matches: List[int] = self._field_to_idx_dict[path_list[0]]
+        query_profile.count("dot_path_candidates", len(node_matches))
         idx_path_list: List[List[int]] = []
         for node_idx in node_matches:
             found_path: List[int] = []
@@ -1001,11 +1162,9 @@ class DataSchema:
 
         # Mimic weighing assemblies to avoid suggesting unintuitive paths to users.
         # Note that no assemblies paths with parallel/equivalent paths will be returned
-        assembly_node_idxs = list(self._field_to_idx_dict["assemblies"])
-        assembly_node_idxs.remove(self._root_to_idx["assemblies"])
-        self._weigh_assemblies(idx_path_list, assembly_node_idxs)
-        return idx_path_list
+        return self._weigh_assemblies(idx_path_list, self._assembly_node_idxs)
 
+    @query_profile.profiled("compare_paths")
     def _compare_paths(self, start_node_index: int, dot_paths: List[List[int]]) -> List[List[int]]:
         """Compare length of paths from the starting node to dot notation paths, returning the shortest paths
 
@@ -1022,15 +1181,15 @@ class DataSchema:
                 ex: input_type "entry" and "exptl.method" would return a list of shortest path(s) with indices from "entry" to "method".
         """
         all_paths: List[List[int]] = []
+        index = self._path_index(start_node_index)
 
         for path in dot_paths:
             first_path_idx = path[0]
             if start_node_index == first_path_idx:
                 unique_paths_list: List[List[int]] = [path]
             else:
-                paths = rx.digraph_all_shortest_paths(self._schema_graph, start_node_index, first_path_idx, weight_fn=lambda edge: edge)
-                unique_paths = {tuple(path) for path in paths}
-                unique_paths_list = [list(unique_path) for unique_path in unique_paths]
+                query_profile.count("shortest_path_searches")
+                unique_paths_list = index.shortest_paths(first_path_idx, self._idx_to_name(first_path_idx))
                 if len(unique_paths_list) == 0:
                     unique_paths_list = []
                 else:
@@ -1043,16 +1202,17 @@ class DataSchema:
         shortest_paths = [path for path in all_paths if len(path) == shortest_path_len]
         return shortest_paths
 
-    def _weigh_assemblies(self, paths: List[List[int]], assembly_node_idxs: List[int]) -> List[List[int]]:
+    @query_profile.profiled("weigh_assemblies")
+    def _weigh_assemblies(self, paths: List[List[int]], assembly_node_idxs: Sequence[int]) -> List[List[int]]:
         """remove paths containing "assemblies" if there are shorter or equal length paths available.
         Mimics weighing assembly edges in the rest of query construction.
 
         Args:
             paths (List[List[int]]): list of paths where each path is a list of indices from a root node to a requested field.
-            assembly_node_idxs (List[int]): list of indices of nodes named "assemblies" (root node excluded)
+            assembly_node_idxs (Sequence[int]): indices of nodes named "assemblies" (root node excluded)
 
         Returns:
-            List[List[int]]: List with weight applied (no "assemblies" path if there is an equivalent path present)
+            List[List[int]]: new list with weight applied (no "assemblies" path if there is an equivalent path present). `paths` isn't modified.
         """
         remove_paths: set = set()
 
@@ -1071,10 +1231,11 @@ class DataSchema:
                         ):
                             remove_paths.add(tuple(path))
 
+        weighed_paths = list(paths)
         for path in remove_paths:
-            paths.remove(list(path))
+            weighed_paths.remove(list(path))
 
-        return paths
+        return weighed_paths
 
     def _idx_to_name(self, idx: int) -> str:
         """Given an index, return the associated node's name
@@ -1102,6 +1263,29 @@ class DataSchema:
                 name_path.append(self._schema_graph[idx].name)
         return name_path
 
+    @query_profile.profiled("find_paths")
+    def _find_idx_paths(self, input_type: str, return_data_name: str) -> List[Tuple[str, List[int]]]:
+        """Find paths from input_type to any nodes matching return_data_name, using the path index of input_type
+
+        Args:
+            input_type (str): name of an input_type (e.g., "entry", "polymer_entity_instance", etc.)
+            return_data_name (str): name of one field, can be a redundant name
+
+        Returns:
+            List[Tuple[str, List[int]]]: (dot path without input_type, indices of the path's field nodes) for each path, sorted by dot path
+        """
+        if return_data_name not in self._field_to_idx_dict:
+            raise KeyError(return_data_name)
+        index = self._path_index(self._root_to_idx[input_type])
+        entries = index.entries(return_data_name)
+        query_profile.count("simple_paths", len(entries))
+        paths: List[Tuple[str, List[int]]] = []
+        for entry in entries:
+            idx_path = [idx for idx in index.path(entry) if isinstance(self._schema_graph[idx], DataFieldNode)]
+            paths.append((".".join(self._idx_to_name(idx) for idx in idx_path[1:]), idx_path))
+        paths.sort(key=lambda path: path[0])
+        return paths
+
     def find_paths(self, input_type: str, return_data_name: str, descriptions: bool = False) -> Union[List[str], Dict]:
         """Find path from input_type to any nodes matching return_data_name
 
@@ -1115,25 +1299,8 @@ class DataSchema:
                 List[str]: list of paths to nodes with names that match return_data_name
                 Dict: if description is True, a dictionary with paths as keys and descriptions as values is returned.
         """
-        paths: List[List[int]] = []
-        input_type_idx: int = self._root_to_idx[input_type]
-        for possible_idx in self._field_to_idx_dict[return_data_name]:
-            paths_to_idx = rx.all_simple_paths(self._schema_graph, input_type_idx, possible_idx)
-            paths.extend(paths_to_idx)
-        dot_paths: List[str] = []
-        description_dict: Dict[str, str] = {}
-        for path in paths:
-            name_path = self._idx_path_to_name_path(path)
-            dot_path = ".".join(name_path[1:])
-            dot_paths.append(dot_path)
-            if descriptions:
-                final_field_idx = path[-1]
-                description = self._schema_graph[final_field_idx].description
-                if description is None:
-                    description = ""
-                description_dict[dot_path] = description.replace("\n", " ")
-
+        paths = self._find_idx_paths(input_type, return_data_name)
         if descriptions:
-            return description_dict
-        dot_paths.sort()
-        return dot_paths
+            path_descriptions = self._get_descriptions([idx_path[-1] for _, idx_path in paths])
+            return {dot_path: description.replace("\n", " ") for (dot_path, _), description in zip(paths, path_descriptions)}
+        return [dot_path for dot_path, _ in paths]
@@ -0,0 +1,266 @@
+"""Flatten Data API responses into columnar tables
+
+Column names and types are planned once from the GraphQL query and the schema, so the
+response is turned into columns in a single pass, without inspecting the records for types.
+Each requested leaf field becomes a column named by its dot-separated path (e.g., "exptl.method").
+Fields below a list (e.g., "polymer_entities.rcsb_id") become list columns, unless that list is exploded
+into one row per element.
+
+PyArrow and pandas are optional. Install them with `pip install pyarrow pandas`.
+"""
+from __future__ import annotations
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from graphql import FieldNode, GraphQLList, GraphQLNonNull, GraphQLObjectType, GraphQLSchema, OperationDefinitionNode, parse
+from graphql.type import get_named_type, is_enum_type
+
+# GraphQL scalar -> (pyarrow type name, pandas dtype)
+_SCALAR_TYPES: Dict[str, Tuple[str, str]] = {
+    "Int": ("int64", "Int64"),
+    "Float": ("float64", "float64"),
+    "Boolean": ("bool_", "boolean"),
+    "String": ("string", "object"),
+    "Date": ("timestamp", "datetime64[ns, UTC]"),
+    "ObjectScalar": ("string", "object"),  # arbitrary JSON, stored serialized
+}
+
+
+@dataclass(frozen=True)
+class ColumnPlan:
+    """A column of the flattened table"""
+
+    name: str
+    """dot-separated path of the field, relative to the input_type records"""
+    path: Tuple[str, ...]
+    lists: Tuple[bool, ...]
+    """for each segment of `path`, whether the field is a list"""
+    scalar: str
+    """GraphQL scalar type name of the leaf field (enums are "String")"""
+
+
+def _unwrap(field_type: Any) -> Tuple[bool, Any]:
+    """Return whether a field type is a list, and its named type"""
+    is_list = False
+    while isinstance(field_type, (GraphQLNonNull, GraphQLList)):
+        if isinstance(field_type, GraphQLList):
+            is_list = True
+        field_type = field_type.of_type
+    return is_list, field_type
+
+
+def plan_columns(query: str, input_type: str, client_schema: GraphQLSchema) -> List[ColumnPlan]:
+    """Find the columns (leaf fields) requested by a query
+
+    Args:
+        query (str): query in GraphQL syntax
+        input_type (str): root field of the query (e.g., "entries")
+        client_schema (GraphQLSchema): schema used to look up field types
+
+    Returns:
+        List[ColumnPlan]: columns in query order
+    """
+    document = parse(query)
+    operation = next(definition for definition in document.definitions if isinstance(definition, OperationDefinitionNode))
+    root = next(selection for selection in operation.selection_set.selections if isinstance(selection, FieldNode) and selection.name.value == input_type)
+    query_type = client_schema.query_type
+    assert query_type is not None  # for mypy
+    root_type = get_named_type(query_type.fields[input_type].type)
+
+    columns: List[ColumnPlan] = []
+
+    def visit(node: FieldNode, parent_type: GraphQLObjectType, path: Tuple[str, ...], lists: Tuple[bool, ...]) -> None:
+        name = node.name.value
+        is_list, named_type = _unwrap(parent_type.fields[name].type)
+        path, lists = path + (name,), lists + (is_list,)
+        if node.selection_set is None:
+            scalar = "String" if is_enum_type(named_type) else named_type.name
+            columns.append(ColumnPlan(".".join(path), path, lists, scalar if scalar in _SCALAR_TYPES else "ObjectScalar"))
+            return
+        for child in node.selection_set.selections:
+            if isinstance(child, FieldNode):
+                visit(child, named_type, path, lists)
+
+    assert root.selection_set is not None
+    for selection in root.selection_set.selections:
+        if isinstance(selection, FieldNode):
+            visit(selection, root_type, (), ())
+    return columns
+
+
+class _ColumnTrie:
+    """Columns below one object, sharing the segments their paths have in common"""
+
+    __slots__ = ("children", "columns")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, Tuple["_ColumnTrie", bool]] = {}
+        """child node and whether the field is a list, by field name"""
+        self.columns: List[Tuple[int, bool]] = []
+        """index of each column ending here, and whether it's a list column"""
+
+    def add(self, path: Tuple[str, ...], lists: Tuple[bool, ...], column_idx: int) -> None:
+        node = self
+        for segment, is_list in zip(path, lists):
+            if segment not in node.children:
+                node.children[segment] = (_ColumnTrie(), is_list)
+            node = node.children[segment][0]
+        node.columns.append((column_idx, any(lists)))
+
+
+def _visit(node: _ColumnTrie, value: Any, row: List[Any]) -> None:
+    """Store `value` in the columns ending at `node`, then descend into its fields.
+    List columns get a flat list of all values below them, other columns a single value (None if missing).
+    """
+    if value is None:
+        return
+    for column_idx, is_list in node.columns:
+        if is_list:
+            row[column_idx].append(value)
+        else:
+            row[column_idx] = value
+    for name, (child, is_list) in node.children.items():
+        field_value = value.get(name)
+        if is_list and isinstance(field_value, list):
+            for item in field_value:
+                _visit(child, item, row)
+        else:
+            _visit(child, field_value, row)
+
+
+def _explode(record: Dict[str, Any], explode_path: Tuple[str, ...]) -> Iterator[List[Any]]:
+    """Yield the objects at every level of `explode_path`, one list per row"""
+
+    def descend(obj: Any, idx: int, contexts: List[Any]) -> Iterator[List[Any]]:
+        if idx == len(explode_path):
+            yield contexts
+            return
+        child = obj.get(explode_path[idx]) if obj is not None else None
+        if isinstance(child, list):
+            if not child:
+                yield from descend(None, idx + 1, contexts + [None])
+            for item in child:
+                yield from descend(item, idx + 1, contexts + [item])
+        else:
+            yield from descend(child, idx + 1, contexts + [child])
+
+    yield from descend(record, 0, [record])
+
+
+def build_columns(records: List[Dict[str, Any]], columns: List[ColumnPlan], explode: Optional[str] = None) -> Dict[str, List[Any]]:
+    """Flatten records into columns in a single pass: each record is walked once, following the paths of all columns together
+
+    Args:
+        records (List[Dict[str, Any]]): records under `response["data"][input_type]`
+        columns (List[ColumnPlan]): columns planned with :py:func:`plan_columns`
+        explode (Optional[str], optional): dot-separated path of a list field (e.g., "polymer_entities")
+            to expand into one row per element. Every list along the path is expanded. Defaults to None (one row per record).
+
+    Returns:
+        Dict[str, List[Any]]: values of each column
+    """
+    explode_path = _explode_path(explode)
+    if explode_path and not any(column.path[:len(explode_path)] == explode_path and len(column.path) > len(explode_path) for column in columns):
+        raise ValueError(f'Can\'t explode "{explode}": no requested field is below it')
+
+    # Evaluate each column relative to the deepest exploded object above it, with one trie per depth
+    tries: Dict[int, _ColumnTrie] = {}
+    list_columns: List[bool] = []
+    for column_idx, column in enumerate(columns):
+        depth = _column_depth(column, explode_path)
+        tries.setdefault(depth, _ColumnTrie()).add(column.path[depth:], column.lists[depth:], column_idx)
+        list_columns.append(any(column.lists[depth:]))
+
+    data: Dict[str, List[Any]] = {column.name: [] for column in columns}
+    appenders = [data[column.name].append for column in columns]
+    for record in records:
+        if record is None:
+            continue
+        for contexts in _explode(record, explode_path):
+            row: List[Any] = [[] if is_list else None for is_list in list_columns]
+            for depth, trie in tries.items():
+                _visit(trie, contexts[depth], row)
+            for append, value in zip(appenders, row):
+                append(value)
+    return data
+
+
+def _explode_path(explode: Optional[str]) -> Tuple[str, ...]:
+    return tuple(explode.split(".")) if explode else ()
+
+
+def _column_depth(column: ColumnPlan, explode_path: Tuple[str, ...]) -> int:
+    """Number of leading path segments of a column that are exploded into rows"""
+    depth = 0
+    while depth < min(len(explode_path), len(column.path) - 1) and column.path[depth] == explode_path[depth]:
+        depth += 1
+    return depth
+
+
+def _column_is_list(column: ColumnPlan, explode: Optional[str]) -> bool:
+    return any(column.lists[_column_depth(column, _explode_path(explode)):])
+
+
+def to_arrow(records: List[Dict[str, Any]], columns: List[ColumnPlan], explode: Optional[str] = None) -> Any:
+    """Flatten records into a `pyarrow.Table` with column types taken from the schema"""
+    try:
+        import pyarrow as pa  # type: ignore  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError("to_table() requires pyarrow. Install it with `pip install pyarrow`.") from error
+
+    data = build_columns(records, columns, explode)
+    arrays = []
+    for column in columns:
+        arrow_type_name, _ = _SCALAR_TYPES[column.scalar]
+        values = data[column.name]
+        is_list = _column_is_list(column, explode)
+        if column.scalar == "ObjectScalar":
+            values = [_dump_json(value, is_list) for value in values]
+        if arrow_type_name == "timestamp":
+            value_type = pa.timestamp("s", tz="UTC")
+            # Dates are ISO 8601 strings, parsed by casting
+            source_type = pa.list_(pa.string()) if is_list else pa.string()
+            arrays.append(pa.array(values, type=source_type).cast(pa.list_(value_type) if is_list else value_type))
+            continue
+        value_type = getattr(pa, arrow_type_name)()
+        arrays.append(pa.array(values, type=pa.list_(value_type) if is_list else value_type))
+    return pa.Table.from_arrays(arrays, names=[column.name for column in columns])
+
+
+def to_pandas(records: List[Dict[str, Any]], columns: List[ColumnPlan], explode: Optional[str] = None) -> Any:
+    """Flatten records into a `pandas.DataFrame`, converted from Arrow if pyarrow is installed"""
+    try:
+        import pandas as pd  # type: ignore  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError("to_dataframe() requires pandas. Install it with `pip install pandas`.") from error
+    try:
+        import pyarrow  # type: ignore  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        pass
+    else:
+        # Keep integer and boolean columns with missing values as nullable dtypes instead of float/object
+        table = to_arrow(records, columns, explode)
+        return table.to_pandas(types_mapper={pyarrow.int64(): pd.Int64Dtype(), pyarrow.bool_(): pd.BooleanDtype()}.get)
+
+    data = build_columns(records, columns, explode)
+    frame = pd.DataFrame({column.name: data[column.name] for column in columns})
+    for column in columns:
+        if _column_is_list(column, explode):
+            continue
+        dtype = _SCALAR_TYPES[column.scalar][1]
+        if column.scalar == "Date":
+            frame[column.name] = pd.to_datetime(frame[column.name], utc=True)
+        elif column.scalar == "ObjectScalar":
+            frame[column.name] = [_dump_json(value, False) for value in frame[column.name]]
+        elif dtype != "object":
+            frame[column.name] = frame[column.name].astype(dtype)
+    return frame
+
+
+def _dump_json(value: Any, is_list: bool) -> Any:
+    if value is None:
+        return None
+    if is_list:
+        return [json.dumps(item) for item in value]
+    return json.dumps(value)
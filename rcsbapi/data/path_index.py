@@ -0,0 +1,104 @@
+"""Index of the paths from a root type of the Data API schema to its fields
+
+Resolving a field in `return_data_list` needs every simple path from the query's input type to the fields
+with that name, and sometimes the shortest (weighted) paths to a field. A :py:class:`PathIndex` enumerates
+all simple paths from one root field with a single depth-first search and stores them as a trie: each entry
+is a path, stored as its last node plus the entry of the path without that node. Entries are looked up by
+field name, and store the weight of their path, so path queries don't need graph searches.
+"""
+from __future__ import annotations
+from array import array
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import rustworkx as rx
+
+
+class PathIndex:
+    """Every simple path in the schema graph from one root field node"""
+
+    __slots__ = ("root_idx", "_nodes", "_parents", "_weights", "_by_name")
+
+    def __init__(self, schema_graph: "rx.PyDiGraph", root_idx: int):
+        """Enumerate the paths from `root_idx`
+
+        Args:
+            schema_graph (rx.PyDiGraph): schema graph of DataTypeNodes and DataFieldNodes
+            root_idx (int): index of the root field node (e.g., the node of "entries")
+        """
+        self.root_idx = root_idx
+        self._nodes = array("i", [root_idx])
+        """graph index of the last node of each entry's path"""
+        self._parents = array("i", [-1])
+        """entry of the path without its last node (-1 for the root)"""
+        self._weights = array("i", [0])
+        """sum of the edge weights along each entry's path"""
+        self._by_name: Dict[str, Sequence[int]] = {}
+        """entries of the paths ending at a field, by field name, in depth-first order"""
+        self._build(schema_graph)
+
+    def _build(self, schema_graph: "rx.PyDiGraph") -> None:
+        from .data_schema import DataFieldNode  # pylint: disable=import-outside-toplevel
+
+        # Out edges of each node in index order, so the index doesn't depend on the graph's internal order
+        out_edges: Dict[int, List[Tuple[int, int]]] = {}
+        by_name: Dict[str, List[int]] = {}
+        on_path = {self.root_idx}
+        stack = [(0, iter(self._out_edges(schema_graph, self.root_idx, out_edges)))]
+        while stack:
+            entry, children = stack[-1]
+            for child_idx, weight in children:
+                if child_idx in on_path:
+                    continue
+                child_entry = len(self._nodes)
+                self._nodes.append(child_idx)
+                self._parents.append(entry)
+                self._weights.append(self._weights[entry] + weight)
+                node = schema_graph[child_idx]
+                if isinstance(node, DataFieldNode):
+                    by_name.setdefault(node.name, []).append(child_entry)
+                on_path.add(child_idx)
+                stack.append((child_entry, iter(self._out_edges(schema_graph, child_idx, out_edges))))
+                break
+            else:
+                stack.pop()
+                on_path.discard(self._nodes[entry])
+        self._by_name = {name: array("i", entries) for name, entries in by_name.items()}
+
+    @staticmethod
+    def _out_edges(schema_graph: "rx.PyDiGraph", node_idx: int, out_edges: Dict[int, List[Tuple[int, int]]]) -> List[Tuple[int, int]]:
+        if node_idx not in out_edges:
+            out_edges[node_idx] = sorted((target, weight) for _, target, weight in schema_graph.out_edges(node_idx))
+        return out_edges[node_idx]
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def entries(self, field_name: str) -> Sequence[int]:
+        """Entries of the paths ending at fields named `field_name`"""
+        return self._by_name.get(field_name, ())
+
+    def path(self, entry: int) -> List[int]:
+        """Graph indices along the path of an entry, from the root field node (DataTypeNodes included)"""
+        path: List[int] = []
+        while entry != -1:
+            path.append(self._nodes[entry])
+            entry = self._parents[entry]
+        path.reverse()
+        return path
+
+    def last(self, entry: int) -> int:
+        """Graph index of the last node of an entry's path"""
+        return self._nodes[entry]
+
+    def weight(self, entry: int) -> int:
+        """Sum of the edge weights along an entry's path"""
+        return self._weights[entry]
+
+    def shortest_paths(self, node_idx: int, field_name: str) -> List[List[int]]:
+        """All paths to the field node `node_idx` (named `field_name`) with the least weight"""
+        entries = [entry for entry in self.entries(field_name) if self._nodes[entry] == node_idx]
+        if not entries:
+            return []
+        least = min(self._weights[entry] for entry in entries)
+        return [self.path(entry) for entry in entries if self._weights[entry] == least]
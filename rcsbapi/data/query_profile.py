@@ -0,0 +1,220 @@
+"""Profiling of Data API query construction
+
+When `config.DATA_QUERY_PROFILING` is enabled, each :py:class:`DataQuery` records a :py:class:`QueryProfile`
+of its `construct_query` call: the time spent in each phase (path finding, path comparison, field expansion,
+query string building, graphql-core validation, ...), how often each phase ran, graph-operation counts and the
+time spent resolving each field in `return_data_list`. Profiles are also added to the process-wide
+:py:data:`PROFILE_STATS`, which shows which phases and field specs are expensive across many queries.
+
+Example:
+    from rcsbapi.config import config
+    from rcsbapi.data import DataQuery, query_profile
+
+    config.DATA_QUERY_PROFILING = True
+    query = DataQuery("entries", ["4HHB"], ["exptl.method", "polymer_entities.rcsb_id"])
+    print(query.get_profile().report())
+    print(query_profile.PROFILE_STATS.top_fields(5))
+"""
+from __future__ import annotations
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class QueryProfile:
+    """Timings and counts of one `construct_query` call. Times are in seconds."""
+
+    input_type: str
+    return_data_list: Tuple[str, ...]
+    total: float = 0.0
+    phases: Dict[str, float] = field(default_factory=dict)
+    """time spent in each phase, excluding time spent in phases nested within it"""
+    calls: Dict[str, int] = field(default_factory=dict)
+    """number of times each phase ran (recursive phases count every call)"""
+    counts: Dict[str, int] = field(default_factory=dict)
+    """graph-operation counts (e.g., "simple_paths" enumerated by find_paths)"""
+    fields: Dict[str, float] = field(default_factory=dict)
+    """time spent resolving the path of each field in return_data_list"""
+    error: Optional[str] = None
+    _stack: List[float] = field(default_factory=list, repr=False)
+    _field: Optional[Tuple[str, float]] = field(default=None, repr=False)
+
+    @property
+    def other(self) -> float:
+        """time not attributed to any phase (input checks, path matching, ...)"""
+        return max(self.total - sum(self.phases.values()), 0.0)
+
+    def report(self) -> str:
+        """Human-readable breakdown, phases and fields sorted by time"""
+        lines = [f"construct_query({self.input_type}, {len(self.return_data_list)} fields): {self.total * 1000:.2f} ms"]
+        for name, seconds in sorted({**self.phases, "other": self.other}.items(), key=lambda item: -item[1]):
+            lines.append(f"  {name:<24}{seconds * 1000:>10.2f} ms{self.calls.get(name, 0):>8} calls")
+        for name, count in sorted(self.counts.items()):
+            lines.append(f"  {name:<24}{count:>10}")
+        for field_name, seconds in sorted(self.fields.items(), key=lambda item: -item[1]):
+            lines.append(f"  field {field_name:<40}{seconds * 1000:>10.2f} ms")
+        if self.error is not None:
+            lines.append(f"  error: {self.error}")
+        return "\n".join(lines)
+
+
+_current: contextvars.ContextVar[Optional[QueryProfile]] = contextvars.ContextVar("rcsbapi_query_profile", default=None)
+
+
+def current() -> Optional[QueryProfile]:
+    """Profile being recorded in this thread, if any"""
+    return _current.get()
+
+
+class _Phase:
+    __slots__ = ("_profile", "_name", "_started")
+
+    def __init__(self, profile: QueryProfile, name: str):
+        self._profile = profile
+        self._name = name
+        self._started = 0.0
+
+    def __enter__(self) -> None:
+        self._profile._stack.append(0.0)
+        self._started = time.perf_counter()
+
+    def __exit__(self, *args) -> None:
+        elapsed = time.perf_counter() - self._started
+        profile = self._profile
+        nested = profile._stack.pop()
+        profile.phases[self._name] = profile.phases.get(self._name, 0.0) + elapsed - nested
+        profile.calls[self._name] = profile.calls.get(self._name, 0) + 1
+        if profile._stack:
+            profile._stack[-1] += elapsed
+
+
+def phase(name: str) -> contextlib.AbstractContextManager:
+    """Context manager timing a phase of the current profile. Does nothing if no profile is being recorded."""
+    profile = _current.get()
+    return _Phase(profile, name) if profile is not None else contextlib.nullcontext()
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """Decorator timing every call of a method as a phase"""
+    def decorator(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is None:
+                return function(*args, **kwargs)
+            with _Phase(profile, name):
+                return function(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add to a graph-operation count of the current profile"""
+    profile = _current.get()
+    if profile is not None:
+        profile.counts[name] = profile.counts.get(name, 0) + n
+
+
+def start_field(field_name: Optional[str]) -> None:
+    """Attribute the time from now on to resolving `field_name` (None stops attributing time to fields)"""
+    profile = _current.get()
+    if profile is None:
+        return
+    now = time.perf_counter()
+    if profile._field is not None:
+        previous, started = profile._field
+        profile.fields[previous] = profile.fields.get(previous, 0.0) + now - started
+    profile._field = (field_name, now) if field_name is not None else None
+
+
+@contextlib.contextmanager
+def profiling(input_type: str, return_data_list: List[str]) -> Iterator[QueryProfile]:
+    """Record a profile of the `construct_query` calls made in a `with` block, and add it to `PROFILE_STATS`
+
+    Example:
+        with profiling("entries", return_data_list) as profile:
+            DATA_SCHEMA.construct_query("entries", ["4HHB"], return_data_list)
+        print(profile.report())
+    """
+    profile = QueryProfile(input_type=input_type, return_data_list=tuple(return_data_list))
+    token = _current.set(profile)
+    started = time.perf_counter()
+    try:
+        yield profile
+    except Exception as error:
+        profile.error = f"{type(error).__name__}: {error}"
+        raise
+    finally:
+        start_field(None)
+        profile.total = time.perf_counter() - started
+        _current.reset(token)
+        PROFILE_STATS.add(profile)
+
+
+class ProfileStats:
+    """Thread-safe aggregate of the query profiles recorded in a process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.queries = 0
+            self.errors = 0
+            self.total = 0.0
+            self.phases: Dict[str, float] = {}
+            self.calls: Dict[str, int] = {}
+            self.counts: Dict[str, int] = {}
+            self._fields: Dict[str, List[float]] = {}
+            """per "input_type.field": [resolutions, total time, max time]"""
+
+    def add(self, profile: QueryProfile) -> None:
+        with self._lock:
+            self.queries += 1
+            self.errors += profile.error is not None
+            self.total += profile.total
+            for name, seconds in profile.phases.items():
+                self.phases[name] = self.phases.get(name, 0.0) + seconds
+            for name, calls in profile.calls.items():
+                self.calls[name] = self.calls.get(name, 0) + calls
+            for name, number in profile.counts.items():
+                self.counts[name] = self.counts.get(name, 0) + number
+            for field_name, seconds in profile.fields.items():
+                key = field_name if field_name.startswith(f"{profile.input_type}.") else f"{profile.input_type}.{field_name}"
+                stats = self._fields.setdefault(key, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def top_fields(self, n: int = 10) -> List[Tuple[str, Dict[str, float]]]:
+        """The `n` field specs with the most total resolution time, as ("input_type.field", stats) pairs"""
+        with self._lock:
+            items = [
+                (key, {"count": calls, "total": total, "mean": total / calls, "max": longest})
+                for key, (calls, total, longest) in self._fields.items()
+            ]
+        return sorted(items, key=lambda item: -item[1]["total"])[:n]
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals over all recorded profiles: queries, errors, total time, per-phase time and calls, and counts"""
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "errors": self.errors,
+                "total": self.total,
+                "phases": dict(sorted(self.phases.items(), key=lambda item: -item[1])),
+                "calls": dict(self.calls),
+                "counts": dict(self.counts),
+            }
+
+
+PROFILE_STATS = ProfileStats()
+"""Aggregate of every profile recorded in this process"""
@@ -0,0 +1,74 @@
+"""Compare JSON backend throughput on recorded payloads; for developer use only
+
+Decodes (from bytes, as responses are decoded) and encodes each payload with every installed
+backend and prints the throughput in MB/s. By default the payloads are the recorded schema responses
+shipped in the package resources plus a generated verbose search result page. Other recorded responses
+can be passed as arguments.
+
+Usage:
+    python -m rcsbapi.dev_tools.benchmark_json [--repeat N] [payload.json ...]
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from rcsbapi import json_codec
+
+RESOURCES = Path(__file__).parent.parent
+DEFAULT_PAYLOADS = [
+    RESOURCES / "data" / "resources" / "data_api_schema.json",
+    RESOURCES / "search" / "resources" / "structure_schema.json",
+    RESOURCES / "search" / "resources" / "chemical_schema.json",
+]
+
+
+def search_result_page(rows: int = 10000) -> bytes:
+    """A verbose search response page like those returned by the Search API"""
+    services = [{"service_type": "text", "nodes": [{"node_id": 0, "original_score": 1.0, "norm_score": 1.0}]}]
+    results = [{"identifier": f"{idx % 9 + 1}{idx // 9 % 36:X}{idx % 7}{idx % 5}_1", "score": 1.0 - idx / rows, "services": services} for idx in range(rows)]
+    return json_codec.dumps({"query_id": "benchmark", "result_type": "polymer_entity", "total_count": rows, "result_set": results}).encode("utf-8")
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark(payloads: Dict[str, bytes], repeat: int) -> None:
+    backends = []
+    for name in json_codec.JSON_BACKENDS:
+        try:
+            backends.append(json_codec._load_backend(name))  # pylint: disable=protected-access
+        except ImportError:
+            print(f"{name}: not installed")
+    print(f"\n{'payload':<28}{'size (MB)':>10}  " + "".join(f"{backend.name + ' loads':>16}{backend.name + ' dumps':>16}" for backend in backends))
+    for label, data in payloads.items():
+        size = len(data) / 1e6
+        obj = json_codec._load_backend("json").loads(data)  # pylint: disable=protected-access
+        row = f"{label:<28}{size:>10.2f}  "
+        for backend in backends:
+            loads_time = best_time(lambda: backend.loads(data), repeat)  # pylint: disable=cell-var-from-loop
+            dumps_time = best_time(lambda: backend.dumps(obj), repeat)  # pylint: disable=cell-var-from-loop
+            row += f"{size / loads_time:>11.1f} MB/s{size / dumps_time:>11.1f} MB/s"
+        print(row)
+
+
+def main(argv: List[str] = None) -> None:  # type: ignore
+    parser = argparse.ArgumentParser(description="Compare JSON backend throughput on recorded payloads")
+    parser.add_argument("payloads", nargs="*", type=Path, help="recorded JSON responses (default: packaged schema responses)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement; the best is reported (default: %(default)s)")
+    args = parser.parse_args(argv)
+    payloads = {path.name: path.read_bytes() for path in (args.payloads or DEFAULT_PAYLOADS)}
+    if not args.payloads:
+        payloads["search result page (10k)"] = search_result_page()
+    benchmark(payloads, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+"""Local stand-in for the RCSB PDB Data and Search APIs; for developer use only
+
+:py:class:`MockRCSBServer` is an HTTP server on localhost that answers the requests made by this package:
+
+* Data API (GraphQL) schema introspection, from the schema shipped in the package resources
+* Data API queries, by replaying recorded records (see "Fixtures") and generating the rest from the schema,
+  so any query constructed by :py:class:`rcsbapi.data.DataQuery` gets a response of the right shape
+* Search API attribute schemas, from the package resources
+* Search API queries, paginated (or as a single `return_all_hits` response), replaying recorded
+  result sets or generating `search_hits` identifiers
+
+Latency, jitter and failed requests can be configured, so performance work (batching, paging, retries)
+can be measured reproducibly and offline. Use :py:meth:`MockRCSBServer.redirect` to point the package at the server.
+
+Fixtures are JSON files of recorded responses (see :py:func:`record_fixtures`)::
+
+    {
+        "data": {"entries": {"4HHB": {"rcsb_id": "4HHB", "exptl": [{"method": "X-RAY DIFFRACTION"}]}}},
+        "search": {"entry": ["4HHB", "1STP"]}
+    }
+
+Example:
+    from rcsbapi.dev_tools.mock_server import MockRCSBServer
+
+    with MockRCSBServer(latency=0.05, search_hits=5000) as server, server.redirect():
+        from rcsbapi.search import TextQuery
+        ids = list(TextQuery("hemoglobin")())
+
+Usage (serve until interrupted, e.g., for scripts that set the endpoints themselves):
+    python -m rcsbapi.dev_tools.mock_server [--port N] [--latency S] [--error-rate F] [--fixtures path.json]
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import logging
+import random
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from graphql import (
+    FieldNode,
+    GraphQLEnumType,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLObjectType,
+    GraphQLScalarType,
+    build_client_schema,
+    parse,
+)
+
+from rcsbapi import json_codec
+from rcsbapi.const import const
+
+logger = logging.getLogger(__name__)
+
+RESOURCES = Path(__file__).parent.parent
+DATA_PATH = "/graphql"
+SEARCH_QUERY_PATH = "/rcsbsearch/v2/query"
+SEARCH_SCHEMA_PATHS = {
+    "/rcsbsearch/v2/metadata/schema": RESOURCES / const.SEARCH_API_SCHEMA_DIR / const.SEARCH_API_STRUCTURE_ATTRIBUTE_SCHEMA_FILENAME,
+    "/rcsbsearch/v2/metadata/chemical/schema": RESOURCES / const.SEARCH_API_SCHEMA_DIR / const.SEARCH_API_CHEMICAL_ATTRIBUTE_SCHEMA_FILENAME,
+}
+
+_ALPHANUMERIC = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_SCALAR_VALUES = {"Int": 1, "Float": 1.0, "Boolean": True, "Date": "2000-01-01T00:00:00Z"}
+# Suffixes turning an entry ID into an identifier of the Search API return type
+_RETURN_TYPE_SUFFIX = {"polymer_entity": "_1", "non_polymer_entity": "_2", "polymer_instance": ".A", "assembly": "-1"}
+
+_ENTRY_ID = re.compile(r"[0-9][0-9A-Z]{3}(?![0-9A-Z])")
+
+
+def entry_id(idx: int) -> str:
+    """The `idx`-th of a sequence of distinct, valid PDB entry IDs"""
+    return f"{1 + idx % 9}{_ALPHANUMERIC[idx // 9 % 36]}{_ALPHANUMERIC[idx // 324 % 36]}{_ALPHANUMERIC[idx // 11664 % 36]}"
+
+
+class MockRCSBServer:
+    """Threaded HTTP server replaying Data and Search API responses. Use as a context manager, or call start()/stop()."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        fail_requests: Iterable[int] = (),
+        search_hits: int = 1000,
+        list_length: int = 2,
+        fixtures: Optional[Union[str, Path, Dict[str, Any]]] = None,
+        port: int = 0,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            latency (float, optional): seconds to wait before answering each request. Defaults to 0.0.
+            jitter (float, optional): up to this many seconds are randomly added to the latency. Defaults to 0.0.
+            error_rate (float, optional): fraction of Data and Search API queries answered with `error_status`. Defaults to 0.0.
+            error_status (int, optional): HTTP status of failed requests. Defaults to 503.
+            fail_requests (Iterable[int], optional): numbers (counting from 1) of the Data and Search API queries to fail. Defaults to ().
+            search_hits (int, optional): number of generated search results, for return types without a recorded result set. Defaults to 1000.
+            list_length (int, optional): number of elements of generated list fields in Data API responses. Defaults to 2.
+            fixtures (Optional[Union[str, Path, Dict[str, Any]]], optional): recorded responses, or a JSON file of them. Defaults to None.
+            port (int, optional): port to listen on. Defaults to 0 (any free port).
+            seed (int, optional): seed of the random jitter and errors. Defaults to 0.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fail_requests = set(fail_requests)
+        self.search_hits = search_hits
+        self.list_length = list_length
+        if isinstance(fixtures, (str, Path)):
+            fixtures = json_codec.loads(Path(fixtures).read_bytes())
+        self.fixtures: Dict[str, Any] = fixtures or {}
+        self.requests: Counter = Counter()
+        """number of requests received, per endpoint ("data", "data_schema", "search", "search_schema")"""
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._num_queries = 0
+        self._schema_response = (RESOURCES / const.DATA_API_SCHEMA_DIR / const.DATA_API_SCHEMA_FILENAME).read_bytes()
+        schema = json_codec.loads(self._schema_response)["data"]
+        self._client_schema = build_client_schema(schema)
+        query_type = schema["__schema"]["queryType"]["name"]
+        root_fields = next(type_dict["fields"] for type_dict in schema["__schema"]["types"] if type_dict["name"] == query_type)
+        self._root_types_response = json_codec.dumps({"data": {"__schema": {"queryType": {"fields": root_fields}}}}).encode("utf-8")
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockRCSBServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name="MockRCSBServer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockRCSBServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @contextlib.contextmanager
+    def redirect(self) -> Iterator[None]:
+        """Point the Data and Search API endpoints of the package at this server for the duration of a `with` block.
+        Modules imported inside the block (e.g., `rcsbapi.data`, which fetches the schema on import) use the server too.
+        """
+        from rcsbapi import const as const_module  # pylint: disable=import-outside-toplevel
+
+        original = const_module.const
+        self._point_at(dataclasses.replace(
+            original,
+            DATA_API_ENDPOINT=self.url + DATA_PATH,
+            RCSB_SEARCH_API_QUERY_URL=self.url + SEARCH_QUERY_PATH,
+            SEARCH_API_STRUCTURE_ATTRIBUTE_SCHEMA_URL=self.url + "/rcsbsearch/v2/metadata/schema",
+            SEARCH_API_CHEMICAL_ATTRIBUTE_SCHEMA_URL=self.url + "/rcsbsearch/v2/metadata/chemical/schema",
+        ))
+        try:
+            yield
+        finally:
+            self._point_at(original)
+
+    @staticmethod
+    def _point_at(endpoints: Any) -> None:
+        """Replace the constants (and the endpoints copied from them) of every loaded rcsbapi module"""
+        for name, module in list(sys.modules.items()):
+            if name.startswith("rcsbapi") and isinstance(getattr(module, "const", None), type(endpoints)):
+                module.const = endpoints  # type: ignore[attr-defined]
+        session = getattr(sys.modules.get("rcsbapi.search.search_query"), "Session", None)
+        if session is not None:
+            session.url = endpoints.RCSB_SEARCH_API_QUERY_URL
+        data_schema = getattr(sys.modules.get("rcsbapi.data"), "DATA_SCHEMA", None)
+        if data_schema is not None:
+            data_schema.pdb_url = endpoints.DATA_API_ENDPOINT
+
+    def _count(self, endpoint: str) -> None:
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self._num_queries += 1
+            return (self._num_queries in self.fail_requests) or (self._random.random() < self.error_rate)
+
+    def _delay(self) -> None:
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def handle_data(self, query: str) -> bytes:
+        """Response to a Data API (GraphQL) request"""
+        if "__schema" in query:
+            self._count("data_schema")
+            return self._schema_response if "InputValue" in query else self._root_types_response
+        self._count("data")
+        document = parse(query)
+        operation = document.definitions[0]
+        query_type = self._client_schema.query_type
+        data: Dict[str, Any] = {}
+        for root_field in operation.selection_set.selections:  # type: ignore[attr-defined]
+            name = root_field.name.value
+            field_type = query_type.fields[name].type  # type: ignore[union-attr]
+            input_ids = self._root_ids(root_field)
+            recorded = self.fixtures.get("data", {}).get(name, {})
+            records = [self._record(recorded.get(input_id), [root_field], _named_type(field_type), input_id) for input_id in input_ids]
+            data[name] = records if _is_list(field_type) else (records[0] if records else None)
+        return json_codec.dumps({"data": data}).encode("utf-8")
+
+    def _root_ids(self, root_field: FieldNode) -> List[str]:
+        """Input IDs of a root field. Singular root types are identified by the joined ID arguments."""
+        values = {argument.name.value: argument.value for argument in root_field.arguments}
+        for value in values.values():
+            if hasattr(value, "values"):
+                return [item.value for item in value.values]  # type: ignore[attr-defined]
+        return ["_".join(str(getattr(value, "value", "")) for value in values.values())]
+
+    def _record(self, recorded: Optional[Dict[str, Any]], field_nodes: List[FieldNode], object_type: Any, object_id: str) -> Dict[str, Any]:
+        """Record of the requested fields: recorded values where there are any, otherwise generated from the schema"""
+        record: Dict[str, Any] = {}
+        for key, selections in _merge_selections(field_nodes).items():
+            name = selections[0].name.value
+            field_type = object_type.fields[name].type
+            if recorded is not None:
+                record[key] = _select(recorded.get(name), selections, _named_type(field_type))
+            else:
+                record[key] = self._generate(selections, field_type, object_id)
+        return record
+
+    def _generate(self, field_nodes: List[FieldNode], field_type: Any, object_id: str) -> Any:
+        named_type = _named_type(field_type)
+        if _is_list(field_type):
+            return [self._generate_one(field_nodes, named_type, object_id, position) for position in range(self.list_length)]
+        return self._generate_one(field_nodes, named_type, object_id, 0)
+
+    def _generate_one(self, field_nodes: List[FieldNode], named_type: Any, object_id: str, position: int) -> Any:
+        if isinstance(named_type, GraphQLObjectType):
+            return self._record(None, field_nodes, named_type, _nested_id(named_type.name, object_id, position))
+        if isinstance(named_type, GraphQLEnumType):
+            return next(iter(named_type.values))
+        if field_nodes[0].name.value == "rcsb_id":
+            return object_id
+        return _SCALAR_VALUES.get(named_type.name, field_nodes[0].name.value)
+
+    def handle_search(self, request: Dict[str, Any]) -> Optional[bytes]:
+        """Response to a Search API query, or None for "no content" """
+        self._count("search")
+        return_type = request.get("return_type", "entry")
+        options = request.get("request_options", {})
+        recorded = self.fixtures.get("search", {}).get(return_type)
+        if recorded is None:
+            suffix = _RETURN_TYPE_SUFFIX.get(return_type, "")
+            identifiers = [entry_id(idx) + suffix for idx in range(self.search_hits)]
+        else:
+            identifiers = list(recorded)
+        total = len(identifiers)
+        if total == 0:
+            return None
+        response: Dict[str, Any] = {"query_id": request.get("query_id", ""), "result_type": return_type, "total_count": total}
+        if options.get("return_counts"):
+            return json_codec.dumps(response).encode("utf-8")
+        if not options.get("return_all_hits"):
+            paginate = options.get("paginate", {})
+            start = int(paginate.get("start", 0))
+            identifiers = identifiers[start: start + int(paginate.get("rows", 10))]
+        if options.get("results_verbosity", "compact") == "compact":
+            response["result_set"] = identifiers
+        else:
+            response["result_set"] = [{"identifier": identifier, "score": 1.0} for identifier in identifiers]
+        return json_codec.dumps(response).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "MockRCSBServer"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def mock(self) -> MockRCSBServer:
+        return self.server.mock  # type: ignore[attr-defined]
+
+    def log_message(self, format, *args) -> None:  # pylint: disable=redefined-builtin
+        logger.debug(format, *args)
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        self.mock._delay()
+        parsed = urllib.parse.urlsplit(self.path)
+        if parsed.path in SEARCH_SCHEMA_PATHS:
+            self.mock._count("search_schema")
+            self._send(200, SEARCH_SCHEMA_PATHS[parsed.path].read_bytes())
+        elif parsed.path == SEARCH_QUERY_PATH:
+            if self.mock._should_fail():
+                self._send(self.mock.error_status, b'{"message": "mock error"}')
+                return
+            request = json_codec.loads(urllib.parse.parse_qs(parsed.query).get("json", ["{}"])[0])
+            body = self.mock.handle_search(request)
+            self._send(204, b"") if body is None else self._send(200, body)
+        else:
+            self._send(404, b'{"message": "not found"}')
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        self.mock._delay()
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+        if urllib.parse.urlsplit(self.path).path != DATA_PATH:
+            self._send(404, b'{"message": "not found"}')
+        elif ("__schema" not in body) and self.mock._should_fail():
+            self._send(self.mock.error_status, b'{"message": "mock error"}')
+        else:
+            try:
+                self._send(200, self.mock.handle_data(body))
+            except Exception as error:  # pylint: disable=broad-except
+                self._send(200, json_codec.dumps({"errors": [{"message": str(error)}]}).encode("utf-8"))
+
+    def _send(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _named_type(field_type: Any) -> Any:
+    while isinstance(field_type, (GraphQLNonNull, GraphQLList)):
+        field_type = field_type.of_type
+    return field_type
+
+
+def _is_list(field_type: Any) -> bool:
+    while isinstance(field_type, GraphQLNonNull):
+        field_type = field_type.of_type
+    return isinstance(field_type, GraphQLList)
+
+
+def _merge_selections(field_nodes: List[FieldNode]) -> Dict[str, List[FieldNode]]:
+    """Sub-selections of the fields, grouped by response key: a field selected more than once (e.g., `polymer_entities`
+    for several nested paths) is one field of the response, requesting the union of its sub-selections (GraphQL field merging)
+    """
+    merged: Dict[str, List[FieldNode]] = {}
+    for field_node in field_nodes:
+        for selection in field_node.selection_set.selections if field_node.selection_set else ():
+            if isinstance(selection, FieldNode):
+                merged.setdefault((selection.alias or selection.name).value, []).append(selection)
+    return merged
+
+
+def _nested_id(type_name: str, object_id: str, position: int) -> str:
+    """Identifier of the `position`-th generated object of a type nested in the object `object_id`,
+    e.g., "4HHB_1" for the first polymer entity of entry "4HHB" and "4HHB.B" for the second of its instances
+    """
+    match = _ENTRY_ID.match(object_id)
+    entry = match.group(0) if match else object_id
+    if type_name == "CoreEntry":
+        return entry
+    if type_name.endswith("EntityInstance"):
+        return f"{entry}.{_ALPHANUMERIC[10 + position % 26]}"
+    if type_name.endswith("Entity"):
+        return f"{entry}_{position + 1}"
+    if type_name == "CoreAssembly":
+        return f"{entry}-{position + 1}"
+    return object_id
+
+
+def _select(value: Any, field_nodes: List[FieldNode], named_type: Any) -> Any:
+    """Keep only the requested fields of a recorded value"""
+    if (value is None) or isinstance(named_type, (GraphQLScalarType, GraphQLEnumType)) or all(node.selection_set is None for node in field_nodes):
+        return value
+    if isinstance(value, list):
+        return [_select(item, field_nodes, named_type) for item in value]
+    return {
+        key: _select(value.get(selections[0].name.value), selections, _named_type(named_type.fields[selections[0].name.value].type))
+        for key, selections in _merge_selections(field_nodes).items()
+    }
+
+
+def record_fixtures(path: Union[str, Path], data_queries: Iterable[Any] = (), search_queries: Iterable[Any] = ()) -> Dict[str, Any]:
+    """Run queries against the live APIs and save their responses as fixtures for :py:class:`MockRCSBServer`
+
+    Args:
+        path (Union[str, Path]): JSON file to write
+        data_queries (Iterable[DataQuery], optional): Data API queries; records are saved by input_type and rcsb_id
+        search_queries (Iterable[Tuple[SearchQuery, str]], optional): search queries and their return types; result sets are saved by return type
+
+    Returns:
+        Dict[str, Any]: the fixtures
+    """
+    fixtures: Dict[str, Any] = {"data": {}, "search": {}}
+    for query in data_queries:
+        records = query.exec()["data"][query.get_input_type()]
+        for record in records if isinstance(records, list) else [records]:
+            fixtures["data"].setdefault(query.get_input_type(), {})[record["rcsb_id"]] = record
+    for search_query, return_type in search_queries:
+        fixtures["search"][return_type] = list(search_query(return_type=return_type))
+    Path(path).write_text(json_codec.dumps(fixtures), encoding="utf-8")
+    return fixtures
+
+
+def main(argv: List[str] = None) -> None:  # type: ignore
+    parser = argparse.ArgumentParser(description="Serve recorded and generated RCSB PDB Data and Search API responses")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before each response (default: %(default)s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum random seconds added to the latency (default: %(default)s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of queries that fail (default: %(default)s)")
+    parser.add_argument("--search-hits", type=int, default=1000, help="number of generated search results (default: %(default)s)")
+    parser.add_argument("--fixtures", type=Path, help="JSON file of recorded responses")
+    args = parser.parse_args(argv)
+    server = MockRCSBServer(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, search_hits=args.search_hits, fixtures=args.fixtures, port=args.port
+    )
+    print(f"Data API: {server.url}{DATA_PATH}\nSearch API: {server.url}{SEARCH_QUERY_PATH}")
+    try:
+        server._httpd.serve_forever()  # pylint: disable=protected-access
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
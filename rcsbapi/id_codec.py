@@ -0,0 +1,288 @@
+"""
+Compact integer encoding of RCSB PDB identifiers
+
+Millions of identifiers kept as Python strings cost roughly 50-60 bytes each, mostly object overhead.
+:py:class:`IdCodec` packs PDB identifiers into 64-bit integers and :py:class:`IdSet` stores them
+in a sorted `array` (or a NumPy array, if NumPy is installed) at 8 bytes per identifier.
+
+Supported forms, each packed into a single integer:
+
+- entries: `4HHB`
+- polymer/branched/non-polymer entities: `4HHB_1`
+- assemblies: `4HHB-1`
+- entity instances: `4HHB.A` (asym IDs of up to 4 characters)
+
+Other identifiers (e.g., computed structure models like `AF_AFP68871F1` or chemical components)
+are stored once in the codec's fallback table and referenced by negative codes.
+
+An IdSet is unordered, so it's used where results are combined as sets (`SetQuery.exec(compact=True)`).
+Search sessions keep results in the order (and with the scores) returned by the Search API, and
+DataQuery input_ids are written into the GraphQL query, so both keep lists of strings. Build an IdSet
+from them (e.g., `IdSet(session)`) to test membership or combine them.
+"""
+from __future__ import annotations
+import bisect
+import functools
+import re
+import threading
+from array import array
+from typing import Any, Collection, Dict, Iterable, Iterator, List, Optional, Union
+
+# Layout of a packed (non-negative) code: | PDB ID (21 bits) | suffix type (2 bits) | suffix (32 bits) |
+_KIND_SHIFT = 32
+_PDB_SHIFT = 34
+_SUFFIX_MASK = (1 << 32) - 1
+# Suffix types, ordered like their separators in ASCII so codes sort like identifiers
+_KIND_NONE = 0
+_KIND_ASSEMBLY = 1  # "-"
+_KIND_INSTANCE = 2  # "."
+_KIND_ENTITY = 3  # "_"
+_SEPARATORS = {"-": _KIND_ASSEMBLY, ".": _KIND_INSTANCE, "_": _KIND_ENTITY}
+_KIND_SEPARATORS = {kind: separator for separator, kind in _SEPARATORS.items()}
+
+_PACKABLE_ID = re.compile(r"([0-9][0-9A-Z]{3})(?:([-_])(0|[1-9][0-9]{0,8})|\.([0-9A-Z]{1,4}))?")
+_DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+@functools.lru_cache(maxsize=None)
+def _get_numpy() -> Any:
+    """Return the numpy module, or None if it isn't installed"""
+    try:
+        import numpy  # type: ignore  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    return numpy
+
+
+def _encode_asym(asym_id: str) -> int:
+    # Base 37 with 0 as padding, so shorter asym IDs sort first
+    code = 0
+    for idx in range(4):
+        code = code * 37 + (_DIGITS.index(asym_id[idx]) + 1 if idx < len(asym_id) else 0)
+    return code
+
+
+def _decode_asym(code: int) -> str:
+    chars = []
+    for _ in range(4):
+        code, digit = divmod(code, 37)
+        if digit:
+            chars.append(_DIGITS[digit - 1])
+    return "".join(reversed(chars))
+
+
+def _decode_pdb_id(code: int) -> str:
+    chars = []
+    for _ in range(4):
+        code, digit = divmod(code, 36)
+        chars.append(_DIGITS[digit])
+    return "".join(reversed(chars))
+
+
+class IdCodec:
+    """Thread-safe encoder of identifiers into 64-bit integers.
+
+    Identifiers that can't be packed are added to a fallback table, so their codes are only
+    valid for the codec instance that produced them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fallback: List[str] = []
+        self._fallback_codes: Dict[str, int] = {}
+
+    def encode(self, identifier: str) -> int:
+        """Encode an identifier. Packed identifiers get non-negative codes, fallback identifiers negative ones."""
+        match = _PACKABLE_ID.fullmatch(identifier)
+        if match is None:
+            return self._encode_fallback(identifier)
+        pdb_id, separator, number, asym_id = match.groups()
+        code = int(pdb_id, 36) << _PDB_SHIFT
+        if separator is not None:
+            number = int(number)
+            if number > _SUFFIX_MASK:
+                return self._encode_fallback(identifier)
+            code |= (_SEPARATORS[separator] << _KIND_SHIFT) | number
+        elif asym_id is not None:
+            code |= (_KIND_INSTANCE << _KIND_SHIFT) | _encode_asym(asym_id)
+        return code
+
+    def _encode_fallback(self, identifier: str) -> int:
+        code = self._fallback_codes.get(identifier)
+        if code is None:
+            with self._lock:
+                code = self._fallback_codes.get(identifier)
+                if code is None:
+                    self._fallback.append(identifier)
+                    code = -len(self._fallback)
+                    self._fallback_codes[identifier] = code
+        return code
+
+    def decode(self, code: int) -> str:
+        """Decode a code produced by this codec back into its identifier"""
+        code = int(code)
+        if code < 0:
+            return self._fallback[-code - 1]
+        pdb_id = _decode_pdb_id(code >> _PDB_SHIFT)
+        kind = (code >> _KIND_SHIFT) & 0b11
+        suffix = code & _SUFFIX_MASK
+        if kind == _KIND_NONE:
+            return pdb_id
+        if kind == _KIND_INSTANCE:
+            return f"{pdb_id}.{_decode_asym(suffix)}"
+        return f"{pdb_id}{_KIND_SEPARATORS[kind]}{suffix}"
+
+    def encode_many(self, identifiers: Iterable[str]) -> array:
+        """Encode identifiers into an array of 64-bit integers"""
+        return array("q", map(self.encode, identifiers))
+
+    def decode_many(self, codes: Iterable[int]) -> List[str]:
+        return [self.decode(code) for code in codes]
+
+    @property
+    def fallback_size(self) -> int:
+        """Number of identifiers stored in the fallback table"""
+        return len(self._fallback)
+
+
+ID_CODEC = IdCodec()
+"""Codec shared by all IdSets created without an explicit codec"""
+
+
+class IdSet(Collection[str]):
+    """Immutable set of identifiers stored as sorted integer codes.
+
+    Supports membership tests, iteration in sorted order, `len()`, and set operations
+    (`&`, `|`, `-`, `^` and the equivalent frozenset-style methods) with other IdSets of the same codec.
+    Uses NumPy for the set operations if it is installed.
+
+    Iteration yields packed PDB identifiers first (ordered by PDB ID, then by suffix, with entity and
+    assembly IDs in numeric order), followed by fallback identifiers in string order.
+
+    Example:
+        >>> a = IdSet(["4HHB", "2GS2", "5T89"])
+        >>> "4HHB" in a
+        True
+        >>> list(a - IdSet(["2GS2"]))
+        ['4HHB', '5T89']
+    """
+
+    def __init__(self, identifiers: Iterable[str] = (), codec: Optional[IdCodec] = None):
+        """
+        Args:
+            identifiers (Iterable[str], optional): identifiers in the set. Duplicates are removed.
+            codec (Optional[IdCodec], optional): codec for the identifiers. Defaults to the shared `ID_CODEC`.
+        """
+        self.codec = codec if codec is not None else ID_CODEC
+        self._codes = self._normalize(self.codec.encode_many(identifiers))
+
+    @classmethod
+    def from_codes(cls, codes: Union[array, Any], codec: Optional[IdCodec] = None) -> "IdSet":
+        """Create a set from codes produced by `codec` (an `array`, NumPy array, or iterable of ints)"""
+        id_set = cls.__new__(cls)
+        id_set.codec = codec if codec is not None else ID_CODEC
+        id_set._codes = id_set._normalize(codes)
+        return id_set
+
+    @staticmethod
+    def _normalize(codes: Any) -> Any:
+        """Sort and deduplicate codes"""
+        np = _get_numpy()
+        if np is not None:
+            return np.unique(np.asarray(codes, dtype=np.int64))
+        return array("q", sorted(set(codes)))
+
+    @property
+    def codes(self) -> Any:
+        """Sorted, unique codes (a NumPy array if NumPy is installed, otherwise an `array` of 64-bit ints)"""
+        return self._codes
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the codes"""
+        return len(self._codes) * 8
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __contains__(self, identifier: object) -> bool:
+        if not isinstance(identifier, str):
+            return False
+        match = _PACKABLE_ID.fullmatch(identifier)
+        if (match is None) and (identifier not in self.codec._fallback_codes):
+            return False  # don't grow the fallback table for lookups
+        code = self.codec.encode(identifier)
+        idx = bisect.bisect_left(self._codes, code)
+        return idx < len(self._codes) and self._codes[idx] == code
+
+    def __iter__(self) -> Iterator[str]:
+        decode = self.codec.decode
+        # Fallback codes are negative, so they come first; they are sorted by their decoded string instead
+        split = bisect.bisect_left(self._codes, 0)
+        for code in self._codes[split:]:
+            yield decode(code)
+        yield from sorted(decode(code) for code in self._codes[:split])
+
+    def __repr__(self) -> str:
+        preview = ", ".join(repr(identifier) for _, identifier in zip(range(5), self))
+        return f"IdSet([{preview}{', ...' if len(self) > 5 else ''}], size={len(self)})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, IdSet):
+            if other.codec is self.codec:
+                return len(self) == len(other) and all(a == b for a, b in zip(self._codes, other._codes))
+            return frozenset(self) == frozenset(other)
+        if isinstance(other, (set, frozenset)):
+            return len(self) == len(other) and all(identifier in self for identifier in other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore
+
+    def _check_codec(self, other: "IdSet") -> None:
+        if not isinstance(other, IdSet):
+            raise TypeError(f"Expected IdSet, got {type(other)}")
+        if other.codec is not self.codec:
+            raise ValueError("IdSets must share the same codec to be combined")
+
+    def _combine(self, operation: str, others: Iterable["IdSet"]) -> "IdSet":
+        codes = self._codes
+        np = _get_numpy()
+        for other in others:
+            self._check_codec(other)
+            if np is not None:
+                if operation == "intersection":
+                    codes = np.intersect1d(codes, other._codes, assume_unique=True)
+                elif operation == "union":
+                    codes = np.union1d(codes, other._codes)
+                elif operation == "difference":
+                    codes = np.setdiff1d(codes, other._codes, assume_unique=True)
+                else:
+                    codes = np.setxor1d(codes, other._codes, assume_unique=True)
+            else:
+                combined = getattr(set(codes), operation)(other._codes)
+                codes = array("q", sorted(combined))
+        return IdSet.from_codes(codes, self.codec)
+
+    def intersection(self, *others: "IdSet") -> "IdSet":
+        return self._combine("intersection", others)
+
+    def union(self, *others: "IdSet") -> "IdSet":
+        return self._combine("union", others)
+
+    def difference(self, *others: "IdSet") -> "IdSet":
+        return self._combine("difference", others)
+
+    def symmetric_difference(self, other: "IdSet") -> "IdSet":
+        return self._combine("symmetric_difference", [other])
+
+    def __and__(self, other: "IdSet") -> "IdSet":
+        return self.intersection(other)
+
+    def __or__(self, other: "IdSet") -> "IdSet":
+        return self.union(other)
+
+    def __sub__(self, other: "IdSet") -> "IdSet":
+        return self.difference(other)
+
+    def __xor__(self, other: "IdSet") -> "IdSet":
+        return self.symmetric_difference(other)
@@ -0,0 +1,306 @@
+"""
+Request instrumentation
+
+Every HTTP request made by the package (Data API queries, Search API pages, schema fetches) and every
+search page served from the result cache is reported to the registered observers as a :py:class:`RequestEvent`.
+Observers are plain callables, so events can be forwarded to logging, Prometheus, OpenTelemetry, etc.
+When no observer is registered, requests aren't instrumented at all.
+
+Example:
+    from rcsbapi import instrumentation
+
+    histogram = instrumentation.LatencyHistogram()
+    with instrumentation.observing(histogram):
+        query.exec()
+    print(histogram.summary())
+"""
+from __future__ import annotations
+import bisect
+import contextlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import json_codec
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RequestEvent:
+    """A completed request (or a request served from cache)"""
+
+    service: str
+    """API of the request: "data" or "search"."""
+    operation: str
+    """Kind of request: "query" (Data API), "page" or "all_hits" (Search API), or "schema"."""
+    url: str
+    index: Optional[int] = None
+    """batch index of a batched Data API query, or page index of a search"""
+    status_code: Optional[int] = None
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    elapsed: float = 0.0
+    """seconds from sending the request until the response was read and decoded
+    (for streamed "all_hits" requests, until the stream was consumed)"""
+    server_time: Optional[float] = None
+    """seconds until the response headers arrived, as measured by `requests`"""
+    decode_time: float = 0.0
+    """seconds spent decoding the JSON response"""
+    retries: int = 0
+    """retries made by the HTTP adapter (if it is configured to retry)"""
+    cache_hit: bool = False
+    error: Optional[str] = None
+
+
+Observer = Callable[[RequestEvent], None]
+
+_observers: Tuple[Observer, ...] = ()
+_observers_lock = threading.Lock()
+
+
+def add_observer(observer: Observer) -> None:
+    """Register a callable to receive a :py:class:`RequestEvent` after every request"""
+    global _observers  # pylint: disable=global-statement
+    with _observers_lock:
+        _observers = _observers + (observer,)
+
+
+def remove_observer(observer: Observer) -> None:
+    global _observers  # pylint: disable=global-statement
+    with _observers_lock:
+        _observers = tuple(registered for registered in _observers if registered is not observer)
+
+
+@contextlib.contextmanager
+def observing(*observers: Observer) -> Iterator[None]:
+    """Register observers for the duration of a `with` block"""
+    for observer in observers:
+        add_observer(observer)
+    try:
+        yield
+    finally:
+        for observer in observers:
+            remove_observer(observer)
+
+
+def enabled() -> bool:
+    """Whether any observer is registered"""
+    return bool(_observers)
+
+
+def emit(event: RequestEvent) -> None:
+    """Send an event to every observer. Errors raised by observers are logged, not raised."""
+    for observer in _observers:
+        try:
+            observer(event)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Request observer %r failed", observer)
+
+
+def _bytes_sent(response: Any) -> int:
+    request = getattr(response, "request", None)
+    if request is None:
+        return 0
+    body = getattr(request, "body", None) or b""
+    return len(getattr(request, "url", None) or "") + len(body.encode("utf-8") if isinstance(body, str) else body)
+
+
+def _retries(response: Any) -> int:
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    history = getattr(retries, "history", None)
+    return len(history) if isinstance(history, tuple) else 0
+
+
+class RequestTimer:
+    """Context manager timing a request and emitting its :py:class:`RequestEvent` on exit, including failed requests.
+
+    Example:
+        with RequestTimer("data", "query", url, index=0) as timer:
+            response = requests.post(url, data=query)
+            payload = timer.decode(response)
+    """
+
+    def __init__(self, service: str, operation: str, url: str, index: Optional[int] = None):
+        """
+        Args:
+            service (str): "data" or "search"
+            operation (str): kind of request
+            url (str): requested URL
+            index (Optional[int], optional): batch or page index. Defaults to None.
+        """
+        self.service = service
+        self.operation = operation
+        self.url = url
+        self.index = index
+        self.response: Any = None
+        """response, if one was received (set by `decode()`, or directly for responses that aren't decoded)"""
+        self.bytes_received: Optional[int] = None
+        """size of the response body, for streamed responses. Defaults to `len(response.content)`."""
+        self.decode_time = 0.0
+        self._started = 0.0
+
+    def __enter__(self) -> "RequestTimer":
+        self._started = time.perf_counter()
+        return self
+
+    def decode(self, response: Any) -> Any:
+        """Decode a JSON response, timing the decoding"""
+        self.response = response
+        decode_started = time.perf_counter()
+        try:
+            return json_codec.decode_response(response)
+        finally:
+            self.decode_time += time.perf_counter() - decode_started
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if not _observers:
+            return
+        response = self.response
+        bytes_received = self.bytes_received
+        if (bytes_received is None) and (response is not None):
+            content = getattr(response, "content", None)
+            bytes_received = len(content) if isinstance(content, (bytes, bytearray)) else 0
+        elapsed_headers = getattr(response, "elapsed", None)
+        emit(RequestEvent(
+            service=self.service,
+            operation=self.operation,
+            url=self.url,
+            index=self.index,
+            status_code=getattr(response, "status_code", None),
+            bytes_sent=_bytes_sent(response),
+            bytes_received=bytes_received or 0,
+            elapsed=time.perf_counter() - self._started,
+            server_time=elapsed_headers.total_seconds() if hasattr(elapsed_headers, "total_seconds") else None,
+            decode_time=self.decode_time,
+            retries=_retries(response),
+            # A generator closed by its consumer (e.g., a streamed search that stopped early) isn't an error
+            error=None if (exc is None) or isinstance(exc, GeneratorExit) else f"{exc_type.__name__}: {exc}",
+        ))
+
+
+def record_cache_hit(service: str, operation: str, url: str, index: Optional[int] = None) -> None:
+    """Emit an event for a request served from cache. Does nothing if no observer is registered."""
+    if _observers:
+        emit(RequestEvent(service=service, operation=operation, url=url, index=index, cache_hit=True))
+
+
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+"""Upper bounds (in seconds) of the default latency histogram buckets"""
+
+
+class LatencyHistogram:
+    """Observer counting request latencies into buckets, per (service, operation).
+
+    Cache hits are counted separately and don't enter the histogram.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Args:
+            buckets (Sequence[float], optional): upper bounds of the buckets in seconds. Latencies above the
+                last bound are counted in an overflow bucket. Defaults to `DEFAULT_LATENCY_BUCKETS`.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts: Dict[Tuple[str, str], List[int]] = {}
+        self._sums: Dict[Tuple[str, str], float] = {}
+        self._cache_hits: Dict[Tuple[str, str], int] = {}
+        self._errors: Dict[Tuple[str, str], int] = {}
+
+    def __call__(self, event: RequestEvent) -> None:
+        key = (event.service, event.operation)
+        with self._lock:
+            if event.cache_hit:
+                self._cache_hits[key] = self._cache_hits.get(key, 0) + 1
+                return
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[bisect.bisect_left(self.buckets, event.elapsed)] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + event.elapsed
+            if event.error is not None:
+                self._errors[key] = self._errors.get(key, 0) + 1
+
+    def quantile(self, q: float, service: str, operation: str) -> Optional[float]:
+        """Estimate a latency quantile (e.g., 0.95) as the upper bound of the bucket containing it.
+        Returns None if there are no requests, or `inf` if it falls in the overflow bucket.
+        """
+        with self._lock:
+            counts = list(self._counts.get((service, operation), []))
+        total = sum(counts)
+        if total == 0:
+            return None
+        rank = q * total
+        cumulative = 0
+        for idx, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= rank:
+                return self.buckets[idx] if idx < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per "service.operation": request count, mean latency, p50/p95 estimates, errors, cache hits and bucket counts"""
+        with self._lock:
+            keys = sorted(set(self._counts) | set(self._cache_hits))
+        result: Dict[str, Dict[str, Any]] = {}
+        for service, operation in keys:
+            key = (service, operation)
+            with self._lock:
+                counts = list(self._counts.get(key, [0] * (len(self.buckets) + 1)))
+                total_time = self._sums.get(key, 0.0)
+                errors = self._errors.get(key, 0)
+                cache_hits = self._cache_hits.get(key, 0)
+            count = sum(counts)
+            result[f"{service}.{operation}"] = {
+                "count": count,
+                "mean": total_time / count if count else None,
+                "p50": self.quantile(0.5, service, operation),
+                "p95": self.quantile(0.95, service, operation),
+                "errors": errors,
+                "cache_hits": cache_hits,
+                "buckets": dict(zip([*self.buckets, float("inf")], counts)),
+            }
+        return result
+
+
+class ThroughputMeter:
+    """Observer measuring requests and bytes per second since it was created (or last reset)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._started = time.monotonic()
+            self.requests = 0
+            self.cache_hits = 0
+            self.bytes_sent = 0
+            self.bytes_received = 0
+            self.decode_time = 0.0
+
+    def __call__(self, event: RequestEvent) -> None:
+        with self._lock:
+            if event.cache_hit:
+                self.cache_hits += 1
+                return
+            self.requests += 1
+            self.bytes_sent += event.bytes_sent
+            self.bytes_received += event.bytes_received
+            self.decode_time += event.decode_time
+
+    def summary(self) -> Dict[str, float]:
+        """Totals and rates over the elapsed wall-clock time"""
+        with self._lock:
+            elapsed = max(time.monotonic() - self._started, 1e-9)
+            return {
+                "elapsed": elapsed,
+                "requests": self.requests,
+                "cache_hits": self.cache_hits,
+                "requests_per_second": self.requests / elapsed,
+                "bytes_received_per_second": self.bytes_received / elapsed,
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+                "decode_time": self.decode_time,
+            }
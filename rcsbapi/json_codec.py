@@ -0,0 +1,117 @@
+"""
+Pluggable JSON encoding and decoding
+
+Responses are decoded straight from their bytes with the fastest installed backend:
+
+- `orjson` (`pip install orjson`) for decoding and encoding
+- `pysimdjson` (`pip install pysimdjson`) for decoding, with the standard library encoder
+- the standard library `json` module otherwise
+
+The backend is chosen by `config.JSON_BACKEND` ("auto", "orjson", "simdjson" or "json").
+All backends decode to the same Python objects and encode to the same JSON, so results don't depend on what is installed.
+As orjson does, dates and times (`datetime.date`, `datetime.datetime`, `datetime.time`) are encoded as ISO 8601 strings,
+non-ASCII text is written as UTF-8 rather than `\\u` escapes, and NaN and infinity (which aren't valid JSON) as `null`.
+"""
+from __future__ import annotations
+import datetime
+import functools
+import json
+import logging
+import math
+from typing import Any, Callable, NamedTuple, Union
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+JSON_BACKENDS = ("orjson", "simdjson", "json")
+"""Supported backends, most preferred first"""
+
+
+class _Backend(NamedTuple):
+    name: str
+    loads: Callable[[Union[bytes, str]], Any]
+    dumps: Callable[[Any], str]
+
+
+def _encode_default(obj: Any) -> str:
+    """Encode the types orjson supports natively that the standard library encoder doesn't"""
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj: Any) -> Any:
+    """Copy of `obj` with NaN and infinite floats replaced by None"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+def _stdlib_dumps(obj: Any) -> str:
+    try:
+        return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_encode_default)
+    except ValueError:
+        # Non-finite floats are rare, so they're only looked for once the encoder has rejected one
+        return json.dumps(_finite(obj), ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_encode_default)
+
+
+def _load_backend(name: str) -> _Backend:
+    """Import a backend. Raises ImportError if it isn't installed."""
+    if name == "orjson":
+        import orjson  # type: ignore  # pylint: disable=import-outside-toplevel
+
+        def orjson_dumps(obj: Any) -> str:
+            try:
+                return orjson.dumps(obj).decode("utf-8")
+            except TypeError:
+                # e.g., non-string dict keys or integers beyond 64 bits
+                return _stdlib_dumps(obj)
+
+        return _Backend("orjson", orjson.loads, orjson_dumps)
+    if name == "simdjson":
+        import simdjson  # type: ignore  # pylint: disable=import-outside-toplevel
+        return _Backend("simdjson", simdjson.loads, _stdlib_dumps)
+    if name == "json":
+        return _Backend("json", json.loads, _stdlib_dumps)
+    raise ValueError(f'Unknown JSON backend "{name}". Use "auto" or one of: {", ".join(JSON_BACKENDS)}')
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve(name: str) -> _Backend:
+    if name != "auto":
+        return _load_backend(name)
+    for candidate in JSON_BACKENDS:
+        try:
+            backend = _load_backend(candidate)
+        except ImportError:
+            continue
+        logger.debug("Using %s for JSON", backend.name)
+        return backend
+    raise AssertionError("stdlib json is always available")
+
+
+def backend_name() -> str:
+    """Name of the JSON backend currently in use"""
+    return _resolve(config.JSON_BACKEND).name
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Decode a JSON document, from bytes (preferably, to avoid an intermediate str) or str"""
+    if isinstance(data, (bytearray, memoryview)):
+        data = bytes(data)
+    return _resolve(config.JSON_BACKEND).loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """Encode an object as compact JSON (no whitespace between tokens)"""
+    return _resolve(config.JSON_BACKEND).dumps(obj)
+
+
+def decode_response(response: Any) -> Any:
+    """Decode the JSON body of a `requests.Response` from its raw bytes"""
+    return loads(response.content)
@@ -0,0 +1,206 @@
+"""
+Stream search results into Data API queries
+
+Instead of collecting every identifier from a search before requesting data for them,
+a :py:class:`SearchDataPipeline` sends identifiers to the Data API in batches as soon as
+enough have arrived. Data requests run concurrently with the remaining search pages,
+and records are yielded as their batches complete.
+
+Example:
+    from rcsbapi.search import search_attributes as attrs
+    from rcsbapi.pipeline import search_to_data
+
+    query = attrs.rcsb_entity_source_organism.taxonomy_lineage.name == "COVID-19 virus"
+    for entry in search_to_data(query, ["rcsb_id", "exptl.method"]):
+        print(entry["rcsb_id"], entry["exptl"])
+"""
+from __future__ import annotations
+import logging
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from .config import config
+from .data import DataQuery
+from .search.search_query import ReturnContentType, ReturnType, SearchQuery, Session
+
+logger = logging.getLogger(__name__)
+
+SEARCH_RETURN_TYPE_TO_DATA_INPUT_TYPE = {
+    "entry": "entries",
+    "assembly": "assemblies",
+    "polymer_entity": "polymer_entities",
+    "non_polymer_entity": "nonpolymer_entities",
+    "polymer_instance": "polymer_entity_instances",
+    "mol_definition": "chem_comps",
+}
+"""Data API input type for the identifiers of each Search API return type"""
+
+_DONE = object()  # marks the end of the batch queue
+
+
+class SearchDataPipeline(Iterable[Dict[str, Any]]):
+    """Fetch Data API records for identifiers as they stream in from a search.
+
+    Iterating yields one record (the dict for a single identifier under `response["data"][input_type]`)
+    at a time, in the order the identifiers were returned by the search.
+    At most `2 * workers` batches are in flight, so memory use doesn't grow with the number of results.
+    """
+
+    def __init__(
+        self,
+        identifiers: Union[Session, Iterable[str]],
+        input_type: str,
+        return_data_list: List[str],
+        batch_size: int = 50,
+        workers: Optional[int] = None,
+        add_rcsb_id: bool = True,
+        suppress_autocomplete_warning: bool = False,
+    ):
+        """
+        Args:
+            identifiers (Union[Session, Iterable[str]]): search session (or any iterable) producing identifiers
+            input_type (str): Data API input type of the identifiers (e.g., "entries", "polymer_entities")
+            return_data_list (List[str]): data to return for each identifier, as for :py:class:`DataQuery`
+            batch_size (int, optional): number of identifiers per Data API request. Defaults to 50.
+            workers (Optional[int], optional): number of concurrent Data API requests. Defaults to `config.DATA_API_MAX_WORKERS`.
+            add_rcsb_id (bool, optional): whether to automatically add <input_type>.rcsb_id to queries. Defaults to True.
+            suppress_autocomplete_warning (bool, optional): suppress warning for autocompletion of paths. Defaults to False.
+        """
+        self.identifiers = identifiers
+        self.input_type = input_type
+        self.return_data_list = return_data_list
+        self.batch_size = batch_size
+        self.workers = workers if workers is not None else config.DATA_API_MAX_WORKERS
+        self.add_rcsb_id = add_rcsb_id
+        self.suppress_autocomplete_warning = suppress_autocomplete_warning
+        self.num_identifiers = 0
+        """Number of identifiers received from the search so far"""
+        self._data_query: Optional[DataQuery] = None
+
+    def _make_data_query(self, id_batch: List[str]) -> DataQuery:
+        # The query is only constructed (and validated) once; later batches reuse it with different input_ids
+        return DataQuery(
+            input_type=self.input_type,
+            input_ids=id_batch,
+            return_data_list=list(self.return_data_list),
+            add_rcsb_id=self.add_rcsb_id,
+            suppress_autocomplete_warning=self.suppress_autocomplete_warning,
+        )
+
+    def _fetch(self, id_batch: List[str], index: int) -> List[Dict[str, Any]]:
+        assert self._data_query is not None
+        return self._data_query._fetch_batch(id_batch, index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        batches: "queue.Queue[Any]" = queue.Queue(maxsize=2 * max(self.workers, 1))
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=max(self.workers, 1))
+
+        def put(item: Any) -> None:
+            # Block while the queue is full, unless the consumer has stopped iterating
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        num_batches = 0
+
+        def submit(id_batch: List[str]) -> None:
+            nonlocal num_batches
+            if self._data_query is None:
+                self._data_query = self._make_data_query(id_batch)
+            put(executor.submit(self._fetch, [rcsb_id.upper() for rcsb_id in id_batch], num_batches))
+            num_batches += 1
+
+        def produce() -> None:
+            try:
+                id_batch: List[str] = []
+                for result in self.identifiers:
+                    if stop.is_set():
+                        return
+                    # Verbose search results are dicts
+                    id_batch.append(result if isinstance(result, str) else result["identifier"])
+                    self.num_identifiers += 1
+                    if len(id_batch) >= self.batch_size:
+                        submit(id_batch)
+                        id_batch = []
+                if id_batch:
+                    submit(id_batch)
+            except BaseException as error:  # pylint: disable=broad-except
+                put(error)
+            finally:
+                put(_DONE)
+
+        producer = threading.Thread(target=produce, name="rcsbapi-search-producer", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = batches.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                assert isinstance(item, Future)
+                yield from item.result()
+        finally:
+            stop.set()
+            while True:
+                try:
+                    item = batches.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, Future):
+                    item.cancel()
+            executor.shutdown(wait=False)
+
+
+def search_to_data(  # pylint: disable=dangerous-default-value
+    query: Union[SearchQuery, Session],
+    return_data_list: List[str],
+    return_type: ReturnType = "entry",
+    return_content_type: List[ReturnContentType] = ["experimental"],
+    rows: int = 10000,
+    input_type: Optional[str] = None,
+    batch_size: int = 50,
+    workers: Optional[int] = None,
+    add_rcsb_id: bool = True,
+    suppress_autocomplete_warning: bool = False,
+) -> SearchDataPipeline:
+    """Run a search and stream its results into Data API queries.
+
+    Args:
+        query (Union[SearchQuery, Session]): search query, or a Session to take the results from
+        return_data_list (List[str]): data to return for each result, as for :py:class:`DataQuery`
+        return_type (ReturnType, optional): search return type. Ignored if `query` is a Session. Defaults to "entry".
+        return_content_type (List[str], optional): experimental and/or computational models. Ignored if `query` is a Session.
+        rows (int, optional): search page size. Ignored if `query` is a Session. Defaults to 10000.
+        input_type (Optional[str], optional): Data API input type. Defaults to the type matching the search return type.
+        batch_size (int, optional): number of identifiers per Data API request. Defaults to 50.
+        workers (Optional[int], optional): number of concurrent Data API requests. Defaults to `config.DATA_API_MAX_WORKERS`.
+        add_rcsb_id (bool, optional): whether to automatically add <input_type>.rcsb_id to queries. Defaults to True.
+        suppress_autocomplete_warning (bool, optional): suppress warning for autocompletion of paths. Defaults to False.
+
+    Returns:
+        SearchDataPipeline: iterable of Data API records
+    """
+    if isinstance(query, Session):
+        session = query
+    else:
+        session = Session(query, return_type=return_type, rows=rows, return_content_type=return_content_type)
+    if input_type is None:
+        if session.return_type not in SEARCH_RETURN_TYPE_TO_DATA_INPUT_TYPE:
+            raise ValueError(f'No Data API input type for return type "{session.return_type}". Specify input_type.')
+        input_type = SEARCH_RETURN_TYPE_TO_DATA_INPUT_TYPE[session.return_type]
+    return SearchDataPipeline(
+        session,
+        input_type=input_type,
+        return_data_list=return_data_list,
+        batch_size=batch_size,
+        workers=workers,
+        add_rcsb_id=add_rcsb_id,
+        suppress_autocomplete_warning=suppress_autocomplete_warning,
+    )
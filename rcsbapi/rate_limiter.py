@@ -0,0 +1,53 @@
+"""
+Request rate limiting shared across threads
+
+A single limiter is shared by every request made to a service, so that paging a Session,
+running many searches concurrently, or fetching data in parallel all stay within the same limit.
+"""
+import threading
+import time
+from typing import Callable, Union
+
+from .config import config
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting the number of requests per second.
+
+    Up to `requests_per_second` requests may be made in a burst, after which
+    requests are spaced out so the average rate stays within the limit.
+    """
+
+    def __init__(self, requests_per_second: Union[float, Callable[[], float]]):
+        """
+        Args:
+            requests_per_second (Union[float, Callable[[], float]]): maximum request rate, or a function
+                returning it (read on every request so runtime changes to `config` take effect)
+        """
+        self._rate = requests_per_second if callable(requests_per_second) else (lambda: requests_per_second)
+        self._lock = threading.Lock()
+        self._tokens: float = float(self._rate())
+        self._last_refill: float = time.monotonic()
+
+    def acquire(self) -> None:
+        """Block until a request may be made"""
+        while True:
+            with self._lock:
+                rate = float(self._rate())
+                if rate <= 0:
+                    return  # no limit
+                now = time.monotonic()
+                self._tokens = min(rate, self._tokens + (now - self._last_refill) * rate)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / rate
+            time.sleep(wait)
+
+
+SEARCH_RATE_LIMITER = RateLimiter(lambda: config.SEARCH_API_REQUESTS_PER_SECOND)
+"""Limiter shared by all Search API requests"""
+
+DATA_RATE_LIMITER = RateLimiter(lambda: config.DATA_API_REQUESTS_PER_SECOND)
+"""Limiter shared by all Data API requests"""
@@ -0,0 +1,181 @@
+"""
+Reload the Data API and Search API schemas in long-running processes
+
+The schemas are fetched and compiled once, when `rcsbapi.data` and `rcsbapi.search` are imported.
+A :py:class:`SchemaReloader` checks periodically, in a background thread, whether the schemas
+served by the APIs changed. If one did, a new schema is compiled in that thread and swapped in
+with a single assignment, so queries constructed afterwards use it. Queries that are being
+constructed at that time, and existing `DataQuery` objects, keep using the schema they started with.
+
+Example:
+    from rcsbapi.schema_reload import SchemaReloader
+
+    reloader = SchemaReloader(interval=3600).start()
+    ...
+    reloader.stop()
+"""
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import config
+from .const import const
+
+logger = logging.getLogger(__name__)
+
+
+def schema_fingerprint(*schemas: Any) -> str:
+    """Version identifier of schema JSON: a hash of its canonical form"""
+    digest = hashlib.sha256()
+    for schema in schemas:
+        digest.update(json.dumps(schema, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def swap_data_schema(schema: Any) -> Any:
+    """Make `schema` the DataSchema used by new queries
+
+    Args:
+        schema (DataSchema): compiled schema
+
+    Returns:
+        DataSchema: the schema that was replaced
+    """
+    import rcsbapi.data  # pylint: disable=import-outside-toplevel
+
+    previous = rcsbapi.data.DATA_SCHEMA
+    rcsbapi.data.DATA_SCHEMA = schema
+    return previous
+
+
+def swap_search_schema(schema: Any) -> Any:
+    """Make `schema` the SearchSchema used by new queries and `rcsbapi.search.search_attributes`
+
+    Args:
+        schema (SearchSchema): compiled schema
+
+    Returns:
+        SearchSchema: the schema that was replaced
+    """
+    import rcsbapi.search  # pylint: disable=import-outside-toplevel
+    from .search import search_query  # pylint: disable=import-outside-toplevel
+
+    previous = search_query.SEARCH_SCHEMA
+    search_query.SEARCH_SCHEMA = schema
+    rcsbapi.search.SEARCH_SCHEMA = schema  # type: ignore[attr-defined]
+    rcsbapi.search.search_attributes = schema.search_attributes
+    return previous
+
+
+class SchemaReloader:
+    """Periodically check the Data API and Search API schemas, and swap in new ones when they change"""
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        data: bool = True,
+        search: bool = True,
+        on_reload: Optional[Callable[[str, Any, Any], None]] = None,
+    ):
+        """
+        Args:
+            interval (Optional[float], optional): seconds between checks. Defaults to `config.SCHEMA_RELOAD_INTERVAL`.
+            data (bool, optional): check the Data API schema. Defaults to True.
+            search (bool, optional): check the Search API schema. Defaults to True.
+            on_reload (Optional[Callable[[str, Any, Any], None]], optional): called after a schema is swapped, with
+                "data" or "search", the old schema and the new schema (e.g., to clear application caches built from it).
+        """
+        self.interval = config.SCHEMA_RELOAD_INTERVAL if interval is None else interval
+        self.on_reload = on_reload
+        self._names = [name for name, enabled in (("data", data), ("search", search)) if enabled]
+        self._versions: Dict[str, str] = {}
+        """fingerprint of the schema in use, by name. Set from the live schema on the first check."""
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self, force: bool = False) -> List[str]:
+        """Check the schemas once, and swap in the ones that changed
+
+        Args:
+            force (bool, optional): rebuild and swap in the schemas even if they didn't change. Defaults to False.
+
+        Returns:
+            List[str]: names of the schemas that were swapped ("data", "search")
+        """
+        swapped = []
+        with self._lock:
+            for name in self._names:
+                try:
+                    if self._check_one(name, force):
+                        swapped.append(name)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception("Checking the %s schema failed, keeping the current one", name)
+        return swapped
+
+    def _check_one(self, name: str, force: bool) -> bool:
+        if name == "data":
+            import rcsbapi.data  # pylint: disable=import-outside-toplevel
+
+            current = rcsbapi.data.DATA_SCHEMA
+            if name not in self._versions:
+                self._versions[name] = schema_fingerprint(current.schema)
+            fetched = current._request_schema()  # pylint: disable=protected-access
+            if fetched is None:
+                logger.warning("Couldn't fetch the data schema, keeping the current one")
+                return False
+            version = schema_fingerprint(fetched)
+            if version == self._versions[name] and not force:
+                return False
+            schema = rcsbapi.data.DataSchema(compact=current.compact, schema=fetched)
+            previous = swap_data_schema(schema)
+        else:
+            from .search import search_query  # pylint: disable=import-outside-toplevel
+
+            current = search_query.SEARCH_SCHEMA
+            if name not in self._versions:
+                self._versions[name] = schema_fingerprint(current.struct_schema, current.chem_schema)
+            struct_url, chem_url = const.SEARCH_API_STRUCTURE_ATTRIBUTE_SCHEMA_URL, const.SEARCH_API_CHEMICAL_ATTRIBUTE_SCHEMA_URL
+            struct_schema, chem_schema = current._fetch_schema(struct_url), current._fetch_schema(chem_url)  # pylint: disable=protected-access
+            if not struct_schema or not chem_schema:
+                logger.warning("Couldn't fetch the search schemas, keeping the current one")
+                return False
+            version = schema_fingerprint(struct_schema, chem_schema)
+            if version == self._versions[name] and not force:
+                return False
+            # Build from the schemas just fetched, so a failed second request can't swap in the packaged fallback files
+            schema = search_query.SearchSchema(search_query.Attr, schemas=(struct_schema, chem_schema))
+            previous = swap_search_schema(schema)
+        self._versions[name] = version
+        logger.info("Reloaded the %s schema", name)
+        if self.on_reload is not None:
+            self.on_reload(name, previous, schema)
+        return True
+
+    def start(self) -> "SchemaReloader":
+        """Start checking in a background thread"""
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="rcsbapi-schema-reload", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread. A check that's running is finished first."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        self.check()  # records the versions of the schemas in use
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def __enter__(self) -> "SchemaReloader":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
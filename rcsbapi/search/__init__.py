@@ -5,6 +5,8 @@ from .search_query import SEARCH_SCHEMA  # noqa: F401
 from .search_query import Attr, AttributeQuery, TextQuery
 from .search_query import SeqSimilarityQuery, SeqMotifQuery, ChemSimilarityQuery, StructSimilarityQuery, StructMotifResidue, StructMotifQuery
 from .search_query import Facet, FacetRange, TerminalFilter, GroupFilter, FilterFacet, Sort, GroupBy, RankingCriteriaType
+from .bulk_search import search_many, count_many
+from .set_algebra import SetQuery
 
 search_attributes = SEARCH_SCHEMA.search_attributes
 
@@ -32,4 +34,7 @@ __all__ = [
     "Sort",  # Rename to prevent overlap?
     "GroupBy",
     "RankingCriteriaType",
+    "search_many",
+    "count_many",
+    "SetQuery",
 ]
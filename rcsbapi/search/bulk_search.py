@@ -0,0 +1,200 @@
+"""Run many independent searches concurrently
+
+All queries and their pages share one worker pool and the Search API rate limiter.
+"""
+
+from __future__ import annotations
+import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Literal, Optional, Set, Tuple, Union
+
+from ..config import config
+from .search_cache import COUNT_CACHE, SearchCache, canonical_request_key
+from .search_query import GroupBy, ReturnContentType, ReturnType, ScoringStrategy, SearchQuery, Session, Sort, VerbosityLevel
+
+logger = logging.getLogger(__name__)
+
+
+class BulkSession(Iterable[Tuple[int, Any]]):
+    """Concurrent execution of many search queries.
+
+    Iterating yields `(query_index, identifier)` tuples as soon as each page of results arrives,
+    where `query_index` is the position of the query in the list passed to :py:func:`search_many`.
+    Results of different queries (and pages of the same query) are interleaved in order of completion.
+
+    A failing query doesn't abort the batch. Its exception is recorded in `errors` under its
+    query index and its remaining pages are skipped. Results already yielded for it are not retracted.
+    """
+
+    errors: Dict[int, Exception]
+    """Exceptions raised by failed queries, keyed by query index"""
+    counts: Dict[int, int]
+    """Total number of results of each query, keyed by query index (set once its first page arrives)"""
+
+    def __init__(self, sessions: List[Session], workers: Optional[int] = None):
+        """
+        Args:
+            sessions (List[Session]): one Session per query
+            workers (Optional[int], optional): number of concurrent requests. Defaults to `config.SEARCH_API_MAX_WORKERS`.
+        """
+        self.sessions = sessions
+        self.workers = workers if workers is not None else config.SEARCH_API_MAX_WORKERS
+        self.errors = {}
+        self.counts = {}
+
+    def __iter__(self) -> Iterator[Tuple[int, Any]]:
+        # Tasks are (query_index, start). The first page of every query is scheduled up front.
+        # Remaining pages are scheduled once the first page reports the total count.
+        pending: Deque[Tuple[int, int]] = deque((query_idx, 0) for query_idx in range(len(self.sessions)))
+        running: Dict[Future, Tuple[int, int]] = {}
+        # Cap tasks in flight so results don't pile up faster than they are consumed
+        max_running = 2 * max(self.workers, 1)
+
+        with ThreadPoolExecutor(max_workers=max(self.workers, 1)) as executor:
+            try:
+                while pending or running:
+                    while pending and len(running) < max_running:
+                        query_idx, start = pending.popleft()
+                        if query_idx in self.errors:
+                            continue
+                        future = executor.submit(self.sessions[query_idx]._single_query, start)
+                        running[future] = (query_idx, start)
+                    if not running:
+                        break
+                    done: Set[Future] = wait(running, return_when=FIRST_COMPLETED)[0]
+                    for future in done:
+                        query_idx, start = running.pop(future)
+                        if query_idx in self.errors:
+                            continue
+                        try:
+                            response = future.result()
+                        except Exception as error:  # pylint: disable=broad-except
+                            logger.warning("Query %d failed: %s", query_idx, error)
+                            self.errors[query_idx] = error
+                            continue
+                        if response is None:
+                            self.counts.setdefault(query_idx, 0)
+                            continue
+                        if start == 0:
+                            session = self.sessions[query_idx]
+                            total = response.get("total_count", 0)
+                            self.counts[query_idx] = total
+                            pending.extend((query_idx, page_start) for page_start in range(session.rows, total, session.rows))
+                        result_set = response.get("result_set", response.get("group_set", []))
+                        for result in result_set:
+                            yield (query_idx, result)
+            finally:
+                for future in running:
+                    future.cancel()
+
+
+def search_many(  # pylint: disable=dangerous-default-value
+    queries: Iterable[SearchQuery],
+    return_type: ReturnType = "entry",
+    rows: int = 10000,
+    return_content_type: List[ReturnContentType] = ["experimental"],
+    results_verbosity: VerbosityLevel = "compact",
+    group_by: Optional[GroupBy] = None,
+    group_by_return_type: Optional[Literal["groups", "representatives"]] = None,
+    sort: Optional[List[Sort]] = None,
+    scoring_strategy: Optional[ScoringStrategy] = None,
+    workers: Optional[int] = None,
+) -> BulkSession:
+    """Evaluate many independent queries concurrently.
+
+    All queries and their pages are scheduled over a shared worker pool and rate limiter.
+    Request options apply to every query.
+
+    Example:
+        >>> queries = [AttributeQuery("rcsb_entity_source_organism.taxonomy_lineage.id", "exact_match", str(taxon)) for taxon in taxa]
+        >>> bulk = search_many(queries, return_type="polymer_entity")
+        >>> for query_idx, rcsb_id in bulk:
+        ...     results[query_idx].append(rcsb_id)
+        >>> bulk.errors  # failed queries by index
+
+    Args:
+        queries (Iterable[SearchQuery]): queries to run
+        workers (Optional[int], optional): number of concurrent requests. Defaults to `config.SEARCH_API_MAX_WORKERS`.
+        Other arguments are the same as for :py:meth:`SearchQuery.exec`.
+
+    Returns:
+        BulkSession: iterable of `(query_index, identifier)` tuples
+    """
+    sessions = [
+        Session(
+            query=query,
+            return_type=return_type,
+            rows=rows,
+            return_content_type=return_content_type,
+            results_verbosity=results_verbosity,
+            group_by=group_by,
+            group_by_return_type=group_by_return_type,
+            sort=sort,
+            scoring_strategy=scoring_strategy,
+        )
+        for query in queries
+    ]
+    return BulkSession(sessions, workers=workers)
+
+
+def count_many(  # pylint: disable=dangerous-default-value
+    queries: Iterable[SearchQuery],
+    return_type: ReturnType = "entry",
+    return_content_type: List[ReturnContentType] = ["experimental"],
+    group_by: Optional[GroupBy] = None,
+    workers: Optional[int] = None,
+    cache: Optional[SearchCache] = COUNT_CACHE,
+    return_exceptions: bool = False,
+) -> List[Union[int, Exception]]:
+    """Get the total number of results of many queries concurrently.
+
+    Counts are cached by the canonical request JSON for `config.SEARCH_CACHE_TTL` seconds,
+    so repeating a count (even from a newly constructed but identical query) doesn't make another request.
+
+    Example:
+        >>> count_many([Attr("exptl.method") == method for method in ["X-RAY DIFFRACTION", "ELECTRON MICROSCOPY"]])
+        [196322, 21432]
+
+    Args:
+        queries (Iterable[SearchQuery]): queries to count
+        workers (Optional[int], optional): number of concurrent requests. Defaults to `config.SEARCH_API_MAX_WORKERS`.
+        cache (Optional[SearchCache], optional): cache for counts. Set to None to always request counts.
+        return_exceptions (bool, optional): return the exception in place of the count of a failed query,
+            instead of raising it. Defaults to False.
+        Other arguments are the same as for :py:meth:`SearchQuery.exec`.
+
+    Returns:
+        List[Union[int, Exception]]: counts in the same order as `queries`
+    """
+    sessions = [
+        Session(query=query, return_type=return_type, return_content_type=return_content_type, return_counts=True, group_by=group_by)
+        for query in queries
+    ]
+    keys = [canonical_request_key(session._make_params()) for session in sessions]
+    counts: Dict[str, Union[int, Exception]] = {}
+    # Only request each distinct, uncached query once
+    to_request: Dict[str, Session] = {}
+    for key, session in zip(keys, sessions):
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            counts[key] = cached
+        elif key not in to_request:
+            to_request[key] = session
+
+    def count(session: Session) -> Union[int, Exception]:
+        try:
+            response = session.to_dict()
+        except Exception as error:  # pylint: disable=broad-except
+            if not return_exceptions:
+                raise
+            return error
+        return response.get("total_count", 0)
+
+    num_workers = workers if workers is not None else config.SEARCH_API_MAX_WORKERS
+    with ThreadPoolExecutor(max_workers=max(num_workers, 1)) as executor:
+        for key, result in zip(to_request.keys(), executor.map(count, to_request.values())):
+            counts[key] = result
+            if (cache is not None) and not isinstance(result, Exception):
+                cache.set(key, result)
+    return [counts[key] for key in keys]
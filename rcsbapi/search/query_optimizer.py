@@ -0,0 +1,204 @@
+"""Simplify search query trees before they are sent to the Search API
+
+The optimized tree matches the same results as the original, but is smaller, so requests
+are shorter and the server has less to evaluate. The following rewrites are applied:
+
+- nested groups with the same logical operator are flattened, and single-node groups are unwrapped
+- identical nodes within a group are deduplicated
+- `exact_match`/`in` terminals on the same attribute are merged into a single `in` terminal
+  (within an OR, or negated within an AND)
+- contradictions (`a & ~a`) and tautologies (`a | ~a`) are folded
+"""
+
+from __future__ import annotations
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .search_query import AttributeQuery, Group, SearchQuery, Terminal
+
+_MERGEABLE_OPERATORS = ("exact_match", "in")
+
+
+class _Constant:
+    """Placeholder for a subtree that matches nothing or everything"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+_NOTHING = _Constant("NOTHING")
+_EVERYTHING = _Constant("EVERYTHING")
+
+_Node = Union[SearchQuery, _Constant]
+
+
+def optimize(query: SearchQuery) -> Optional[SearchQuery]:
+    """Return an equivalent, simplified version of the query
+
+    Args:
+        query (SearchQuery): query to simplify
+
+    Returns:
+        Optional[SearchQuery]: simplified query, or None if the query can't match any results.
+            If the query matches everything, it is returned unchanged, since there is
+            no terminal that matches everything for every return type.
+    """
+    optimized = _optimize(query, _NodeKeys())
+    if optimized is _NOTHING:
+        return None
+    if optimized is _EVERYTHING:
+        return query
+    assert isinstance(optimized, SearchQuery)
+    return optimized
+
+
+def _optimize(query: SearchQuery, keys: "_NodeKeys") -> _Node:
+    if not isinstance(query, Group):
+        return query
+
+    # Optimize children first, flattening nested groups with the same operator
+    nodes: List[_Node] = []
+    for node in query.nodes:
+        optimized = _optimize(node, keys)
+        if isinstance(optimized, Group) and optimized.operator == query.operator:
+            nodes.extend(optimized.nodes)
+        else:
+            nodes.append(optimized)
+
+    # NOTHING absorbs an AND and is dropped from an OR, and vice versa for EVERYTHING
+    absorbing, neutral = (_NOTHING, _EVERYTHING) if query.operator == "and" else (_EVERYTHING, _NOTHING)
+    if any(node is absorbing for node in nodes):
+        return absorbing
+    queries: List[SearchQuery] = [node for node in nodes if isinstance(node, SearchQuery)]
+
+    queries = _deduplicate(queries, keys)
+    if _has_complement(queries):
+        return absorbing
+    queries = _merge_terminals(queries, query.operator)
+
+    if not queries:
+        return neutral
+    if len(queries) == 1:
+        return queries[0]
+    return Group(query.operator, queries)
+
+
+class _NodeKeys:
+    """Keys identifying nodes, ignoring node_ids, for one optimization pass
+
+    Each distinct subtree is numbered, and a group's key is made of its operator and its children's numbers,
+    so only terminals are serialized, once each, rather than every subtree once per ancestor.
+    """
+
+    def __init__(self):
+        self._numbers: Dict[Any, int] = {}
+        # Nodes are kept with their keys, so their ids aren't reused by other nodes during the pass
+        self._by_id: Dict[int, Tuple[SearchQuery, int]] = {}
+
+    def __call__(self, query: SearchQuery) -> int:
+        known = self._by_id.get(id(query))
+        if known is not None:
+            return known[1]
+        structure: Any
+        if isinstance(query, Group):
+            structure = (query.operator, tuple(self(node) for node in query.nodes))
+        else:
+            structure = json.dumps(_strip_node_ids(query.to_dict()), sort_keys=True, default=str)
+        key = self._numbers.setdefault(structure, len(self._numbers))
+        self._by_id[id(query)] = (query, key)
+        return key
+
+
+def _strip_node_ids(query_dict: Dict) -> Dict:
+    stripped = {key: value for key, value in query_dict.items() if key != "node_id"}
+    if "nodes" in stripped:
+        stripped["nodes"] = [_strip_node_ids(node) for node in stripped["nodes"]]
+    return stripped
+
+
+def _deduplicate(queries: List[SearchQuery], keys: _NodeKeys) -> List[SearchQuery]:
+    seen = set()
+    unique = []
+    for query in queries:
+        key = keys(query)
+        if key not in seen:
+            seen.add(key)
+            unique.append(query)
+    return unique
+
+
+def _is_attribute_terminal(query: SearchQuery) -> bool:
+    # AttributeQueries lose their subclass when node_ids are assigned, so check the parameters instead
+    return isinstance(query, Terminal) and isinstance(query.params, dict) and ("attribute" in query.params) and ("operator" in query.params)
+
+
+def _attribute_query(query: Terminal, **params: Any) -> AttributeQuery:
+    merged = {**query.params, **params}
+    return AttributeQuery(
+        attribute=merged["attribute"],
+        operator=merged["operator"],
+        value=merged.get("value"),
+        service=query.service,
+        negation=bool(merged.get("negation")),
+    )
+
+
+def _has_complement(queries: List[SearchQuery]) -> bool:
+    """Check whether a terminal and its negation are both present"""
+    keys = set()
+    negated_keys = set()
+    for query in queries:
+        if not _is_attribute_terminal(query):
+            continue
+        assert isinstance(query, Terminal)
+        key = json.dumps([query.service, {k: v for k, v in query.params.items() if k != "negation"}], sort_keys=True, default=str)
+        (negated_keys if query.params.get("negation") else keys).add(key)
+    return not keys.isdisjoint(negated_keys)
+
+
+def _merge_terminals(queries: List[SearchQuery], operator: str) -> List[SearchQuery]:
+    """Merge equality terminals on the same attribute into a single `in` terminal
+
+    `a == x | a == y` is `a in [x, y]`, and `a != x & a != y` is `not a in [x, y]`.
+    Merging non-negated terminals within an AND isn't safe, since attributes may hold several values.
+    """
+    merge_negated = operator == "and"
+    groups: Dict[str, List[int]] = {}
+    for idx, query in enumerate(queries):
+        if (
+            _is_attribute_terminal(query)
+            and query.params["operator"] in _MERGEABLE_OPERATORS  # type: ignore[attr-defined]
+            and bool(query.params.get("negation")) == merge_negated  # type: ignore[attr-defined]
+            and "value" in query.params  # type: ignore[attr-defined]
+        ):
+            key = json.dumps([query.service, query.params["attribute"]], default=str)  # type: ignore[attr-defined]
+            groups.setdefault(key, []).append(idx)
+
+    merged: Dict[int, Optional[SearchQuery]] = {}
+    for indices in groups.values():
+        if len(indices) < 2:
+            continue
+        values: List[Any] = []
+        seen = set()
+        for idx in indices:
+            value = queries[idx].params["value"]  # type: ignore[attr-defined]
+            for item in (value if isinstance(value, list) else [value]):
+                item_key = json.dumps(item, sort_keys=True, default=str)
+                if item_key not in seen:
+                    seen.add(item_key)
+                    values.append(item)
+        first = queries[indices[0]]
+        assert isinstance(first, Terminal)
+        merged[indices[0]] = _attribute_query(first, operator="in", value=values)
+        for idx in indices[1:]:
+            merged[idx] = None
+
+    result = []
+    for idx, query in enumerate(queries):
+        replacement = merged.get(idx, query)
+        if replacement is not None:
+            result.append(replacement)
+    return result
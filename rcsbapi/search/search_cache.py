@@ -0,0 +1,178 @@
+"""Cache search results locally, keyed by the canonical form of the request
+
+Two requests get the same key if they only differ in their query_id, pagination or node_id numbering.
+"""
+
+from __future__ import annotations
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import config
+from ..id_codec import IdSet
+
+logger = logging.getLogger(__name__)
+
+# Names of the files written by a SearchCache: the key (a SHA-256 hex digest) and ".json"
+_ENTRY_FILE_NAME = re.compile(r"[0-9a-f]{64}\.json")
+
+
+def canonical_request_key(request: Dict) -> str:
+    """Get a stable hash identifying a Search API request
+
+    `request_info` (which holds the query_id) and `request_options.paginate` are excluded,
+    node_ids are dropped and keys are sorted.
+
+    Args:
+        request (Dict): request dictionary, as generated by `Session._make_params()`
+
+    Returns:
+        str: hex digest of the canonical request JSON
+    """
+    canonical = copy.deepcopy(request)
+    canonical.pop("request_info", None)
+    canonical.get("request_options", {}).pop("paginate", None)
+    _drop_node_ids(canonical.get("query"))
+    data = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _drop_node_ids(node: Optional[Dict]) -> None:
+    if not isinstance(node, dict):
+        return
+    node.pop("node_id", None)
+    for child in node.get("nodes", []):
+        _drop_node_ids(child)
+
+
+def _encode_value(value: Any) -> Any:
+    """JSON form of cached values that aren't JSON types: IdSets are written as lists of identifiers"""
+    if isinstance(value, IdSet):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class SearchCache:
+    """Thread-safe cache with a time-to-live for each entry.
+
+    Entries are kept in memory and, if a directory is given, also written to disk as JSON
+    so they can be reused by other processes or later runs. IdSet values are written as lists of identifiers.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, directory: Optional[str] = None, max_entries: Optional[int] = None):
+        """
+        Args:
+            ttl (Optional[float], optional): seconds an entry stays valid. Defaults to `config.SEARCH_CACHE_TTL`.
+            directory (Optional[str], optional): directory for storing entries on disk.
+                Defaults to `config.SEARCH_CACHE_DIR` (if empty, entries are only kept in memory).
+            max_entries (Optional[int], optional): maximum number of entries kept in memory.
+                The least recently used entries are evicted first. Defaults to None (no limit).
+        """
+        self._ttl = ttl
+        self._directory = directory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl if self._ttl is not None else config.SEARCH_CACHE_TTL
+
+    @property
+    def directory(self) -> str:
+        return self._directory if self._directory is not None else config.SEARCH_CACHE_DIR
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if time.time() - entry[0] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+        if not self.directory:
+            return None
+        entry = self._read_file(key)
+        if entry is None:
+            return None
+        self._set_memory(key, entry)
+        return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        entry = (time.time(), value)
+        self._set_memory(key, entry)
+        if self.directory:
+            self._write_file(key, entry)
+
+    def clear(self) -> None:
+        """Remove all entries, including those on disk. Other files in the directory are left alone."""
+        with self._lock:
+            self._entries.clear()
+        if self.directory and os.path.isdir(self.directory):
+            for file_name in os.listdir(self.directory):
+                if _ENTRY_FILE_NAME.fullmatch(file_name):
+                    os.remove(os.path.join(self.directory, file_name))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _set_memory(self, key: str, entry: Tuple[float, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if self.max_entries is not None:
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        assert self.directory  # for mypy
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read_file(self, key: str) -> Optional[Tuple[float, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                stored = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as error:
+            logger.debug("Ignoring unreadable cache file %s: %s", path, error)
+            return None
+        if time.time() - stored["created"] > self.ttl:
+            return None
+        return (stored["created"], stored["value"])
+
+    def _write_file(self, key: str, entry: Tuple[float, Any]) -> None:
+        # Write to a temporary file first so readers never see a partially written entry
+        assert self.directory  # for mypy
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError as error:
+            logger.warning("Unable to write search cache file: %s", error)
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump({"created": entry[0], "value": entry[1]}, file, separators=(",", ":"), default=_encode_value)
+            os.replace(tmp_path, self._path(key))
+        except OSError as error:
+            logger.warning("Unable to write search cache file: %s", error)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+COUNT_CACHE = SearchCache()
+"""Cache of result counts used by :py:func:`count_many`"""
+
+RESULT_CACHE = SearchCache(max_entries=64)
+"""Cache of search results used by Sessions when `config.SEARCH_CACHE_RESULTS` is True"""
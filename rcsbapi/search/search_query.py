@@ -2,18 +2,21 @@
 """
 
 from __future__ import annotations
+import codecs
+import copy
 import functools
 import json
 import logging
 import math
+import re
 import sys
 import urllib.parse
 import uuid
-import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, fields, is_dataclass
 from datetime import date
 from typing import (
+    TYPE_CHECKING,
     Any,
     Callable,
     Dict,
@@ -29,8 +32,12 @@ from typing import (
 )
 
 import requests
+from .. import json_codec, shared_schema
 from ..const import const
 from ..config import config
+from ..instrumentation import RequestTimer, record_cache_hit
+from ..rate_limiter import SEARCH_RATE_LIMITER
+from .search_cache import RESULT_CACHE, SearchCache, canonical_request_key
 from .search_schema import SearchSchema
 
 if sys.version_info > (3, 8):
@@ -38,6 +45,9 @@ if sys.version_info > (3, 8):
 else:
     from typing_extensions import Literal
 
+if TYPE_CHECKING:
+    from ..sinks import RecordSink
+
 logger = logging.getLogger(__name__)
 
 # tqdm is optional
@@ -163,7 +173,7 @@ class SearchQuery(ABC):
 
     def to_json(self) -> str:
         """Get JSON string of this query"""
-        return json.dumps(self.to_dict(), separators=(",", ":"))
+        return json_codec.dumps(self.to_dict())
 
     @abstractmethod
     def _assign_ids(self, node_id=0) -> Tuple["SearchQuery", int]:
@@ -194,20 +204,26 @@ class SearchQuery(ABC):
 
     def __and__(self, other: "SearchQuery") -> "SearchQuery":
         """Intersection: `a & b`"""
-        assert isinstance(other, SearchQuery)
+        if not isinstance(other, SearchQuery):
+            return NotImplemented
         return Group("and", [self, other])
 
     def __or__(self, other: "SearchQuery") -> "SearchQuery":
         """Union: `a | b`"""
-        assert isinstance(other, SearchQuery)
+        if not isinstance(other, SearchQuery):
+            return NotImplemented
         return Group("or", [self, other])
 
     def __sub__(self, other: "SearchQuery") -> "SearchQuery":
         """Difference: `a - b`"""
+        if not isinstance(other, SearchQuery):
+            return NotImplemented
         return self & ~other
 
     def __xor__(self, other: "SearchQuery") -> "SearchQuery":
         """Symmetric difference: `a ^ b`"""
+        if not isinstance(other, SearchQuery):
+            return NotImplemented
         return (self & ~other) | (~self & other)
 
     def exec(
@@ -223,9 +239,15 @@ class SearchQuery(ABC):
         sort: Optional[List[Sort]] = None,
         return_explain_metadata: bool = False,
         scoring_strategy: Optional[ScoringStrategy] = None,
+        return_all_hits: bool = False,
     ) -> Union["Session", int]:
         # pylint: disable=dangerous-default-value
-        """Evaluate this query and return an iterator of all result IDs"""
+        """Evaluate this query and return an iterator of all result IDs
+
+        If `return_all_hits` is True, all results are fetched with a single streamed request
+        instead of being paged `rows` at a time. The count is then set once iteration starts,
+        and the facets and explain metadata once the results are read to the end.
+        """
         session = Session(
             query=self,
             return_type=return_type,
@@ -239,8 +261,13 @@ class SearchQuery(ABC):
             sort=sort,
             return_explain_metadata=return_explain_metadata,
             scoring_strategy=scoring_strategy,
+            return_all_hits=return_all_hits,
         )
 
+        # Avoid downloading the full result set up front; it is streamed when the session is iterated
+        if return_all_hits and not return_counts:
+            return session
+
         response = session.to_dict()
 
         # If return_counts exists, return only the total count
@@ -278,6 +305,7 @@ class SearchQuery(ABC):
         sort: Optional[List[Sort]] = None,
         return_explain_metadata: bool = False,
         scoring_strategy: Optional[ScoringStrategy] = None,
+        return_all_hits: bool = False,
     ) -> Union["Session", int]:
         # pylint: disable=dangerous-default-value
         """Evaluate this query and return an iterator of all result IDs"""
@@ -293,6 +321,7 @@ class SearchQuery(ABC):
             sort=sort,
             return_explain_metadata=return_explain_metadata,
             scoring_strategy=scoring_strategy,
+            return_all_hits=return_all_hits,
         )
 
     @overload
@@ -363,12 +392,14 @@ class Terminal(SearchQuery):
         )
 
     def __invert__(self):
-        if isinstance(self, AttributeQuery):
+        # AttributeQueries become plain Terminals when node_ids are assigned, so also check the parameters
+        if isinstance(self, AttributeQuery) or ({"attribute", "operator"} <= set(self.params)):
             return AttributeQuery(
                 attribute=self.params.get("attribute"),
                 operator=self.params.get("operator"),
                 negation=not self.params.get("negation"),
                 value=self.params.get("value"),
+                service=self.service,
             )
         else:
             raise TypeError("Negation is not supported by type " + str(type(self)))  # Attribute Queries are the only query type to support inversion.
@@ -511,7 +542,7 @@ class Attr:
 
     def exists(self) -> AttributeQuery:
         """Attribute is defined for the structure"""
-        return AttributeQuery(self.attribute, operator="exists")
+        return AttributeQuery(self.attribute, operator="exists", service=self.type)
 
     def in_(
         self,
@@ -537,7 +568,7 @@ class Attr:
         """Attribute is contained in the list of values"""
         if isinstance(value, Value):
             value = value.value
-        return AttributeQuery(self.attribute, operator="in", value=value)
+        return AttributeQuery(self.attribute, operator="in", value=value, service=self.type)
 
     # Need ignore[override] because typeshed restricts __eq__ return value
     # https://github.com/python/mypy/issues/2783
@@ -647,7 +678,7 @@ class Attr:
         return self.greater_or_equal(value)
 
 
-SEARCH_SCHEMA = SearchSchema(Attr)
+SEARCH_SCHEMA: SearchSchema = shared_schema.attached("search") or SearchSchema(Attr)
 
 
 class AttributeQuery(Terminal):
@@ -1011,8 +1042,8 @@ class Group(SearchQuery):
         return group_dict
 
     def __invert__(self):
-        if self.operator == "and":
-            return Group("or", [~node for node in self.nodes])
+        # De Morgan's laws push the negation down to the terminals
+        return Group("or" if self.operator == "and" else "and", [~node for node in self.nodes])
 
     def __and__(self, other: SearchQuery) -> SearchQuery:
         # Combine nodes if possible
@@ -1382,7 +1413,8 @@ class FacetRange:
 class RequestOption(ABC):
     """
     Base class for request options
-    Note: return_all_hits, paginate not implemented. They are handled automatically by package.
+    Note: paginate is not implemented, it is handled automatically by package.
+    return_all_hits is set with the `return_all_hits` argument of `exec` or `Session`.
     """
 
     @abstractmethod
@@ -1602,6 +1634,11 @@ class RankingCriteriaType:
         return rank_dict
 
 
+# For incrementally parsing streamed return_all_hits responses
+_STREAM_CHUNK_SIZE = 65536
+_RESULT_SET_START = re.compile(r'"(result_set|group_set)"\s*:\s*\[')
+
+
 class Session(Iterable[str]):
     """A single query session.
 
@@ -1632,10 +1669,23 @@ class Session(Iterable[str]):
         group_by_return_type: Optional[Literal["groups", "representatives"]] = None,
         sort: Optional[List[Sort]] = None,
         return_explain_metadata: bool = False,
-        scoring_strategy: Optional[ScoringStrategy] = None
+        scoring_strategy: Optional[ScoringStrategy] = None,
+        return_all_hits: bool = False,
+        cache: Optional[SearchCache] = None,
     ):
+        """
+        Args:
+            cache (Optional[SearchCache], optional): cache of search results. Results of identical requests
+                (ignoring query_id and pagination) are then served locally until they expire.
+                Defaults to the shared result cache if `config.SEARCH_CACHE_RESULTS` is True, otherwise None.
+            Other arguments are the same as for :py:meth:`SearchQuery.exec`.
+        """
         self.query_id = Session.make_uuid()
-        self.query = query.assign_ids()
+        # Simplify the query tree before it is serialized. If nothing can match, no requests are made.
+        from .query_optimizer import optimize  # pylint: disable=import-outside-toplevel  # circular import
+        optimized = optimize(query) if config.SEARCH_OPTIMIZE_QUERIES else query
+        self._matches_nothing = optimized is None
+        self.query = (query if optimized is None else optimized).assign_ids()
         self.return_type = return_type
         self.start = 0
         self.rows = rows
@@ -1650,12 +1700,24 @@ class Session(Iterable[str]):
         self._return_counts = return_counts
         self._return_explain_metadata = return_explain_metadata
         self._scoring_strategy = scoring_strategy
+        self._return_all_hits = return_all_hits
 
         # request_option results
         self.facets: Optional[Dict] = None
         self.count: Optional[int] = None
         self.explain_metadata: Optional[Dict] = None
 
+        # serialized request, split around the paginate.start value (see _request_json)
+        self._request_template: Optional[Tuple[Tuple[int, str], List[str]]] = None
+
+        # result caching
+        self._cache = cache if cache is not None else (RESULT_CACHE if config.SEARCH_CACHE_RESULTS else None)
+        self._result_cache_key: Optional[str] = None
+        self._first_response: Optional[Dict] = None
+        """first response, without its results (keys such as total_count and facets)"""
+        self._result_key: str = "result_set"
+        """key of the results in responses ("result_set", or "group_set" for grouped results)"""
+
     @staticmethod
     def make_uuid() -> str:
         "Create a new UUID to identify a query"
@@ -1685,6 +1747,10 @@ class Session(Iterable[str]):
             if request_options_dict["paginate"]:
                 request_options_dict.pop("paginate")
 
+        elif self._return_all_hits:
+            request_options_dict["return_all_hits"] = self._return_all_hits
+            request_options_dict.pop("paginate")
+
         if self._facets:
             if isinstance(self._facets, list):
                 request_options_dict["facets"] = [facet.to_dict() for facet in self._facets]
@@ -1733,32 +1799,177 @@ class Session(Iterable[str]):
         )
         return query_dict
 
+    def _request_json(self, start=0) -> str:
+        """Serialize the request for the page of results beginning at `start`
+
+        The query tree and request options are only serialized once per Session.
+        Later pages reuse the cached JSON and splice in the new `paginate.start` value.
+        """
+        if (self._request_template is None) or (self._request_template[0] != (self.rows, self.return_type)):
+            # Serialize with a unique stand-in for paginate.start, which can't also occur in a user-supplied string.
+            # No stand-in is present if pagination was dropped (e.g., for return_counts).
+            # Key on return_type after _make_params, since group_by may change it.
+            placeholder = f"__paginate_start_{uuid.uuid4().hex}__"
+            params = self._make_params(start=placeholder)
+            parts = json_codec.dumps(params).split(json.dumps(placeholder))
+            assert len(parts) == (2 if "paginate" in params["request_options"] else 1)
+            self._request_template = ((self.rows, self.return_type), parts)
+        parts = self._request_template[1]
+        if len(parts) == 1:
+            return parts[0]
+        return parts[0] + str(int(start)) + parts[1]
+
     def _single_query(self, start=0) -> Optional[Dict]:
         "Fires a single query"
-        params = self._make_params(start)
+        if self._matches_nothing:
+            return None
+        SEARCH_RATE_LIMITER.acquire()  # This prevents the user from bottlenecking the server with requests.
         logger.debug("Querying %s for results %s-%s", self.url, start, start + self.rows - 1)
-        response = requests.get(self.url, {"json": json.dumps(params, separators=(",", ":"))}, timeout=None)
-        response.raise_for_status()
-        if response.status_code == requests.codes.ok:
-            return response.json()
-        elif response.status_code == requests.codes.no_content:
+        with RequestTimer("search", "page", self.url, index=start // self.rows if self.rows else None) as timer:
+            response = timer.response = requests.get(self.url, {"json": self._request_json(start)}, timeout=None)
+            response.raise_for_status()
+            if response.status_code == requests.codes.ok:
+                return timer.decode(response)
+        if response.status_code == requests.codes.no_content:
             return None
         else:
             raise requests.HTTPError(f"Unexpected status: {response.status_code}")
 
+    def _stream_all_hits(self) -> Iterator:
+        """Fire a single return_all_hits query and incrementally parse the streamed results
+
+        Results are yielded as soon as they are decoded, so the full response body is never held in memory.
+        The other keys of the response (total_count, facets, explain_metadata) are set on the Session
+        as they are read: those before the results when they start, and those after once the results end.
+
+        Raises:
+            requests.exceptions.ChunkedEncodingError: if the response ends before its results do
+        """
+        if self._matches_nothing:
+            self.count = 0
+            return
+        SEARCH_RATE_LIMITER.acquire()
+        logger.debug("Querying %s for all results", self.url)
+        with RequestTimer("search", "all_hits", self.url) as timer:
+            response = timer.response = requests.get(self.url, {"json": self._request_json()}, timeout=None, stream=True)
+            response.raise_for_status()
+            if response.status_code == requests.codes.no_content:
+                return
+            if response.status_code != requests.codes.ok:
+                raise requests.HTTPError(f"Unexpected status: {response.status_code}")
+
+            decoder = json.JSONDecoder()
+            text_decoder = codecs.getincrementaldecoder("utf-8")()
+            timer.bytes_received = 0
+            buffer = ""
+            idx = 0
+            in_results = False
+            chunks = self._count_bytes(response, timer)
+            with response:
+                for chunk in chunks:
+                    buffer = buffer[idx:] + text_decoder.decode(chunk)
+                    idx = 0
+                    if not in_results:
+                        match = _RESULT_SET_START.search(buffer)
+                        if match is None:
+                            continue
+                        self._result_key = match.group(1)
+                        # The keys before the results, as an object of their own
+                        head_response = json.loads(buffer[:match.start()].rstrip(" \t\r\n,") + "}")
+                        self._set_response_options(head_response)
+                        in_results = True
+                        idx = match.end()
+                    while True:
+                        while idx < len(buffer) and buffer[idx] in " \t\r\n,":
+                            idx += 1
+                        if idx >= len(buffer):
+                            break
+                        if buffer[idx] == "]":
+                            # The keys after the results are small (e.g., facets), so read them whole
+                            tail = buffer[idx + 1:] + "".join(text_decoder.decode(chunk) for chunk in chunks)
+                            tail_response = json.loads("{" + tail.lstrip(" \t\r\n,"))
+                            self._set_response_options(tail_response)
+                            self._first_response = {**head_response, **tail_response}
+                            return
+                        try:
+                            result, end = decoder.raw_decode(buffer, idx)
+                        except json.JSONDecodeError:
+                            break  # element is incomplete, wait for the next chunk
+                        if end >= len(buffer):
+                            break  # can't tell yet whether the element is complete (e.g., a number)
+                        idx = end
+                        yield result
+            if in_results:
+                raise requests.exceptions.ChunkedEncodingError("Search API response ended before the end of its results")
+            # A complete response without results (e.g., no hits) is fine; anything else was cut off
+            try:
+                response_keys = json.loads(buffer)
+            except json.JSONDecodeError as error:
+                raise requests.exceptions.ChunkedEncodingError("Search API response ended before its results") from error
+            self._set_response_options(response_keys)
+            self._first_response = response_keys
+
+    @staticmethod
+    def _count_bytes(response: Any, timer: RequestTimer) -> Iterator[bytes]:
+        "Remaining chunks of a streamed response, counted in the request's metrics"
+        for chunk in response.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+            timer.bytes_received += len(chunk)
+            yield chunk
+
+    def _set_response_options(self, response: Dict) -> None:
+        "Set the results of request options (count, facets, explain_metadata) from a response"
+        if "total_count" in response:
+            self.count = response["total_count"]
+        if "explain_metadata" in response:
+            self.explain_metadata = response["explain_metadata"]
+        if "facets" in response:
+            self.facets = response["facets"]
+
+    def _cache_key(self) -> str:
+        "Key of this Session's request in the result cache"
+        if self._result_cache_key is None:
+            self._result_cache_key = canonical_request_key(self._make_params())
+        return self._result_cache_key
+
     def __iter__(self) -> Union[Iterator[str], Iterator]:
         "Generator for all results as a list of identifiers"
+        if self._cache is None:
+            yield from self._iter_results()
+            return
+
+        cached = self._cache.get(self._cache_key())
+        if (cached is not None) and (cached.get("results") is not None):
+            logger.debug("Using %s cached results", len(cached["results"]))
+            record_cache_hit("search", "page", self.url)
+            self.count = len(cached["results"])
+            self._set_response_options(cached["response"])
+            yield from cached["results"]
+            return
+
+        results = []
+        for result in self._iter_results():
+            results.append(result)
+            yield result
+        response = self._first_response if self._first_response is not None else {"total_count": len(results)}
+        self._cache.set(self._cache_key(), {"response": response, "result_key": self._result_key, "results": results})
+
+    def _iter_results(self) -> Iterator:
+        "Request and yield all results, either page by page or streamed in a single request"
+        if self._return_all_hits:
+            yield from self._stream_all_hits()
+            return
         start = 0
-        req_count = 0
         response = self._single_query(start=start)
         if response is None:
             return  # be explicit for mypy
         if "result_set" in response:
             result_set = response["result_set"]
         elif "group_set" in response:
+            self._result_key = "group_set"
             result_set = response["group_set"]
         else:
             result_set = []
+        self._first_response = {key: value for key, value in response.items() if key not in ("result_set", "group_set")}
         start += self.rows
         logger.debug("Got %s ids", len(result_set))
 
@@ -1773,10 +1984,6 @@ class Session(Iterable[str]):
             # If grouping is applied, result set could be lower than rows
             if not self._group_by:
                 assert len(result_set) == self.rows
-            req_count += 1
-            if req_count == config.SEARCH_API_REQUESTS_PER_SECOND:
-                time.sleep(1.2)  # This prevents the user from bottlenecking the server with requests.
-                req_count = 0
             response = self._single_query(start=start)
             assert isinstance(response, dict)
             if "result_set" in response:
@@ -1789,11 +1996,50 @@ class Session(Iterable[str]):
             start += self.rows
             yield from result_set
 
+    def export(self, sink: "RecordSink") -> int:
+        """Stream all results into a sink (e.g., :py:class:`rcsbapi.sinks.NDJSONSink` or :py:class:`rcsbapi.sinks.ParquetSink`)
+        page by page, without holding them in memory. The result cache isn't used. The sink isn't closed.
+
+        Compact results are written as `{"identifier": ...}` records, verbose results as returned by the Search API.
+
+        Returns:
+            int: number of results written
+        """
+        num_results = 0
+        for result in self._iter_results():
+            sink.write({"identifier": result} if isinstance(result, str) else result)
+            num_results += 1
+        return num_results
+
     def to_dict(self) -> Dict:
         """return full json response"""
+        if self._cache is not None:
+            cached = self._cache.get(self._cache_key())
+            if cached is not None:
+                record_cache_hit("search", "page", self.url, index=0)
+                return self._cached_response(cached)
         response = self._single_query()
         if not isinstance(response, Dict):
-            return {}
+            response = {}
+        if self._cache is not None:
+            # Only complete result lists are cached, since the cache key doesn't depend on rows.
+            # Responses without results (e.g., counts) are cached as they are.
+            result_key = next((key for key in ("result_set", "group_set") if key in response), None)
+            if result_key is None:
+                self._cache.set(self._cache_key(), copy.deepcopy({"response": response, "results": None}))
+            elif len(response[result_key]) >= response.get("total_count", 0):
+                options = {key: value for key, value in response.items() if key != result_key}
+                self._cache.set(self._cache_key(), copy.deepcopy({"response": options, "result_key": result_key, "results": response[result_key]}))
+        return response
+
+    def _cached_response(self, cached: Dict) -> Dict:
+        """Rebuild the first page of results for this Session from a cache entry.
+        Entries are copied, so changes made by the caller don't reach later cache hits.
+        """
+        response = copy.deepcopy(cached["response"])
+        results = cached.get("results")
+        if (results is not None) and response:
+            response[cached.get("result_key", "result_set")] = copy.deepcopy(results if self._return_all_hits else results[:self.rows])
         return response
 
     def iquery(self, limit: Optional[int] = None) -> List[str]:
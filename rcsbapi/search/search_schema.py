@@ -3,13 +3,14 @@
 Provides access to all valid attributes for search queries.
 """
 import os
-import json
 import logging
 from pathlib import Path
 import re
 import warnings
-from typing import List, Union
+from typing import Dict, List, Optional, Tuple, Union
 import requests
+from .. import json_codec
+from ..instrumentation import RequestTimer
 from ..const import const
 
 logger = logging.getLogger(__name__)
@@ -21,6 +22,8 @@ class SearchSchemaGroup:
     def __init__(self, attr_type):
         self.Attr = attr_type  # Attr or AttrLeaf
         self._members = {}  # Dictionary to store members
+        # Full attribute name -> search service, only set on the root group (see SearchSchema._make_schema_group)
+        self._attribute_types: Optional[Dict[str, Union[str, List[str]]]] = None
 
     def search(self, pattern: Union[str, re.Pattern], flags=0):
         """Find all attributes in the schema matching a regular expression.
@@ -107,6 +110,11 @@ class SearchSchemaGroup:
                 chemical search: "chem_text"
                 both: ["text", "chem_text"] (raises error later)
         """
+        if self._attribute_types is not None:
+            attr_type = self._attribute_types.get(attribute)
+            if attr_type is not None:
+                return attr_type
+        # Not a known leaf attribute: walk the schema to find out what's wrong with it
         split_attr = attribute.split(".")
         ptr = self  # dictionary of attributes
         for level in split_attr:
@@ -166,6 +174,7 @@ class SearchSchema:
         struct_attr_schema_file=os.path.join(const.SEARCH_API_SCHEMA_DIR, const.SEARCH_API_STRUCTURE_ATTRIBUTE_SCHEMA_FILENAME),
         chem_attr_schema_url=const.SEARCH_API_CHEMICAL_ATTRIBUTE_SCHEMA_URL,
         chem_attr_schema_file=os.path.join(const.SEARCH_API_SCHEMA_DIR, const.SEARCH_API_CHEMICAL_ATTRIBUTE_SCHEMA_FILENAME),
+        schemas: Optional[Tuple[Dict, Dict]] = None,
     ):
         """Initialize SearchSchema object with all known RCSB PDB attributes.
 
@@ -189,9 +198,14 @@ class SearchSchema:
 
             >>> list(search_attributes.search('rcsb.*stoichiometry'))
             [Attr(attribute='rcsb_struct_symmetry.stoichiometry')]a
+
+        If the structure and chemical attribute schemas were already requested, pass them as `schemas`
+        to build from them instead of fetching or loading them again.
         """
         self.Attr = attr_type
-        if reload:
+        if schemas is not None:
+            self.struct_schema, self.chem_schema = schemas
+        elif reload:
             self.struct_schema = self._reload_schema(struct_attr_schema_url, struct_attr_schema_file, refetch, use_fallback)
             self.chem_schema = self._reload_schema(chem_attr_schema_url, chem_attr_schema_file, refetch, use_fallback)
         self.search_attributes = self._make_schema_group()
@@ -208,23 +222,25 @@ class SearchSchema:
         schemas = [(self.struct_schema, const.STRUCTURE_ATTRIBUTE_SEARCH_SERVICE, ""), (self.chem_schema, const.CHEMICAL_ATTRIBUTE_SEARCH_SERVICE, "")]
         schema = self._make_group("", schemas)
         assert isinstance(schema, SearchSchemaGroup)  # for type checking
+        # Index leaf attributes once, so that looking up the search service of an attribute is a single dict lookup
+        schema._attribute_types = {attr.attribute: attr.type for attr in schema}
         return schema
 
     def _fetch_schema(self, url: str):
         "Request the current schema from the web"
         logger.info("Requesting %s", url)
-        response = requests.get(url, timeout=None)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            logger.debug("HTTP response status code %r", response.status_code)
-            return None
+        with RequestTimer("search", "schema", url) as timer:
+            response = timer.response = requests.get(url, timeout=None)
+            if response.status_code == 200:
+                return timer.decode(response)
+        logger.debug("HTTP response status code %r", response.status_code)
+        return None
 
     def _load_json_schema(self, schema_file):
         logger.info("Loading attribute schema from file")
         path = Path(__file__).parent.parent.joinpath(schema_file)
-        with open(path, "r", encoding="utf-8") as file:
-            latest = json.load(file)
+        with open(path, "rb") as file:
+            latest = json_codec.loads(file.read())
         return latest
 
     def _make_group(self, fullname: str, nodeL: List):
@@ -0,0 +1,214 @@
+"""Evaluate set operations on search results locally
+
+The Search API only supports AND, OR and negation of attribute terminals, so `a ^ b` is sent as
+`(a & ~b) | (~a & b)`, evaluating each side twice, and isn't possible at all for queries that can't be
+negated (e.g., sequence or structure similarity). A :py:class:`SetQuery` instead runs each distinct
+subquery once, keeps its results as a set of identifiers and combines the sets on the client.
+"""
+
+from __future__ import annotations
+import logging
+from array import array
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Literal, Optional, Tuple, Union
+
+from ..id_codec import ID_CODEC, IdSet
+from .bulk_search import BulkSession
+from .search_cache import SearchCache, canonical_request_key
+from .search_query import ReturnContentType, ReturnType, SearchQuery, Session
+
+logger = logging.getLogger(__name__)
+
+SetOperator = Literal["query", "and", "or", "difference", "xor"]
+
+SET_CACHE = SearchCache(max_entries=256)
+"""Cache of subquery results used by :py:meth:`SetQuery.exec`: lists of identifiers, or IdSets for `compact=True`"""
+
+
+@dataclass(frozen=True)
+class SetQuery:
+    """Set expression over search queries, evaluated on the client.
+
+    Wrap queries with :py:meth:`SetQuery.of` (or combine a SetQuery with plain queries) and combine them with
+    `&` (intersection), `|` (union), `-` (difference) and `^` (symmetric difference).
+    Each distinct subquery is sent to the Search API once, concurrently with the others, and identical
+    subexpressions are only evaluated once.
+
+    Example:
+        >>> seq = SetQuery.of(SeqSimilarityQuery("MTEYKLVVVGAGGVGKSALTIQLIQ..."))
+        >>> struct = StructSimilarityQuery(entry_id="4HHB")
+        >>> xray = AttributeQuery("exptl.method", "exact_match", "X-RAY DIFFRACTION")
+        >>> ids = ((seq ^ struct) - xray).exec()
+    """
+
+    operator: SetOperator
+    nodes: Tuple[Union[SearchQuery, "SetQuery"], ...]
+
+    @staticmethod
+    def of(query: Union[SearchQuery, "SetQuery"]) -> "SetQuery":
+        """Wrap a query so that it can be combined locally"""
+        if isinstance(query, SetQuery):
+            return query
+        if not isinstance(query, SearchQuery):
+            raise TypeError(f"Expected SearchQuery or SetQuery, got {type(query)}")
+        return SetQuery("query", (query,))
+
+    def _combine(self, operator: SetOperator, other: Union[SearchQuery, "SetQuery"]) -> "SetQuery":
+        other = SetQuery.of(other)
+        # Flatten associative operators
+        nodes: List[Union[SearchQuery, SetQuery]] = []
+        for node in (self, other):
+            if node.operator == operator and operator in ("and", "or"):
+                nodes.extend(node.nodes)
+            else:
+                nodes.append(node)
+        return SetQuery(operator, tuple(nodes))
+
+    def __and__(self, other: Union[SearchQuery, "SetQuery"]) -> "SetQuery":
+        """Intersection: `a & b`"""
+        return self._combine("and", other)
+
+    def __or__(self, other: Union[SearchQuery, "SetQuery"]) -> "SetQuery":
+        """Union: `a | b`"""
+        return self._combine("or", other)
+
+    def __sub__(self, other: Union[SearchQuery, "SetQuery"]) -> "SetQuery":
+        """Difference: `a - b`"""
+        return self._combine("difference", other)
+
+    def __xor__(self, other: Union[SearchQuery, "SetQuery"]) -> "SetQuery":
+        """Symmetric difference: `a ^ b`"""
+        return self._combine("xor", other)
+
+    def __rand__(self, other: SearchQuery) -> "SetQuery":
+        return SetQuery.of(other) & self
+
+    def __ror__(self, other: SearchQuery) -> "SetQuery":
+        return SetQuery.of(other) | self
+
+    def __rsub__(self, other: SearchQuery) -> "SetQuery":
+        return SetQuery.of(other) - self
+
+    def __rxor__(self, other: SearchQuery) -> "SetQuery":
+        return SetQuery.of(other) ^ self
+
+    def queries(self) -> List[SearchQuery]:
+        """All search queries in this expression, in order of appearance (including duplicates)"""
+        found: List[SearchQuery] = []
+        for node in self.nodes:
+            if isinstance(node, SetQuery):
+                found.extend(node.queries())
+            else:
+                found.append(node)
+        return found
+
+    def exec(  # pylint: disable=dangerous-default-value
+        self,
+        return_type: ReturnType = "entry",
+        rows: int = 10000,
+        return_content_type: List[ReturnContentType] = ["experimental"],
+        workers: Optional[int] = None,
+        cache: Optional[SearchCache] = SET_CACHE,
+        compact: bool = False,
+    ) -> Union[FrozenSet[str], IdSet]:
+        """Run each distinct subquery once and evaluate the expression locally
+
+        Args:
+            return_type (ReturnType, optional): type of the returned identifiers. Defaults to "entry".
+            rows (int, optional): page size used to fetch each subquery's results. Defaults to 10000.
+            return_content_type (List[ReturnContentType], optional): experimental and/or computational models.
+                Defaults to ["experimental"].
+            workers (Optional[int], optional): number of concurrent requests. Defaults to `config.SEARCH_API_MAX_WORKERS`.
+            cache (Optional[SearchCache], optional): cache of subquery results, keyed by the canonical request.
+                Set to None to always run every subquery.
+            compact (bool, optional): hold subquery results and the returned set as an :py:class:`IdSet` of
+                integer-encoded identifiers, which uses far less memory for large result sets. Defaults to False.
+
+        Raises:
+            Exception: the first error raised by a subquery
+
+        Returns:
+            Union[FrozenSet[str], IdSet]: identifiers matching the expression
+        """
+        # Run every distinct, uncached subquery once
+        sessions: Dict[str, Session] = {}
+        keys: Dict[int, str] = {}
+        for query in self.queries():
+            if id(query) in keys:
+                continue
+            session = Session(query, return_type=return_type, rows=rows, return_content_type=return_content_type)
+            key = canonical_request_key(session._make_params())
+            keys[id(query)] = key
+            sessions.setdefault(key, session)
+
+        to_set = IdSet if compact else frozenset
+        results: Dict[str, Union[FrozenSet[str], IdSet]] = {}
+        to_request: List[str] = []
+        for key in sessions:
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                results[key] = cached if compact and isinstance(cached, IdSet) else to_set(cached)
+            else:
+                to_request.append(key)
+
+        logger.debug("Running %d of %d distinct subqueries", len(to_request), len(sessions))
+        if to_request:
+            bulk = BulkSession([sessions[key] for key in to_request], workers=workers)
+            if compact:
+                # Encode identifiers as they arrive, so no subquery's results are ever held as strings
+                codes = [array("q") for _ in to_request]
+                for query_idx, identifier in bulk:
+                    codes[query_idx].append(ID_CODEC.encode(identifier))
+            else:
+                identifiers: List[List[str]] = [[] for _ in to_request]
+                for query_idx, identifier in bulk:
+                    identifiers[query_idx].append(identifier)
+            if bulk.errors:
+                raise bulk.errors[min(bulk.errors)]
+            for idx, key in enumerate(to_request):
+                results[key] = IdSet.from_codes(codes[idx]) if compact else frozenset(identifiers[idx])
+                if cache is not None:
+                    cache.set(key, results[key] if compact else identifiers[idx])
+
+        return self._evaluate(keys, results, {})[1]
+
+    def _evaluate(
+        self,
+        keys: Dict[int, str],
+        results: Dict[str, Union[FrozenSet[str], IdSet]],
+        memo: Dict[Tuple, Union[FrozenSet[str], IdSet]],
+    ) -> Tuple[Tuple, Union[FrozenSet[str], IdSet]]:
+        """Evaluate this expression, reusing results of structurally identical subexpressions
+
+        Returns:
+            Tuple[Tuple, Union[FrozenSet[str], IdSet]]: structural key of this expression and its result
+        """
+        evaluated = [node._evaluate(keys, results, memo) if isinstance(node, SetQuery) else ((keys[id(node)],), results[keys[id(node)]]) for node in self.nodes]
+        node_keys = [node_key for node_key, _ in evaluated]
+        if self.operator in ("and", "or"):
+            node_keys.sort()  # commutative
+        key = (self.operator, *node_keys)
+        if key in memo:
+            return key, memo[key]
+
+        operands = [operand for _, operand in evaluated]
+        if self.operator == "query":
+            result = operands[0]
+        elif self.operator == "and":
+            # Intersect starting with the smallest set
+            operands.sort(key=len)
+            result = operands[0].intersection(*operands[1:])
+        elif self.operator == "or":
+            result = operands[0].union(*operands[1:])
+        elif self.operator == "difference":
+            result = operands[0].difference(*operands[1:])
+        elif self.operator == "xor":
+            result = operands[0].symmetric_difference(operands[1])
+        else:
+            raise ValueError(f"Unknown set operator: {self.operator}")
+        memo[key] = result
+        return key, result
+
+    def __call__(self, *args, **kwargs) -> Union[FrozenSet[str], IdSet]:
+        """Evaluate this expression. Arguments are the same as for :py:meth:`SetQuery.exec`"""
+        return self.exec(*args, **kwargs)
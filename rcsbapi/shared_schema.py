@@ -0,0 +1,117 @@
+"""
+Share compiled schemas between worker processes
+
+Importing `rcsbapi.data` or `rcsbapi.search` fetches and compiles a schema, so every worker
+process of a pool normally repeats this work and holds its own copy. Two ways to do it once:
+
+* Fork-based workers (e.g., `multiprocessing` with the "fork" start method, gunicorn `--preload`):
+  call :py:func:`preload` in the parent before forking. The schemas are compiled, everything that's
+  otherwise built lazily is built, and the objects are moved out of reach of the garbage collector
+  (`gc.freeze()`), so children share the parent's memory pages instead of copying them.
+
+* Spawned workers: call :py:func:`save` once, then :py:func:`attach` in each worker before it imports
+  `rcsbapi.data` or `rcsbapi.search`. The compiled schemas are then loaded from the file instead of being
+  fetched and built. Each worker still holds its own copy.
+
+Example:
+    import multiprocessing
+    from rcsbapi import shared_schema
+
+    shared_schema.save("/tmp/rcsbapi-schemas.pickle")
+    with multiprocessing.get_context("spawn").Pool(32, shared_schema.attach, ("/tmp/rcsbapi-schemas.pickle",)) as pool:
+        ...
+
+Schema files are pickles, so only attach files you created. A file saved by another version of rcsb-api is ignored.
+"""
+import gc
+import logging
+import os
+import pickle
+import sys
+from typing import Any, Dict, Optional
+
+from . import __version__
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+_SUBPACKAGES = {"data": "rcsbapi.data", "search": "rcsbapi.search"}
+
+_attached: Dict[str, bytes] = {}
+"""pickled schemas attached from a file, by subpackage, until the subpackage is imported"""
+
+
+def preload(data: bool = True, search: bool = True) -> None:
+    """Compile the schemas in this process and freeze them, so that forked children share them copy-on-write
+
+    Call it in the parent process after any configuration changes and before forking workers.
+
+    Args:
+        data (bool, optional): compile the Data API schema. Defaults to True.
+        search (bool, optional): compile the Search API schema. Defaults to True.
+    """
+    if data:
+        from .data import DATA_SCHEMA  # pylint: disable=import-outside-toplevel
+
+        DATA_SCHEMA.build_path_index()
+        if config.DATA_API_VALIDATE_QUERIES:
+            # Otherwise every child would build its own copy on its first query
+            DATA_SCHEMA._client_schema  # pylint: disable=pointless-statement,protected-access
+    if search:
+        import rcsbapi.search  # noqa: F401  # pylint: disable=import-outside-toplevel,unused-import
+    gc.collect()
+    gc.freeze()
+
+
+def save(path: str, data: bool = True, search: bool = True) -> None:
+    """Compile the schemas and save them to a file that worker processes can :py:func:`attach`
+
+    Args:
+        path (str): file to write. It's replaced atomically, so running workers can keep attaching to it.
+        data (bool, optional): include the Data API schema. Defaults to True.
+        search (bool, optional): include the Search API schema. Defaults to True.
+    """
+    sections: Dict[str, Any] = {"version": __version__}
+    if data:
+        from .data import DATA_SCHEMA  # pylint: disable=import-outside-toplevel
+
+        DATA_SCHEMA.build_path_index()
+        sections["data"] = pickle.dumps(DATA_SCHEMA, protocol=pickle.HIGHEST_PROTOCOL)
+    if search:
+        from .search import SEARCH_SCHEMA  # pylint: disable=import-outside-toplevel
+
+        sections["search"] = pickle.dumps(SEARCH_SCHEMA, protocol=pickle.HIGHEST_PROTOCOL)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        pickle.dump(sections, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+
+def attach(path: str) -> None:
+    """Use the schemas saved in a file by :py:func:`save` instead of fetching and compiling them
+
+    Must be called before `rcsbapi.data` or `rcsbapi.search` is imported (e.g., as a pool initializer).
+
+    Args:
+        path (str): file written by :py:func:`save`
+    """
+    with open(path, "rb") as file:
+        sections = pickle.load(file)
+    if sections.get("version") != __version__:
+        logger.warning("Ignoring schema file %s, saved by rcsb-api %s (this is %s)", path, sections.get("version"), __version__)
+        return
+    for name, module in _SUBPACKAGES.items():
+        if name not in sections:
+            continue
+        if module in sys.modules:
+            logger.warning("%s was imported before attaching %s, so its schema isn't replaced", module, path)
+            continue
+        _attached[name] = sections[name]
+
+
+def attached(name: str) -> Optional[Any]:
+    """Schema attached for a subpackage ("data" or "search"), if any. Called once, when the subpackage is imported."""
+    pickled = _attached.pop(name, None)
+    if pickled is None:
+        return None
+    return pickle.loads(pickled)
@@ -0,0 +1,200 @@
+"""
+Stream query results to files
+
+A sink writes records to disk in batches as they arrive, so exports of millions of records run in
+constant memory instead of building the full response first. :py:meth:`DataQuery.export` and
+:py:meth:`Session.export` stream into any sink.
+
+Example:
+    from rcsbapi.data import DataQuery
+    from rcsbapi.sinks import ParquetSink
+
+    query = DataQuery("entries", entry_ids, ["exptl.method", "rcsb_entry_info.resolution_combined"])
+    with ParquetSink("entries.parquet", flush_size=10000) as sink:
+        query.export(sink)
+
+Parquet output requires pyarrow (`pip install pyarrow`).
+"""
+from __future__ import annotations
+import bz2
+import gzip
+import logging
+import lzma
+import os
+from abc import ABC, abstractmethod
+from typing import IO, Any, Dict, Iterable, List, Literal, Optional, Union
+
+from . import json_codec
+
+logger = logging.getLogger(__name__)
+
+NDJSONCompression = Literal["gzip", "bz2", "xz"]
+
+_OPENERS = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+
+
+class RecordSink(ABC):
+    """Base class of sinks. Buffers records and writes them out every `flush_size` records.
+
+    Sinks are context managers; leaving the `with` block flushes the remaining records and closes the file.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], flush_size: int):
+        """
+        Args:
+            path (Union[str, os.PathLike]): output file
+            flush_size (int): number of records buffered before they are written out
+        """
+        if flush_size < 1:
+            raise ValueError(f"flush_size must be positive, got {flush_size}")
+        self.path = path
+        self.flush_size = flush_size
+        self.num_records = 0
+        """Number of records written so far (including buffered records)"""
+        self._buffer: List[Dict[str, Any]] = []
+        self._closed = False
+
+    def set_columns(self, columns: List[Any], explode: Optional[str] = None) -> None:  # pylint: disable=unused-argument
+        """Called by producers that know the column layout of their records before writing them.
+
+        Args:
+            columns (List[ColumnPlan]): columns planned from the query (see :py:func:`rcsbapi.data.data_table.plan_columns`)
+            explode (Optional[str], optional): dot-separated path of a list field to expand into one row per element
+        """
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Add a record, writing out the buffer once it holds `flush_size` records"""
+        if self._closed:
+            raise ValueError(f"Sink for {self.path} is closed")
+        self._buffer.append(record)
+        self.num_records += 1
+        if len(self._buffer) >= self.flush_size:
+            self.flush()
+
+    def write_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.write(record)
+
+    def flush(self) -> None:
+        """Write out buffered records"""
+        if self._buffer:
+            batch, self._buffer = self._buffer, []
+            self._write_batch(batch)
+
+    def close(self) -> None:
+        """Flush remaining records and close the file"""
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._closed = True
+            self._close()
+        logger.debug("Wrote %d records to %s", self.num_records, self.path)
+
+    @abstractmethod
+    def _write_batch(self, records: List[Dict[str, Any]]) -> None:
+        """Write out a batch of records"""
+
+    @abstractmethod
+    def _close(self) -> None:
+        """Close the file"""
+
+    def __enter__(self) -> "RecordSink":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class NDJSONSink(RecordSink):
+    """Write records as newline-delimited JSON, one record per line"""
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        flush_size: int = 1000,
+        compression: Optional[NDJSONCompression] = None,
+    ):
+        """
+        Args:
+            path (Union[str, os.PathLike]): output file
+            flush_size (int, optional): number of records buffered before they are written out. Defaults to 1000.
+            compression (Optional[NDJSONCompression], optional): "gzip", "bz2" or "xz". Defaults to None (uncompressed).
+        """
+        super().__init__(path, flush_size)
+        if (compression is not None) and (compression not in _OPENERS):
+            raise ValueError(f'Unsupported compression "{compression}". Use one of: {", ".join(_OPENERS)}')
+        opener = _OPENERS[compression] if compression is not None else open
+        self._file: IO[str] = opener(path, "wt", encoding="utf-8")
+
+    def _write_batch(self, records: List[Dict[str, Any]]) -> None:
+        self._file.write("".join(json_codec.dumps(record) + "\n" for record in records))
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class ParquetSink(RecordSink):
+    """Write records to a Parquet file, one row group per flush.
+
+    If the producer sets the column layout (as :py:meth:`DataQuery.export` does), nested records are flattened
+    into one column per requested field, typed from the schema, as for :py:meth:`DataQuery.to_table`.
+    Otherwise columns are the top-level keys of the records, with types inferred from the first row group.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        flush_size: int = 10000,
+        compression: str = "snappy",
+        explode: Optional[str] = None,
+    ):
+        """
+        Args:
+            path (Union[str, os.PathLike]): output file
+            flush_size (int, optional): number of records per row group. Defaults to 10000.
+            compression (str, optional): Parquet compression codec (e.g., "snappy", "zstd", "gzip", "none"). Defaults to "snappy".
+            explode (Optional[str], optional): dot-separated path of a list field (e.g., "polymer_entities") to
+                expand into one row per element. Only used with a column layout. Defaults to None.
+        """
+        try:
+            import pyarrow.parquet  # type: ignore  # noqa: F401  # pylint: disable=import-outside-toplevel,unused-import
+        except ImportError as error:
+            raise ImportError("ParquetSink requires pyarrow. Install it with `pip install pyarrow`.") from error
+        super().__init__(path, flush_size)
+        self.compression = compression
+        self.explode = explode
+        self._columns: Optional[List[Any]] = None
+        self._writer: Any = None
+
+    def set_columns(self, columns: List[Any], explode: Optional[str] = None) -> None:
+        if self._writer is not None:
+            raise ValueError("Columns must be set before the first row group is written")
+        self._columns = columns
+        if explode is not None:
+            self.explode = explode
+
+    def _write_batch(self, records: List[Dict[str, Any]]) -> None:
+        import pyarrow as pa  # type: ignore  # pylint: disable=import-outside-toplevel
+        import pyarrow.parquet as pq  # type: ignore  # pylint: disable=import-outside-toplevel
+
+        if self._columns is not None:
+            from .data.data_table import to_arrow  # pylint: disable=import-outside-toplevel
+            table = to_arrow(records, self._columns, self.explode)
+        else:
+            table = pa.Table.from_pylist(records, schema=self._writer.schema if self._writer is not None else None)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression=self.compression)
+        self._writer.write_table(table, row_group_size=max(self.flush_size, table.num_rows))
+
+    def _close(self) -> None:
+        if self._writer is None:
+            if self._columns is None:
+                logger.warning("No records written to %s", self.path)
+                return
+            # Write an empty file with the planned schema
+            from .data.data_table import to_arrow  # pylint: disable=import-outside-toplevel
+            import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+            self._writer = pq.ParquetWriter(self.path, to_arrow([], self._columns, self.explode).schema, compression=self.compression)
+        self._writer.close()
@@ -55,7 +55,7 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Typing :: Typed",
     ],
-    entry_points={"console_scripts": []},
+    entry_points={"console_scripts": ["rcsbapi=rcsbapi.cli:main"]},
     #
     install_requires=packagesRequired,
     packages=find_packages(exclude=["tests", "tests-*", "tests.*"]),
@@ -0,0 +1,109 @@
+##
+# File:    test_cli.py
+# Author:
+# Date:
+# Version:
+#
+# Update:
+#
+#
+##
+"""
+Tests for the command-line interface.
+"""
+
+__docformat__ = "google en"
+__author__ = ""
+__email__ = ""
+__license__ = ""
+
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import resource
+import tempfile
+import time
+import unittest
+import unittest.mock
+
+from rcsbapi.cli import main
+from rcsbapi.config import config
+from rcsbapi.data import DataQuery
+from rcsbapi.search.search_query import Session
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def fakeFetchBatch(idBatch, index=None):  # pylint: disable=unused-argument
+    return [{"rcsb_id": inputId, "exptl": [{"method": "X-RAY DIFFRACTION"}]} for inputId in idBatch]
+
+
+class CliTests(unittest.TestCase):
+    def setUp(self):
+        self.__startTime = time.time()
+        logger.info("Starting %s at %s", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()))
+        self.__tempDir = tempfile.TemporaryDirectory()
+        self.__rateLimits = (config.DATA_API_REQUESTS_PER_SECOND, config.SEARCH_API_REQUESTS_PER_SECOND)
+
+    def tearDown(self):
+        config.DATA_API_REQUESTS_PER_SECOND, config.SEARCH_API_REQUESTS_PER_SECOND = self.__rateLimits
+        self.__tempDir.cleanup()
+        unitS = "MB" if platform.system() == "Darwin" else "GB"
+        rusageMax = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        logger.info("Maximum resident memory size %.4f %s", rusageMax / 10**6, unitS)
+        endTime = time.time()
+        logger.info("Completed %s at %s (%.4f seconds)", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()), endTime - self.__startTime)
+
+    def testDataExport(self):
+        idPath = os.path.join(self.__tempDir.name, "ids.txt")
+        outPath = os.path.join(self.__tempDir.name, "entries.ndjson")
+        inputIds = [f"{i % 10}A{i // 10:02d}" for i in range(60)]
+        with open(idPath, "w", encoding="utf-8") as file:
+            file.write("# entry ids\n\n" + "\n".join(inputIds) + "\n")
+        argv = ["data", "entries", "-i", idPath, "-f", "exptl.method", "-o", outPath, "--workers", "2", "--batch-size", "25", "--rate-limit", "0"]
+        with unittest.mock.patch.object(DataQuery, "_fetch_batch", side_effect=fakeFetchBatch) as fetchBatch:
+            with self.subTest(msg="1. NDJSON export"):
+                self.assertEqual(main(argv), 0)
+                self.assertEqual(fetchBatch.call_count, 3)
+                self.assertEqual(config.DATA_API_REQUESTS_PER_SECOND, 0)
+                with open(outPath, encoding="utf-8") as file:
+                    self.assertEqual(sorted(json.loads(line)["rcsb_id"] for line in file), sorted(inputIds))
+                self.assertFalse(os.path.exists(outPath + ".journal"))
+            with self.subTest(msg="2. Resumed export of a finished job"):
+                self.assertEqual(main(argv + ["--resume"]), 0)
+                fetchBatch.reset_mock()
+                self.assertEqual(main(argv + ["--resume"]), 0)
+                self.assertEqual(fetchBatch.call_count, 0)
+            with self.subTest(msg="3. Invalid options"):
+                with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                    main(argv + ["--compression", "zstd"])
+
+    def testSearchIds(self):
+        outPath = os.path.join(self.__tempDir.name, "ids.txt")
+        pages = [{"total_count": 3, "result_set": ["4HHB", "1STP"]}, {"total_count": 3, "result_set": ["2GS2"]}]
+        with unittest.mock.patch.object(Session, "_single_query", side_effect=pages):
+            argv = ["search", "--where", "exptl.method", "exact_match", "X-RAY DIFFRACTION", "--where", "rcsb_entry_info.resolution_combined", "less", "2.0"]
+            argv += ["--rows", "2", "-o", outPath]
+            self.assertEqual(main(argv), 0)
+        with open(outPath, encoding="utf-8") as file:
+            self.assertEqual(file.read().split(), ["4HHB", "1STP", "2GS2"])
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main(["search"])
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main(["search", "hemoglobin", "--format", "ndjson", "-o", outPath, "--cache-dir", self.__tempDir.name])
+
+
+def buildCli():
+    suiteSelect = unittest.TestSuite()
+    suiteSelect.addTest(CliTests("testDataExport"))
+    suiteSelect.addTest(CliTests("testSearchIds"))
+    return suiteSelect
+
+
+if __name__ == "__main__":
+    mySuite = buildCli()
+    unittest.TextTestRunner(verbosity=2).run(mySuite)
@@ -17,17 +17,22 @@ __author__ = ""
 __email__ = ""
 __license__ = ""
 
+import json
 import logging
+import os
+import tempfile
 
 # import importlib
 # import platform
 # import resource
 import time
 import unittest
+import unittest.mock
 import requests
 
 from rcsbapi.search import search_attributes as attrs
-from rcsbapi.data import DataSchema, DataQuery
+from rcsbapi.data import DataSchema, DataQuery, DataQueryJob, DATA_SCHEMA, query_profile
+from rcsbapi.data.data_table import build_columns, plan_columns
 from rcsbapi.config import config
 from rcsbapi.const import const
 
@@ -110,6 +115,138 @@ class QueryTests(unittest.TestCase):
             total_ids += len_id_batch
         self.assertEqual(len(query_obj.get_input_ids()), total_ids)
 
+    def testQueryProfile(self):
+        query_obj = DataQuery(input_type="entries", input_ids=["4HHB"], return_data_list=["exptl.method"])
+        self.assertIsNone(query_obj.get_profile())
+        query_profile.PROFILE_STATS.reset()
+        with unittest.mock.patch.object(config, "DATA_QUERY_PROFILING", True):
+            query_obj = DataQuery(input_type="entries", input_ids=["4HHB", "1STP"], return_data_list=["exptl.method", "polymer_entities.rcsb_id"])
+            with self.assertRaises(ValueError):
+                DataQuery(input_type="entries", input_ids=["4HHB"], return_data_list=["id"])
+        profile = query_obj.get_profile()
+        self.assertEqual(profile.input_type, "entries")
+        self.assertEqual(set(profile.fields), {"entries.rcsb_id", "exptl.method", "polymer_entities.rcsb_id"})
+        for phase in ["find_paths", "get_descendant_fields", "recurse_fields", "graphql_parse", "graphql_validate"]:
+            self.assertIn(phase, profile.phases)
+        self.assertEqual(profile.calls["find_paths"], 3)
+        self.assertGreater(profile.counts["simple_paths"], 0)
+        self.assertLessEqual(sum(profile.phases.values()), profile.total)
+        self.assertIn("graphql_validate", profile.report())
+
+        stats = query_profile.PROFILE_STATS.summary()
+        self.assertEqual(stats["queries"], 2)
+        self.assertEqual(stats["errors"], 1)
+        topFields = query_profile.PROFILE_STATS.top_fields(10)
+        self.assertIn("entries.exptl.method", [key for key, _ in topFields])
+        self.assertIn("entries.id", [key for key, _ in topFields])
+
+    def testToTable(self):
+        query_obj = DataQuery(
+            input_type="entries",
+            input_ids=["4HHB", "1STP"],
+            return_data_list=["exptl.method", "polymer_entities.rcsb_id", "polymer_entities.entity_poly.rcsb_sample_sequence_length"]
+        )
+        query_obj._response = {
+            "data": {
+                "entries": [
+                    {
+                        "rcsb_id": "4HHB",
+                        "exptl": [{"method": "X-RAY DIFFRACTION"}],
+                        "polymer_entities": [
+                            {"rcsb_id": "4HHB_1", "entity_poly": {"rcsb_sample_sequence_length": 141}},
+                            {"rcsb_id": "4HHB_2", "entity_poly": {"rcsb_sample_sequence_length": 146}},
+                        ],
+                    },
+                    {"rcsb_id": "1STP", "exptl": [{"method": "X-RAY DIFFRACTION"}], "polymer_entities": []},
+                ]
+            }
+        }
+        columns = plan_columns(query_obj.get_query(), "entries", DATA_SCHEMA._client_schema)
+        with self.subTest(msg="1. Plan columns from schema"):
+            self.assertEqual(
+                [(column.name, column.scalar) for column in columns],
+                [
+                    ("rcsb_id", "String"),
+                    ("exptl.method", "String"),
+                    ("polymer_entities.rcsb_id", "String"),
+                    ("polymer_entities.entity_poly.rcsb_sample_sequence_length", "Int"),
+                ]
+            )
+            self.assertEqual(columns[2].lists, (True, False))
+            self.assertEqual(query_obj.get_columns(), columns)
+        with self.subTest(msg="2. Build list columns"):
+            data = build_columns(query_obj._records(), columns)
+            self.assertEqual(data["polymer_entities.rcsb_id"], [["4HHB_1", "4HHB_2"], []])
+            self.assertEqual(data["exptl.method"], [["X-RAY DIFFRACTION"], ["X-RAY DIFFRACTION"]])
+        with self.subTest(msg="3. Explode lists into rows"):
+            data = build_columns(query_obj._records(), columns, explode="polymer_entities")
+            self.assertEqual(data["rcsb_id"], ["4HHB", "4HHB", "1STP"])
+            self.assertEqual(data["polymer_entities.rcsb_id"], ["4HHB_1", "4HHB_2", None])
+            self.assertEqual(data["polymer_entities.entity_poly.rcsb_sample_sequence_length"], [141, 146, None])
+            with self.assertRaises(ValueError):
+                build_columns(query_obj._records(), columns, explode="exptl.method")
+        with self.subTest(msg="4. Arrow table"):
+            try:
+                import pyarrow  # pylint: disable=import-outside-toplevel
+            except ImportError:
+                self.skipTest("pyarrow not installed")
+            table = query_obj.to_table(explode="polymer_entities")
+            self.assertEqual(table.num_rows, 3)
+            self.assertEqual(table.schema.field("polymer_entities.entity_poly.rcsb_sample_sequence_length").type, pyarrow.int64())
+            self.assertEqual(table.schema.field("exptl.method").type, pyarrow.list_(pyarrow.string()))
+
+    def testResumableJob(self):
+        input_ids = [f"{i % 10}A{i // 10:02d}" for i in range(120)]
+        query_obj = DataQuery(input_type="entries", input_ids=input_ids, return_data_list=["exptl.method"])
+        requested = []
+
+        def fetch_batch(id_batch, index=None):  # pylint: disable=unused-argument
+            requested.append(id_batch)
+            if id_batch[0] == "0A10":
+                raise ConnectionError("network dropped")
+            return [{"rcsb_id": input_id} for input_id in id_batch]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, "entries.ndjson")
+            job = DataQueryJob(query_obj, output_path, batch_size=20, workers=1)
+            self.assertEqual(job.num_batches, 6)
+            with unittest.mock.patch.object(query_obj, "_fetch_batch", side_effect=fetch_batch):
+                with self.subTest(msg="1. Interrupted run"):
+                    with self.assertRaises(ConnectionError):
+                        job.run()
+                    self.assertEqual(job.completed_batches(), {0, 1, 2, 3, 4})
+                    # Simulate a partially written batch from a killed process
+                    with open(output_path, "a", encoding="utf-8") as file:
+                        file.write('{"rcsb_id": "0A1')
+                with self.subTest(msg="2. Resume"):
+                    requested.clear()
+                    fetch_batch_retry = unittest.mock.Mock(side_effect=lambda id_batch, index=None: [{"rcsb_id": input_id} for input_id in id_batch])
+                    with unittest.mock.patch.object(query_obj, "_fetch_batch", fetch_batch_retry):
+                        self.assertEqual(job.run(), 120)
+                    self.assertEqual(fetch_batch_retry.call_count, 1)
+                    with open(output_path, encoding="utf-8") as file:
+                        records = [json.loads(line) for line in file]
+                    self.assertEqual(sorted(record["rcsb_id"] for record in records), sorted(input_ids))
+                with self.subTest(msg="3. Finished job is a no-op"):
+                    requested.clear()
+                    self.assertEqual(job.run(), 120)
+                    self.assertEqual(requested, [])
+                with self.subTest(msg="4. Journal of a different job"):
+                    other_query = DataQuery(input_type="entries", input_ids=input_ids[:10], return_data_list=["exptl.method"])
+                    with self.assertRaises(ValueError):
+                        DataQueryJob(other_query, output_path, journal_path=job.journal_path).run()
+                with self.subTest(msg="5. Output deleted, journal kept"):
+                    os.remove(output_path)
+                    with self.assertRaises(ValueError):
+                        job.run()
+                    self.assertFalse(os.path.exists(output_path))
+                    os.remove(job.journal_path)
+                    with unittest.mock.patch.object(query_obj, "_fetch_batch", fetch_batch_retry):
+                        self.assertEqual(job.run(), 120)
+                    self.assertEqual(fetch_batch_retry.call_count, 7)
+                    with open(output_path, encoding="utf-8") as file:
+                        self.assertEqual(sorted(json.loads(line)["rcsb_id"] for line in file), sorted(input_ids))
+
     def testMergeResponse(self):
         # assert that the lengths are combined and all ids are present?
         pass
@@ -435,6 +572,9 @@ def buildQuery():
     suiteSelect.addTest(QueryTests("testExec"))
     suiteSelect.addTest(QueryTests("testLowercaseIds"))
     suiteSelect.addTest(QueryTests("testBatchIDs"))
+    suiteSelect.addTest(QueryTests("testQueryProfile"))
+    suiteSelect.addTest(QueryTests("testToTable"))
+    suiteSelect.addTest(QueryTests("testResumableJob"))
     suiteSelect.addTest(QueryTests("testDocs"))
     suiteSelect.addTest(QueryTests("testAddExamples"))
     suiteSelect.addTest(QueryTests("testQuickstartNotebook"))
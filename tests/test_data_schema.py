@@ -24,12 +24,16 @@ import logging
 import time
 import json
 import os
+import sys
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 import requests
-# import rustworkx as rx
+import rustworkx as rx
 # import networkx as nx
 
-from rcsbapi.data import DATA_SCHEMA
+from rcsbapi.data import DATA_SCHEMA, DataSchema
+from rcsbapi.data import data_schema
+from rcsbapi.data.data_schema import DataFieldNode
 from rcsbapi.config import config
 from rcsbapi.const import const
 
@@ -165,6 +169,110 @@ class SchemaTests(unittest.TestCase):
             with self.assertRaises(ValueError):
                 DATA_SCHEMA.construct_query(input_ids=["4HHB", "1IYE"], input_type="entry", return_data_list=["id"])
 
+    def testLazyClientSchema(self):
+        schema = DataSchema()
+        with self.subTest(msg="1. not built on initialization or path finding"):
+            schema.find_paths("entries", "exptl")
+            self.assertIsNone(schema._lazy_client_schema)
+        with self.subTest(msg="2. not built when validation is turned off"):
+            config.DATA_API_VALIDATE_QUERIES = False
+            try:
+                unvalidated = schema.construct_query(input_ids=["4HHB"], input_type="entries", return_data_list=["exptl.method"])
+            finally:
+                config.DATA_API_VALIDATE_QUERIES = True
+            self.assertIsNone(schema._lazy_client_schema)
+        with self.subTest(msg="3. built by the first validated query, then reused"):
+            validated = schema.construct_query(input_ids=["4HHB"], input_type="entries", return_data_list=["exptl.method"])
+            self.assertEqual(validated, unvalidated)
+            client_schema = schema._lazy_client_schema
+            self.assertIsNotNone(client_schema)
+            self.assertIs(schema._client_schema, client_schema)
+
+    def testCompactSchema(self):
+        compact_schema = DataSchema(compact=True)
+        with self.subTest(msg="1. construction data is released"):
+            self.assertIsNone(compact_schema._raw_schema)
+            self.assertIsNone(compact_schema._description_index)
+            self.assertEqual(compact_schema._type_fields_dict, {})
+            self.assertEqual(compact_schema.schema["data"]["__schema"]["queryType"], DATA_SCHEMA.schema["data"]["__schema"]["queryType"])
+        with self.subTest(msg="2. same paths and queries as the full schema"):
+            self.assertEqual(compact_schema.find_paths("entries", "id"), DATA_SCHEMA.find_paths("entries", "id"))
+            self.assertEqual(
+                compact_schema.construct_query(input_ids=["4HHB"], input_type="entries", return_data_list=["exptl.method", "polymer_entities.rcsb_id"]),
+                DATA_SCHEMA.construct_query(input_ids=["4HHB"], input_type="entries", return_data_list=["exptl.method", "polymer_entities.rcsb_id"]),
+            )
+        with self.subTest(msg="3. descriptions are loaded on demand"):
+            self.assertEqual(
+                compact_schema.find_paths("entries", "nonpolymer_comp", descriptions=True),
+                DATA_SCHEMA.find_paths("entries", "nonpolymer_comp", descriptions=True),
+            )
+            self.assertIsNone(compact_schema._description_index)
+            self.assertEqual(list(compact_schema._type_descriptions), ["CoreNonpolymerEntity"])
+        with self.subTest(msg="4. only the descriptions of recently used types are kept"):
+            idxs = [idx for idx in compact_schema._schema_graph.node_indices() if isinstance(compact_schema._schema_graph[idx], DataFieldNode)]
+            self.assertEqual(compact_schema._get_descriptions(idxs), [DATA_SCHEMA.get_description(idx) for idx in idxs])
+            self.assertEqual(len(compact_schema._type_descriptions), data_schema._DESCRIPTION_CACHE_TYPES)
+        with self.subTest(msg="5. nodes have no instance dict"):
+            self.assertFalse(hasattr(compact_schema._schema_graph[0], "__dict__"))
+
+    def testConcurrentConstructQuery(self):
+        requestList = [
+            ("entries", ["4HHB", "1IYE"], ("exptl.method", "rcsb_entry_info.resolution_combined")),
+            ("entries", ["4HHB"], ["polymer_entities.rcsb_polymer_entity_container_identifiers.reference_sequence_identifiers.database_accession"]),
+            ("entries", ["4HHB"], ["nonpolymer_comp"]),
+            ("polymer_entities", ["4HHB_1"], ["rcsb_entity_source_organism.ncbi_scientific_name", "entity_poly"]),
+            ("polymer_entity_instances", ["4HHB.A"], ["polymer_entity.rcsb_id"]),
+            ("assemblies", ["4HHB-1"], ("pdbx_struct_assembly.oligomeric_details",)),
+            ("entries", ["4HHB"], ["id"]),  # not specific enough
+        ]
+
+        def construct(request):
+            inputType, inputIds, returnDataList = request
+            try:
+                return DATA_SCHEMA.construct_query(inputType, inputIds, returnDataList, suppress_autocomplete_warning=True)
+            except ValueError as error:
+                return type(error)
+
+        expectedList = [construct(request) for request in requestList]
+        self.assertIs(expectedList[-1], ValueError)
+        with self.subTest(msg="1. arguments aren't modified"):
+            returnDataList = ["exptl.method"]
+            DATA_SCHEMA.construct_query("entries", ["4HHB"], returnDataList, suppress_autocomplete_warning=True)
+            self.assertEqual(returnDataList, ["exptl.method"])
+        with self.subTest(msg="2. many threads constructing queries give the same results as one thread"):
+            switchInterval = sys.getswitchinterval()
+            sys.setswitchinterval(1e-6)
+            try:
+                with ThreadPoolExecutor(max_workers=16) as executor:
+                    resultList = list(executor.map(construct, requestList * 30))
+            finally:
+                sys.setswitchinterval(switchInterval)
+            self.assertEqual(resultList, expectedList * 30)
+
+    def testPathIndex(self):
+        schema = DataSchema()
+        with self.subTest(msg="1. built on first use"):
+            self.assertEqual(schema._path_indexes, {})
+            schema.find_paths("entries", "exptl")
+            self.assertEqual(list(schema._path_indexes), [schema._root_to_idx["entries"]])
+        for inputType, fieldName in [("entries", "id"), ("entries", "nonpolymer_comp"), ("polymer_entity_instances", "rcsb_id"), ("assemblies", "method")]:
+            with self.subTest(msg=f"2. same paths as a graph search, {inputType} {fieldName}"):
+                rootIdx = schema._root_to_idx[inputType]
+                index = schema._path_index(rootIdx)
+                expectedPaths = []
+                for fieldIdx in schema._field_to_idx_dict[fieldName]:
+                    expectedPaths.extend(rx.all_simple_paths(schema._schema_graph, rootIdx, fieldIdx))
+                self.assertEqual(sorted(index.path(entry) for entry in index.entries(fieldName)), sorted(list(path) for path in expectedPaths))
+                for fieldIdx in schema._field_to_idx_dict[fieldName]:
+                    expectedShortest = rx.digraph_all_shortest_paths(schema._schema_graph, rootIdx, fieldIdx, weight_fn=lambda edge: edge)
+                    self.assertEqual(sorted(tuple(path) for path in index.shortest_paths(fieldIdx, fieldName)), sorted({tuple(path) for path in expectedShortest}))
+        with self.subTest(msg="3. build_path_index indexes all input types"):
+            schema.build_path_index()
+            self.assertEqual(set(schema._path_indexes), set(schema._root_to_idx.values()))
+        with self.subTest(msg="4. unknown field names"):
+            with self.assertRaises(KeyError):
+                schema.find_paths("entries", "not_a_field")
+
     def testConstructQueryRustworkX(self):
         with self.subTest(msg="1.  singular input_type (entry)"):
             query = DATA_SCHEMA._construct_query_rustworkx(input_ids={"entry_id": "4HHB"}, input_type="entry", return_data_list=["exptl"])
@@ -366,8 +474,12 @@ def buildSchema():
     # suiteSelect.addTest(SchemaTests("testRecurseBuildSchema"))
     suiteSelect.addTest(SchemaTests("regexChecks"))
     suiteSelect.addTest(SchemaTests("testConstructQuery"))
+    suiteSelect.addTest(SchemaTests("testLazyClientSchema"))
+    suiteSelect.addTest(SchemaTests("testCompactSchema"))
+    suiteSelect.addTest(SchemaTests("testConcurrentConstructQuery"))
     suiteSelect.addTest(SchemaTests("testAllRoots"))
     suiteSelect.addTest(SchemaTests("testDotNotation"))
+    suiteSelect.addTest(SchemaTests("testPathIndex"))
     suiteSelect.addTest(SchemaTests("testConstructQueryRustworkX"))
     suiteSelect.addTest(SchemaTests("testDescription"))
     suiteSelect.addTest(SchemaTests("testFindFieldNames"))
@@ -0,0 +1,99 @@
+##
+# File:    test_id_codec.py
+# Author:
+# Date:
+# Version:
+#
+# Update:
+#
+#
+##
+"""
+Tests for the compact identifier codec.
+"""
+
+__docformat__ = "google en"
+__author__ = ""
+__email__ = ""
+__license__ = ""
+
+import contextlib
+import logging
+import platform
+import resource
+import time
+import unittest
+import unittest.mock
+
+from rcsbapi.id_codec import IdCodec, IdSet
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+IDS = [
+    "4HHB", "4HHB_1", "4HHB_2", "4HHB_10", "4HHB-1", "4HHB.A", "4HHB.AA", "4HHB.B", "9ZZZ.ZZZZ", "0000",  # packed
+    "AF_AFP68871F1", "MA_MABAKCEPC0001", "ATP", "4hhb", "1ABC_01", "1ABC_4294967296",  # fallback
+]
+
+
+class IdCodecTests(unittest.TestCase):
+    def setUp(self):
+        self.__startTime = time.time()
+        logger.info("Starting %s at %s", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()))
+
+    def tearDown(self):
+        unitS = "MB" if platform.system() == "Darwin" else "GB"
+        rusageMax = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        logger.info("Maximum resident memory size %.4f %s", rusageMax / 10**6, unitS)
+        endTime = time.time()
+        logger.info("Completed %s at %s (%.4f seconds)", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()), endTime - self.__startTime)
+
+    def testRoundTrip(self):
+        codec = IdCodec()
+        for identifier in IDS:
+            code = codec.encode(identifier)
+            self.assertEqual(codec.decode(code), identifier)
+            self.assertEqual(code < 0, IDS.index(identifier) >= 10)
+        self.assertEqual(codec.fallback_size, 6)
+        # Fallback identifiers are only stored once
+        self.assertEqual(codec.encode("AF_AFP68871F1"), codec.encode("AF_AFP68871F1"))
+        self.assertEqual(codec.fallback_size, 6)
+        self.assertEqual(codec.decode_many(codec.encode_many(IDS)), IDS)
+
+    def testIdSet(self):
+        for numpy_installed in [True, False]:
+            with self.subTest(numpy_installed=numpy_installed):
+                patch = contextlib.nullcontext() if numpy_installed else unittest.mock.patch("rcsbapi.id_codec._get_numpy", return_value=None)
+                with patch:
+                    id_set = IdSet(IDS + IDS)
+                    self.assertEqual(len(id_set), len(IDS))
+                    self.assertEqual(id_set.nbytes, 8 * len(IDS))
+                    # Packed identifiers are ordered by PDB ID and suffix, then fallback identifiers follow
+                    self.assertEqual(list(id_set)[:10], ["0000", "4HHB", "4HHB-1", "4HHB.A", "4HHB.AA", "4HHB.B", "4HHB_1", "4HHB_2", "4HHB_10", "9ZZZ.ZZZZ"])
+                    self.assertEqual(list(id_set)[10:], sorted(IDS[10:]))
+                    self.assertIn("4HHB_10", id_set)
+                    self.assertIn("AF_AFP68871F1", id_set)
+                    self.assertNotIn("1TIM", id_set)
+                    self.assertNotIn("AF_AFP12345F1", id_set)
+
+                    a = IdSet(["4HHB", "2GS2", "5T89", "AF_AFP68871F1"])
+                    b = IdSet(["2GS2", "1TIM", "AF_AFP68871F1"])
+                    self.assertEqual(a & b, {"2GS2", "AF_AFP68871F1"})
+                    self.assertEqual(a | b, {"4HHB", "2GS2", "5T89", "1TIM", "AF_AFP68871F1"})
+                    self.assertEqual(a - b, {"4HHB", "5T89"})
+                    self.assertEqual(a ^ b, {"4HHB", "5T89", "1TIM"})
+                    self.assertEqual(a.union(b, IdSet(["9XYZ"])), IdSet(["4HHB", "2GS2", "5T89", "1TIM", "9XYZ", "AF_AFP68871F1"]))
+                    with self.assertRaises(ValueError):
+                        _ = a & IdSet(["4HHB"], codec=IdCodec())
+
+
+def buildIdCodec():
+    suiteSelect = unittest.TestSuite()
+    suiteSelect.addTest(IdCodecTests("testRoundTrip"))
+    suiteSelect.addTest(IdCodecTests("testIdSet"))
+    return suiteSelect
+
+
+if __name__ == "__main__":
+    mySuite = buildIdCodec()
+    unittest.TextTestRunner(verbosity=2).run(mySuite)
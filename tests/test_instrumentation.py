@@ -0,0 +1,120 @@
+##
+# File:    test_instrumentation.py
+# Author:
+# Date:
+# Version:
+#
+# Update:
+#
+#
+##
+"""
+Tests for request instrumentation.
+"""
+
+__docformat__ = "google en"
+__author__ = ""
+__email__ = ""
+__license__ = ""
+
+import datetime
+import json
+import logging
+import platform
+import re
+import resource
+import time
+import unittest
+import unittest.mock
+
+import requests
+
+from rcsbapi import instrumentation
+from rcsbapi.data import DataQuery
+from rcsbapi.search import AttributeQuery
+from rcsbapi.search.search_cache import SearchCache
+from rcsbapi.search.search_query import Session
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def fakeResponse(payload):
+    response = unittest.mock.Mock(status_code=200, content=json.dumps(payload).encode("utf-8"), elapsed=datetime.timedelta(milliseconds=20))
+    response.request = unittest.mock.Mock(url="https://example.org", body="query")
+    response.raw.retries.history = ((None, None, None, None, None),)
+    return response
+
+
+def fakeDataPost(*_, data=None, **__):
+    inputIds = json.loads(re.search(r"\[[^]]+\]", data).group(0))
+    return fakeResponse({"data": {"entries": [{"rcsb_id": inputId} for inputId in inputIds]}})
+
+
+class InstrumentationTests(unittest.TestCase):
+    def setUp(self):
+        self.__startTime = time.time()
+        logger.info("Starting %s at %s", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()))
+
+    def tearDown(self):
+        unitS = "MB" if platform.system() == "Darwin" else "GB"
+        rusageMax = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        logger.info("Maximum resident memory size %.4f %s", rusageMax / 10**6, unitS)
+        endTime = time.time()
+        logger.info("Completed %s at %s (%.4f seconds)", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()), endTime - self.__startTime)
+
+    def testDataEvents(self):
+        inputIds = [f"{i % 10}A{i // 10:02d}" for i in range(120)]
+        query = DataQuery(input_type="entries", input_ids=inputIds, return_data_list=["exptl.method"])
+        events = []
+        histogram = instrumentation.LatencyHistogram(buckets=[0.001, 10.0])
+        meter = instrumentation.ThroughputMeter()
+        with instrumentation.observing(events.append, histogram, meter):
+            with unittest.mock.patch("requests.post", side_effect=fakeDataPost):
+                query.exec()
+            with unittest.mock.patch("requests.post", side_effect=requests.ConnectionError("network dropped")):
+                with self.assertRaises(requests.ConnectionError):
+                    query.exec()
+        self.assertFalse(instrumentation.enabled())
+        self.assertEqual([(event.service, event.operation, event.index) for event in events[:3]], [("data", "query", 0), ("data", "query", 1), ("data", "query", 2)])
+        self.assertEqual(events[0].bytes_received, len(fakeDataPost(data=query._batch_query(inputIds[:50])).content))
+        self.assertEqual(events[0].bytes_sent, len("https://example.org") + len("query"))
+        self.assertEqual(events[0].server_time, 0.02)
+        self.assertEqual(events[0].retries, 1)
+        self.assertGreater(events[0].decode_time, 0)
+        self.assertIsNone(events[0].error)
+        self.assertIn("ConnectionError", events[3].error)
+
+        summary = histogram.summary()["data.query"]
+        self.assertEqual(summary["count"], 4)
+        self.assertEqual(summary["errors"], 1)
+        self.assertEqual(sum(summary["buckets"].values()), 4)
+        self.assertEqual(meter.summary()["requests"], 4)
+        self.assertEqual(meter.summary()["bytes_received"], sum(event.bytes_received for event in events))
+
+    def testSearchEvents(self):
+        events = []
+        session = Session(AttributeQuery("exptl.method", "exact_match", "X-RAY DIFFRACTION"), rows=2, cache=SearchCache())
+        pages = [fakeResponse({"total_count": 3, "result_set": ["4HHB", "1STP"]}), fakeResponse({"total_count": 3, "result_set": ["2GS2"]})]
+        with instrumentation.observing(events.append):
+            with unittest.mock.patch("requests.get", side_effect=pages):
+                self.assertEqual(list(session), ["4HHB", "1STP", "2GS2"])
+            with unittest.mock.patch("requests.get", side_effect=AssertionError("unexpected request")):
+                self.assertEqual(list(session), ["4HHB", "1STP", "2GS2"])
+            # Failing observers don't break requests
+            with instrumentation.observing(unittest.mock.Mock(side_effect=RuntimeError("observer failed"))):
+                with self.assertLogs("rcsbapi.instrumentation", level="ERROR"):
+                    self.assertEqual(list(session), ["4HHB", "1STP", "2GS2"])
+        self.assertEqual([(event.operation, event.index, event.cache_hit) for event in events], [("page", 0, False), ("page", 1, False), ("page", None, True), ("page", None, True)])
+
+
+def buildInstrumentation():
+    suiteSelect = unittest.TestSuite()
+    suiteSelect.addTest(InstrumentationTests("testDataEvents"))
+    suiteSelect.addTest(InstrumentationTests("testSearchEvents"))
+    return suiteSelect
+
+
+if __name__ == "__main__":
+    mySuite = buildInstrumentation()
+    unittest.TextTestRunner(verbosity=2).run(mySuite)
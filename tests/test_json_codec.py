@@ -0,0 +1,109 @@
+##
+# File:    test_json_codec.py
+# Author:
+# Date:
+# Version:
+#
+# Update:
+#
+#
+##
+"""
+Tests for the pluggable JSON codec.
+"""
+
+__docformat__ = "google en"
+__author__ = ""
+__email__ = ""
+__license__ = ""
+
+import datetime
+import json
+import logging
+import platform
+import resource
+import time
+import unittest
+import unittest.mock
+
+from rcsbapi import json_codec
+from rcsbapi.config import config
+from rcsbapi.search import AttributeQuery
+from rcsbapi.search.search_query import Session
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+PAYLOAD = {
+    "query_id": "a1b2",
+    "total_count": 2,
+    "result_set": [{"identifier": "4HHB", "score": 1.0}, {"identifier": "2GS2", "score": 0.5}],
+    "facets": [],
+    "text": "Ångström µ \"quoted\"",
+    "big": 2**62,
+    "flag": None,
+}
+
+TEMPORAL = {
+    "date": datetime.date(2024, 1, 31),
+    "datetime": datetime.datetime(2024, 1, 31, 12, 30, 15, 250000),
+    "utc": datetime.datetime(2024, 1, 31, 12, 30, tzinfo=datetime.timezone.utc),
+    "time": datetime.time(8, 5),
+}
+TEMPORAL_JSON = '{"date":"2024-01-31","datetime":"2024-01-31T12:30:15.250000","utc":"2024-01-31T12:30:00+00:00","time":"08:05:00"}'
+SPECIAL = {"text": "é Ångström", "nan": float("nan"), "values": [1.5, float("inf"), -float("inf")]}
+SPECIAL_JSON = '{"text":"é Ångström","nan":null,"values":[1.5,null,null]}'
+
+
+class JsonCodecTests(unittest.TestCase):
+    def setUp(self):
+        self.__startTime = time.time()
+        logger.info("Starting %s at %s", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()))
+        self.__backend = config.JSON_BACKEND
+
+    def tearDown(self):
+        config.JSON_BACKEND = self.__backend
+        unitS = "MB" if platform.system() == "Darwin" else "GB"
+        rusageMax = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        logger.info("Maximum resident memory size %.4f %s", rusageMax / 10**6, unitS)
+        endTime = time.time()
+        logger.info("Completed %s at %s (%.4f seconds)", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()), endTime - self.__startTime)
+
+    def testBackends(self):
+        encoded = json.dumps(PAYLOAD).encode("utf-8")
+        for backend in json_codec.JSON_BACKENDS:
+            with self.subTest(backend=backend):
+                config.JSON_BACKEND = backend
+                try:
+                    self.assertEqual(json_codec.backend_name(), backend)
+                except ImportError:
+                    continue  # not installed
+                self.assertEqual(json_codec.loads(encoded), PAYLOAD)
+                self.assertEqual(json_codec.loads(encoded.decode("utf-8")), PAYLOAD)
+                self.assertEqual(json.loads(json_codec.dumps(PAYLOAD)), PAYLOAD)
+                self.assertNotIn(" ", json_codec.dumps({"a": [1, 2]}))
+                self.assertEqual(json_codec.decode_response(unittest.mock.Mock(content=encoded)), PAYLOAD)
+                session = Session(AttributeQuery("exptl.method", "exact_match", "X-RAY DIFFRACTION"), rows=2)
+                self.assertEqual(json.loads(session._request_json(4)), session._make_params(4))
+                self.assertEqual(json_codec.dumps(TEMPORAL), TEMPORAL_JSON)
+                self.assertEqual(json_codec.dumps(SPECIAL), SPECIAL_JSON)
+                with self.assertRaises(TypeError):
+                    json_codec.dumps({"set": {1, 2}})
+                session = Session(AttributeQuery("rcsb_accession_info.initial_release_date", "greater", datetime.date(2024, 1, 1)))
+                self.assertEqual(json.loads(session._request_json())["query"]["parameters"]["value"], "2024-01-01")
+        config.JSON_BACKEND = "auto"
+        self.assertIn(json_codec.backend_name(), json_codec.JSON_BACKENDS)
+        config.JSON_BACKEND = "yaml"
+        with self.assertRaises(ValueError):
+            json_codec.loads(encoded)
+
+
+def buildJsonCodec():
+    suiteSelect = unittest.TestSuite()
+    suiteSelect.addTest(JsonCodecTests("testBackends"))
+    return suiteSelect
+
+
+if __name__ == "__main__":
+    mySuite = buildJsonCodec()
+    unittest.TextTestRunner(verbosity=2).run(mySuite)
@@ -0,0 +1,121 @@
+##
+# File:    test_mock_server.py
+# Author:
+# Date:
+# Version:
+#
+# Update:
+#
+#
+##
+"""
+Tests for the local mock of the Data and Search APIs used by the benchmarks.
+"""
+
+__docformat__ = "google en"
+__author__ = ""
+__email__ = ""
+__license__ = ""
+
+import logging
+import platform
+import resource
+import time
+import unittest
+
+import requests
+
+from rcsbapi import const
+from rcsbapi.config import config
+from rcsbapi.dev_tools.mock_server import MockRCSBServer, entry_id
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+FIXTURES = {
+    "data": {"entries": {"4HHB": {"rcsb_id": "4HHB", "exptl": [{"method": "X-RAY DIFFRACTION"}], "struct": {"title": "DEOXYHAEMOGLOBIN"}}}},
+    "search": {"polymer_entity": ["4HHB_1", "4HHB_2"]},
+}
+
+
+class MockServerTests(unittest.TestCase):
+    def setUp(self):
+        self.__startTime = time.time()
+        logger.info("Starting %s at %s", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()))
+        self.__rates = (config.DATA_API_REQUESTS_PER_SECOND, config.SEARCH_API_REQUESTS_PER_SECOND)
+        config.DATA_API_REQUESTS_PER_SECOND = 0
+        config.SEARCH_API_REQUESTS_PER_SECOND = 0
+
+    def tearDown(self):
+        config.DATA_API_REQUESTS_PER_SECOND, config.SEARCH_API_REQUESTS_PER_SECOND = self.__rates
+        unitS = "MB" if platform.system() == "Darwin" else "GB"
+        rusageMax = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        logger.info("Maximum resident memory size %.4f %s", rusageMax / 10**6, unitS)
+        endTime = time.time()
+        logger.info("Completed %s at %s (%.4f seconds)", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()), endTime - self.__startTime)
+
+    def testDataQueries(self):
+        liveEndpoint = const.const.DATA_API_ENDPOINT
+        with MockRCSBServer(fixtures=FIXTURES) as server, server.redirect():
+            from rcsbapi.data import DataQuery  # pylint: disable=import-outside-toplevel
+
+            inputIds = ["4HHB"] + [entry_id(idx) for idx in range(60)]
+            query = DataQuery("entries", inputIds, ["exptl.method", "polymer_entities.rcsb_id"])
+            records = query.exec()["data"]["entries"]
+            self.assertEqual(server.requests["data"], 2)
+            self.assertEqual([record["rcsb_id"] for record in records], inputIds)
+            # Recorded records are replayed with only the requested fields, missing fields are null
+            self.assertEqual(records[0], {"rcsb_id": "4HHB", "exptl": [{"method": "X-RAY DIFFRACTION"}], "polymer_entities": None})
+            self.assertEqual(len(records[1]["polymer_entities"]), 2)
+            self.assertEqual(records[1]["polymer_entities"][0], {"rcsb_id": records[1]["rcsb_id"] + "_1"})
+            # Fields selected more than once (one selection per nested path) are merged; nested identifiers derive from the entry
+            query = DataQuery(
+                "entries",
+                inputIds[:2],
+                ["polymer_entities.rcsb_id", "polymer_entities.rcsb_polymer_entity_container_identifiers.asym_ids", "polymer_entities.polymer_entity_instances.rcsb_id"],
+            )
+            records = query.exec()["data"]["entries"]
+            self.assertEqual(records[0], {"rcsb_id": "4HHB", "polymer_entities": None})
+            entryId = records[1]["rcsb_id"]
+            self.assertEqual(
+                records[1]["polymer_entities"][1],
+                {
+                    "rcsb_id": entryId + "_2",
+                    "rcsb_polymer_entity_container_identifiers": {"asym_ids": ["asym_ids", "asym_ids"]},
+                    "polymer_entity_instances": [{"rcsb_id": entryId + ".A"}, {"rcsb_id": entryId + ".B"}],
+                },
+            )
+        self.assertEqual(const.const.DATA_API_ENDPOINT, liveEndpoint)
+
+    def testSearchQueries(self):
+        with MockRCSBServer(search_hits=25, fixtures=FIXTURES, fail_requests=[5]) as server, server.redirect():
+            from rcsbapi.search import TextQuery  # pylint: disable=import-outside-toplevel
+
+            query = TextQuery("hemoglobin")
+            with self.subTest(msg="1. Paging"):
+                results = list(query(rows=10))
+                self.assertEqual(len(set(results)), 25)
+                # exec() requests the first page, then iterating requests every page
+                self.assertEqual(server.requests["search"], 4)
+            with self.subTest(msg="2. Failed request"):
+                with self.assertRaises(requests.HTTPError):
+                    list(query(rows=10))
+            with self.subTest(msg="3. Recorded results, streamed"):
+                self.assertEqual(list(query(return_type="polymer_entity", return_all_hits=True)), ["4HHB_1", "4HHB_2"])
+            with self.subTest(msg="4. Latency"):
+                server.latency = 0.2
+                startTime = time.perf_counter()
+                self.assertEqual(query(return_counts=True), 25)
+                self.assertGreaterEqual(time.perf_counter() - startTime, 0.2)
+
+
+def buildMockServer():
+    suiteSelect = unittest.TestSuite()
+    suiteSelect.addTest(MockServerTests("testDataQueries"))
+    suiteSelect.addTest(MockServerTests("testSearchQueries"))
+    return suiteSelect
+
+
+if __name__ == "__main__":
+    mySuite = buildMockServer()
+    unittest.TextTestRunner(verbosity=2).run(mySuite)
@@ -0,0 +1,87 @@
+##
+# File:    test_pipeline.py
+# Author:
+# Date:
+# Version:
+#
+# Update:
+#
+#
+##
+"""
+Tests for streaming search results into Data API queries.
+"""
+
+__docformat__ = "google en"
+__author__ = ""
+__email__ = ""
+__license__ = ""
+
+import json
+import logging
+import time
+import unittest
+import unittest.mock
+
+from rcsbapi.data import DataQuery
+from rcsbapi.pipeline import SearchDataPipeline, search_to_data
+from rcsbapi.search import AttributeQuery
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class PipelineTests(unittest.TestCase):
+    def setUp(self):
+        self.__startTime = time.time()
+        logger.info("Starting %s at %s", self.id().split(".")[-1], time.strftime("%Y %m %d %H:%M:%S", time.localtime()))
+
+    def tearDown(self) -> None:
+        endTime = time.time()
+        logger.info("Completed %s at %s (%.4f seconds)", self.id().split(".")[-1], time.strftime("%Y %m %d %H:%M:%S", time.localtime()), endTime - self.__startTime)
+
+    def testSearchToData(self):
+        ids = ["4HHB", "2GS2", "5T89", "1TIM", "1IYE"]
+        query = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=ids)
+        records = list(search_to_data(query, ["exptl.method"], batch_size=2))
+        self.assertEqual({record["rcsb_id"] for record in records}, set(ids))
+        for record in records:
+            self.assertIn("method", record["exptl"][0])
+
+        records = list(search_to_data(query, ["rcsb_polymer_entity_container_identifiers.entity_id"], return_type="polymer_entity"))
+        self.assertTrue(all("_" in record["rcsb_id"] for record in records))
+
+    def testPipelineBatches(self):
+        ids = [f"{num}ABC" for num in range(1, 10)] * 25
+        posted = []
+
+        def post(_, query, index=None):  # pylint: disable=unused-argument
+            id_batch = json.loads(query[query.index("["):query.index("]") + 1])
+            posted.append(id_batch)
+            return {"data": {"entries": [{"rcsb_id": rcsb_id} for rcsb_id in id_batch]}}
+
+        with unittest.mock.patch.object(DataQuery, "_post", post):
+            with self.subTest(msg="1. Records are yielded in search order"):
+                pipeline = SearchDataPipeline(iter(ids), "entries", ["exptl.method"], batch_size=50, workers=3)
+                self.assertEqual([record["rcsb_id"] for record in pipeline], ids)
+                self.assertEqual(sorted(len(id_batch) for id_batch in posted), [25, 50, 50, 50, 50])
+                self.assertEqual(pipeline.num_identifiers, len(ids))
+
+            with self.subTest(msg="2. Errors while searching are raised"):
+                def failing_search():
+                    yield "4HHB"
+                    raise ValueError("search failed")
+                with self.assertRaises(ValueError):
+                    list(SearchDataPipeline(failing_search(), "entries", ["exptl.method"]))
+
+
+def buildPipeline():
+    suiteSelect = unittest.TestSuite()
+    suiteSelect.addTest(PipelineTests("testSearchToData"))
+    suiteSelect.addTest(PipelineTests("testPipelineBatches"))
+    return suiteSelect
+
+
+if __name__ == "__main__":
+    mySuite = buildPipeline()
+    unittest.TextTestRunner(verbosity=2).run(mySuite)
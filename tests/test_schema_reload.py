@@ -0,0 +1,129 @@
+##
+# File:    test_schema_reload.py
+# Author:
+# Date:
+# Version:
+#
+# Update:
+#
+#
+##
+"""
+Tests for reloading the schemas in long-running processes, against a local mock of the RCSB PDB APIs.
+"""
+
+__docformat__ = "google en"
+__author__ = ""
+__email__ = ""
+__license__ = ""
+
+import logging
+import platform
+import resource
+import time
+import unittest
+import unittest.mock
+
+from rcsbapi.dev_tools.mock_server import MockRCSBServer
+from rcsbapi.schema_reload import SchemaReloader, swap_data_schema, swap_search_schema
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class SchemaReloadTests(unittest.TestCase):
+    def setUp(self):
+        self.__startTime = time.time()
+        logger.info("Starting %s at %s", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()))
+        self.__server = MockRCSBServer().start()
+        self.__redirect = self.__server.redirect()
+        self.__redirect.__enter__()  # pylint: disable=unnecessary-dunder-call
+        import rcsbapi.data  # pylint: disable=import-outside-toplevel
+        from rcsbapi.search import search_query  # pylint: disable=import-outside-toplevel
+
+        self.__schemas = (rcsbapi.data.DATA_SCHEMA, search_query.SEARCH_SCHEMA)
+
+    def tearDown(self):
+        swap_data_schema(self.__schemas[0])
+        swap_search_schema(self.__schemas[1])
+        self.__redirect.__exit__(None, None, None)
+        self.__server.stop()
+        unitS = "MB" if platform.system() == "Darwin" else "GB"
+        rusageMax = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        logger.info("Maximum resident memory size %.4f %s", rusageMax / 10**6, unitS)
+        endTime = time.time()
+        logger.info("Completed %s at %s (%.4f seconds)", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()), endTime - self.__startTime)
+
+    def testCheck(self):
+        import rcsbapi.data  # pylint: disable=import-outside-toplevel
+        import rcsbapi.search  # pylint: disable=import-outside-toplevel
+        from rcsbapi.search import search_query  # pylint: disable=import-outside-toplevel
+
+        reloads = []
+        reloader = SchemaReloader(on_reload=lambda name, old, new: reloads.append((name, old, new)))
+        oldDataSchema, oldSearchSchema = self.__schemas
+        oldQuery = rcsbapi.data.DataQuery("entries", ["4HHB"], ["exptl.method"])
+        with self.subTest(msg="1. unchanged schemas are kept"):
+            self.assertEqual(reloader.check(), [])
+            self.assertIs(rcsbapi.data.DATA_SCHEMA, oldDataSchema)
+            self.assertIs(search_query.SEARCH_SCHEMA, oldSearchSchema)
+            self.assertEqual(reloads, [])
+        with self.subTest(msg="2. new schemas are swapped in"):
+            self.assertEqual(reloader.check(force=True), ["data", "search"])
+            self.assertEqual([(name, old) for name, old, _ in reloads], [("data", oldDataSchema), ("search", oldSearchSchema)])
+            self.assertIs(rcsbapi.data.DATA_SCHEMA, reloads[0][2])
+            self.assertIs(search_query.SEARCH_SCHEMA, reloads[1][2])
+            self.assertIs(rcsbapi.search.SEARCH_SCHEMA, reloads[1][2])
+            self.assertIs(rcsbapi.search.search_attributes, reloads[1][2].search_attributes)
+        with self.subTest(msg="3. existing queries keep their schema, new queries use the new one"):
+            newQuery = rcsbapi.data.DataQuery("entries", ["4HHB"], ["exptl.method"])
+            self.assertIs(oldQuery._schema, oldDataSchema)
+            self.assertIs(newQuery._schema, reloads[0][2])
+            self.assertEqual(newQuery.get_query(), oldQuery.get_query())
+            self.assertEqual(len(oldQuery.to_table()), 1)
+            query = rcsbapi.search.AttributeQuery("rcsb_entry_info.resolution_combined", "less", 2.0)
+            self.assertEqual(query.to_dict()["service"], "text")
+
+    def testSearchFetchFailure(self):
+        from rcsbapi.search import search_query  # pylint: disable=import-outside-toplevel
+        from rcsbapi.search.search_schema import SearchSchema  # pylint: disable=import-outside-toplevel
+
+        fetchSchema = SearchSchema._fetch_schema
+        fetchedDict = {}
+
+        def fetchOnce(schema, url):
+            # Only the first request of each schema succeeds. Its result is marked, to tell it from the packaged fallback files.
+            if url in fetchedDict:
+                return None
+            fetchedDict[url] = dict(fetchSchema(schema, url), **{"$comment": "fetched"})
+            return fetchedDict[url]
+
+        with unittest.mock.patch.object(SearchSchema, "_fetch_schema", autospec=True, side_effect=fetchOnce):
+            self.assertEqual(SchemaReloader(data=False).check(force=True), ["search"])
+        self.assertEqual(len(fetchedDict), 2)
+        newSchema = search_query.SEARCH_SCHEMA
+        self.assertIsNot(newSchema, self.__schemas[1])
+        self.assertEqual([newSchema.struct_schema, newSchema.chem_schema], list(fetchedDict.values()))
+
+    def testBackgroundThread(self):
+        self.__server.requests.clear()
+        with SchemaReloader(interval=0.05) as reloader:
+            deadline = time.time() + 30
+            while self.__server.requests["data_schema"] < 3 and time.time() < deadline:
+                time.sleep(0.05)
+        self.assertIsNone(reloader._thread)
+        self.assertGreaterEqual(self.__server.requests["data_schema"], 3)
+        self.assertGreaterEqual(self.__server.requests["search_schema"], 6)
+
+
+def buildSchemaReload():
+    suiteSelect = unittest.TestSuite()
+    suiteSelect.addTest(SchemaReloadTests("testCheck"))
+    suiteSelect.addTest(SchemaReloadTests("testSearchFetchFailure"))
+    suiteSelect.addTest(SchemaReloadTests("testBackgroundThread"))
+    return suiteSelect
+
+
+if __name__ == "__main__":
+    mySuite = buildSchemaReload()
+    unittest.TextTestRunner(verbosity=2).run(mySuite)
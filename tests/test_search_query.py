@@ -17,18 +17,26 @@ __author__ = "Santiago Blaumann"
 __email__ = "santiago.blaumann@rcsb.org"
 __license__ = "BSD 3-Clause"
 
+import json
 import logging
 import platform
 import resource
 import time
+import tempfile
 import unittest
+import unittest.mock
 import os
 from itertools import islice
 import requests
+from rcsbapi.config import config
 from rcsbapi.const import const
+from rcsbapi.id_codec import IdSet
 from rcsbapi.search import search_attributes as attrs
 from rcsbapi.search import TextQuery, Attr, AttributeQuery, ChemSimilarityQuery, SeqSimilarityQuery, SeqMotifQuery, StructSimilarityQuery, StructMotifResidue, StructMotifQuery
 from rcsbapi.search import Facet, FacetRange, TerminalFilter, GroupFilter, FilterFacet, Sort, GroupBy, RankingCriteriaType
+from rcsbapi.search import search_many, count_many, SetQuery
+from rcsbapi.search.query_optimizer import optimize
+from rcsbapi.search.search_cache import SearchCache, canonical_request_key
 from rcsbapi.search.search_query import PartialQuery, fileUpload, Session, Value, Terminal, Group
 
 logger = logging.getLogger(__name__)
@@ -1481,6 +1489,303 @@ class SearchTests(unittest.TestCase):
         except Exception as error:
             self.fail(f"Failed unexpectedly: {error}")
 
+    def testRequestTemplate(self):
+        """Test that the cached request serialization matches a full serialization of each page"""
+        q1 = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=["4HHB", "2GS2", "5T89"])
+        session = Session(q1, rows=2, facets=[Facet(name="Methods", aggregation_type="terms", attribute="exptl.method")])
+        for start in [0, 2, 10000]:
+            self.assertEqual(json.loads(session._request_json(start)), session._make_params(start))
+        self.assertEqual(session._request_json(0), session._request_json(0))
+
+        # Changing rows after the first request rebuilds the cached request
+        session.rows = 3
+        self.assertEqual(json.loads(session._request_json(3))["request_options"]["paginate"], {"start": 3, "rows": 3})
+
+        # User strings that look like a placeholder are left alone
+        session = Session(TextQuery("__paginate_start__"), rows=2, facets=[Facet(name="__paginate_start__", aggregation_type="terms", attribute="exptl.method")])
+        self.assertEqual(json.loads(session._request_json(2)), session._make_params(2))
+
+        # return_counts requests have no paginate option
+        session = Session(q1, return_counts=True)
+        self.assertNotIn("paginate", json.loads(session._request_json(100))["request_options"])
+
+    def testReturnAllHits(self):
+        """Test fetching all results in a single streamed request"""
+        query = AttributeQuery("rcsb_entity_source_organism.taxonomy_lineage.name", operator="exact_match", value="Nocardia")
+        paged = list(query(rows=500))
+        session = query(return_all_hits=True)
+        streamed = list(session)
+        self.assertEqual(streamed, paged)
+        self.assertEqual(session.count, len(paged))
+        request_options = session._make_params()["request_options"]
+        self.assertTrue(request_options["return_all_hits"])
+        self.assertNotIn("paginate", request_options)
+
+    def testReturnAllHitsFacets(self):
+        """Test that facets and explain metadata are kept when results are streamed"""
+        body = json.dumps({
+            "query_id": "1",
+            "result_type": "entry",
+            "total_count": 3,
+            "explain_metadata": {"query_time": 1},
+            "result_set": ["4HHB", "2GS2", "5T89"],
+            "facets": [{"name": "Methods", "groups": [{"label": "X-RAY DIFFRACTION", "population": 3}]}],
+        }).encode("utf-8")
+
+        class StreamedResponse:
+            status_code = 200
+
+            def __init__(self, content):
+                self.content = content
+
+            def raise_for_status(self):
+                pass
+
+            def iter_content(self, chunk_size):  # pylint: disable=unused-argument
+                for idx in range(0, len(self.content), 7):
+                    yield self.content[idx: idx + 7]
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+        query = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=["4HHB", "2GS2", "5T89"])
+        with unittest.mock.patch("requests.get", return_value=StreamedResponse(body)):
+            session = query.exec(return_all_hits=True, facets=[Facet("Methods", "terms", "exptl.method")], return_explain_metadata=True)
+            self.assertEqual(list(session), ["4HHB", "2GS2", "5T89"])
+        self.assertEqual(session.count, 3)
+        self.assertEqual(session.facets, [{"name": "Methods", "groups": [{"label": "X-RAY DIFFRACTION", "population": 3}]}])
+        self.assertEqual(session.explain_metadata, {"query_time": 1})
+
+        # A response that is cut off raises an error instead of silently ending the results
+        truncated = body[:body.index(b'"5T89"')]
+        for content in (truncated, body[:body.index(b'"result_set"')], body[:body.index(b'"result_set"') + 12]):
+            with self.subTest(content=content), unittest.mock.patch("requests.get", return_value=StreamedResponse(content)):
+                with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+                    list(query.exec(return_all_hits=True))
+        with unittest.mock.patch("requests.get", return_value=StreamedResponse(truncated)):
+            self.assertEqual(list(islice(query.exec(return_all_hits=True), 2)), ["4HHB", "2GS2"])
+        # A complete response without results is empty
+        with unittest.mock.patch("requests.get", return_value=StreamedResponse(b'{"query_id": "1", "total_count": 0}')):
+            session = query.exec(return_all_hits=True)
+            self.assertEqual(list(session), [])
+        self.assertEqual(session.count, 0)
+
+    def testSearchMany(self):
+        """Test running many queries concurrently, with per-query errors"""
+        id_lists = [["4HHB", "2GS2"], ["5T89"], ["1TIM", "4HHB", "2GS2", "5T89"]]
+        queries = [AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=ids) for ids in id_lists]
+        queries.append(AttributeQuery("invalid_identifier", operator="exact_match", value="ERROR", service="text"))
+        bulk = search_many(queries, rows=1, workers=3)
+        results: dict = {}
+        for query_idx, identifier in bulk:
+            results.setdefault(query_idx, set()).add(identifier)
+        for query_idx, ids in enumerate(id_lists):
+            self.assertEqual(results[query_idx], set(ids))
+            self.assertEqual(bulk.counts[query_idx], len(ids))
+        self.assertEqual(list(bulk.errors.keys()), [3])
+        self.assertIsInstance(bulk.errors[3], requests.HTTPError)
+
+    def testCountMany(self):
+        """Test counting many queries concurrently, with cached counts"""
+        q1 = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=["4HHB", "2GS2"])
+        q2 = TextQuery("hemoglobin")
+        q3 = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=["4HHB", "2GS2"])
+
+        # Identical requests share a key, regardless of query_id and pagination
+        key1 = canonical_request_key(Session(q1)._make_params(0))
+        key3 = canonical_request_key(Session(q3)._make_params(10000))
+        self.assertEqual(key1, key3)
+        self.assertNotEqual(key1, canonical_request_key(Session(q2)._make_params()))
+
+        cache = SearchCache(ttl=60)
+        counts = count_many([q1, q2, q3], cache=cache)
+        self.assertEqual(counts, [2, q2(return_counts=True), 2])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(count_many([q3], cache=cache), [2])
+
+    def testResultCache(self):
+        """Test serving repeated identical searches from the result cache, in memory and on disk"""
+        ids = ["4HHB", "2GS2", "5T89", "1TIM"]
+        q1 = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=ids)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = SearchCache(ttl=60, directory=cache_dir)
+            session = Session(q1, rows=2, cache=cache)
+            self.assertEqual(set(session), set(ids))
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            # A new session with an identical request (but new query_id) doesn't make any requests
+            session = Session(q1, rows=2, cache=cache)
+            with unittest.mock.patch("requests.get", side_effect=AssertionError("unexpected request")):
+                self.assertEqual(set(session), set(ids))
+                self.assertEqual(session.to_dict()["total_count"], 4)
+
+            # Entries are also loaded from disk
+            disk_cache = SearchCache(ttl=60, directory=cache_dir)
+            with unittest.mock.patch("requests.get", side_effect=AssertionError("unexpected request")):
+                self.assertEqual(set(Session(q1, cache=disk_cache)), set(ids))
+
+            # Expired entries are ignored
+            expired_cache = SearchCache(ttl=-1, directory=cache_dir)
+            self.assertIsNone(expired_cache.get(session._cache_key()))
+
+    def testResultCacheIsolation(self):
+        """Test that cached responses can't be changed by callers, and that only cache files are cleared"""
+        q1 = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=["4HHB", "2GS2"])
+        cache = SearchCache(ttl=60)
+        session = Session(q1, cache=cache)
+        cache.set(session._cache_key(), {"response": {"total_count": 2, "result_set": ["4HHB", "2GS2"]}, "results": ["4HHB", "2GS2"]})
+        with unittest.mock.patch("requests.get", side_effect=AssertionError("unexpected request")):
+            session.to_dict().pop("result_set")
+            self.assertEqual(session.to_dict()["result_set"], ["4HHB", "2GS2"])
+        self.assertEqual(len(cache), 1)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            disk_cache = SearchCache(ttl=60, directory=cache_dir)
+            disk_cache.set(session._cache_key(), {"response": {"total_count": 0}, "results": []})
+            with open(os.path.join(cache_dir, "settings.json"), "w", encoding="utf-8") as file:
+                file.write("{}")
+            disk_cache.clear()
+            self.assertEqual(os.listdir(cache_dir), ["settings.json"])
+            self.assertEqual(len(disk_cache), 0)
+
+    def testResultCacheRows(self):
+        """Test that cached results are paged by each Session's rows"""
+        ids = ["1ABC", "2ABC", "3ABC", "4ABC", "5ABC", "6ABC", "7ABC"]
+        q1 = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=ids)
+
+        def single_query(session, start=0):
+            return {"total_count": len(ids), "result_set": ids[start: start + session.rows]}
+
+        with unittest.mock.patch.object(Session, "_single_query", autospec=True, side_effect=single_query) as query_mock:
+            cache = SearchCache(ttl=60)
+            with self.subTest(msg="1. partial first pages aren't cached"):
+                self.assertEqual(Session(q1, rows=5, cache=cache).to_dict()["result_set"], ids[:5])
+                self.assertEqual(Session(q1, rows=20, cache=cache).to_dict()["result_set"], ids)
+            with self.subTest(msg="2. complete results are paged by rows"):
+                query_mock.reset_mock()
+                self.assertEqual(list(Session(q1, rows=3, cache=cache)), ids)
+                self.assertEqual(query_mock.call_count, 0)
+                self.assertEqual(Session(q1, rows=3, cache=cache).to_dict(), {"total_count": 7, "result_set": ids[:3]})
+                self.assertEqual(Session(q1, rows=40, cache=cache).to_dict(), {"total_count": 7, "result_set": ids})
+                self.assertEqual(query_mock.call_count, 0)
+            with self.subTest(msg="3. results cached by iteration"):
+                cache = SearchCache(ttl=60)
+                self.assertEqual(list(Session(q1, rows=3, cache=cache)), ids)
+                self.assertEqual(Session(q1, rows=40, cache=cache).to_dict(), {"total_count": 7, "result_set": ids})
+
+    def testQueryOptimizer(self):
+        """Test simplifying query trees before they are submitted"""
+        q1 = AttributeQuery("exptl.method", operator="exact_match", value="X-RAY DIFFRACTION")
+        q2 = AttributeQuery("exptl.method", operator="exact_match", value="ELECTRON MICROSCOPY")
+        q3 = AttributeQuery("rcsb_entry_info.resolution_combined", operator="less", value=2.0)
+
+        # Nested groups are flattened, duplicates removed and equality terminals merged into "in"
+        optimized = optimize((q1 | q2) | (q1 | (q3 | q2)))
+        self.assertIsInstance(optimized, Group)
+        self.assertEqual(optimized.operator, "or")
+        self.assertEqual(len(optimized.nodes), 2)
+        self.assertEqual(optimized.nodes[0].params["operator"], "in")
+        self.assertEqual(optimized.nodes[0].params["value"], ["X-RAY DIFFRACTION", "ELECTRON MICROSCOPY"])
+
+        # Negated equality terminals are merged within an AND
+        optimized = optimize(~q1 & ~q2 & q3)
+        self.assertEqual(optimized.nodes[0].params, {"attribute": "exptl.method", "operator": "in", "negation": True, "value": ["X-RAY DIFFRACTION", "ELECTRON MICROSCOPY"]})
+
+        # Negation of groups is pushed down to the terminals
+        inverted = ~(q1 | q3)
+        self.assertEqual(inverted.operator, "and")
+        self.assertTrue(all(node.params["negation"] for node in inverted.nodes))
+
+        # Contradictions and tautologies are folded
+        self.assertIsNone(optimize(q1 & ~q1))
+        self.assertEqual(optimize((q1 | ~q1) & q3), q3)
+        self.assertEqual(optimize((q1 & ~q1) | q3), q3)
+        with unittest.mock.patch("requests.get", side_effect=AssertionError("unexpected request")):
+            self.assertEqual(list((q1 & ~q1)()), [])
+            self.assertEqual((q1 & ~q1)(return_counts=True), 0)
+
+        # The optimized query returns the same results
+        ids = ["4HHB", "2GS2", "5T89"]
+        q4 = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="exact_match", value=ids[0])
+        q5 = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=ids[1:])
+        query = (q4 | q5) | (q5 | q4)
+        self.assertEqual(set(query()), set(ids))
+        config.SEARCH_OPTIMIZE_QUERIES = False
+        try:
+            self.assertEqual(set(query()), set(ids))
+        finally:
+            config.SEARCH_OPTIMIZE_QUERIES = True
+
+    def testSetQuery(self):
+        """Test evaluating set operations on search results locally"""
+        ids1 = ["5T89", "2GS2"]
+        ids2 = ["4HHB", "2GS2"]
+        q1 = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=ids1)
+        q2 = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=ids2)
+        q3 = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=ids1)
+        cache = SearchCache()
+
+        result = (SetQuery.of(q1) ^ q2).exec(cache=cache)
+        self.assertEqual(result, {"5T89", "4HHB"})
+        self.assertEqual(result, set((q1 ^ q2)()))
+        self.assertEqual(len(cache), 2)
+
+        # Subqueries are cached, and identical subqueries only run once
+        with unittest.mock.patch("requests.get", side_effect=AssertionError("unexpected request")):
+            self.assertEqual((SetQuery.of(q1) - q2)(cache=cache), {"5T89"})
+            self.assertEqual((q2 | SetQuery.of(q3))(cache=cache), {"5T89", "4HHB", "2GS2"})
+            self.assertEqual(((SetQuery.of(q1) ^ q2) & (SetQuery.of(q3) ^ q2))(cache=cache), {"5T89", "4HHB"})
+
+        # Results can be held as compact integer-encoded sets
+        with unittest.mock.patch("requests.get", side_effect=AssertionError("unexpected request")):
+            result = (SetQuery.of(q1) ^ q2).exec(cache=cache, compact=True)
+        self.assertIsInstance(result, IdSet)
+        self.assertEqual(result, {"5T89", "4HHB"})
+
+        # Works for queries that can't be negated
+        q4 = SeqSimilarityQuery("VLSPADKTNVKAAWGKVGAHAGEYGAEALERMFLSFPTTKTYFPHFDLSHGSAQVKGHGKKVADALTNAVAHVDDMPNALSALSDLHAHKLRVDPVNFKLLSHCLLVTLAAHLPAEFTPAVHASLDKFLASVSTVLTSKYR")
+        result = (SetQuery.of(q4) ^ q2).exec(cache=cache)
+        self.assertIn("2GS2", result)
+        self.assertNotIn("4HHB", result)
+
+    def testSetQueryCompactCache(self):
+        """Test that compact set queries hold and cache subquery results as IdSets, not lists of strings"""
+        ids1 = ["5T89", "2GS2", "AF_AFP68871F1"]
+        ids2 = ["4HHB", "2GS2"]
+        q1 = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=ids1)
+        q2 = AttributeQuery("rcsb_entry_container_identifiers.entry_id", operator="in", value=ids2)
+
+        class FakeBulkSession:
+            def __init__(self, sessions, workers=None):
+                self.sessions = sessions
+                self.errors = {}
+
+            def __iter__(self):
+                for queryIdx, session in enumerate(self.sessions):
+                    for identifier in session.query.params["value"]:
+                        yield queryIdx, identifier
+
+        with tempfile.TemporaryDirectory() as cacheDir:
+            cache = SearchCache(directory=cacheDir)
+            with unittest.mock.patch("rcsbapi.search.set_algebra.BulkSession", FakeBulkSession):
+                result = (SetQuery.of(q1) ^ q2).exec(cache=cache, compact=True)
+            self.assertEqual(result, {"5T89", "4HHB", "AF_AFP68871F1"})
+            cached = [cache.get(canonical_request_key(Session(query, rows=10000)._make_params())) for query in (q1, q2)]
+            self.assertTrue(all(isinstance(value, IdSet) for value in cached))
+            self.assertEqual(cached[0], set(ids1))
+
+            # Cached sets are reused as they are, and serve non-compact queries too
+            with unittest.mock.patch("rcsbapi.search.set_algebra.BulkSession", side_effect=AssertionError("unexpected request")):
+                self.assertIs(SetQuery.of(q1).exec(cache=cache, compact=True), cached[0])
+                self.assertEqual((SetQuery.of(q1) - q2).exec(cache=cache), frozenset(["5T89", "AF_AFP68871F1"]))
+
+            # On disk, IdSets are stored as lists of identifiers
+            fromDisk = SearchCache(directory=cacheDir)
+            with unittest.mock.patch("rcsbapi.search.set_algebra.BulkSession", side_effect=AssertionError("unexpected request")):
+                self.assertEqual((SetQuery.of(q1) ^ q2).exec(cache=fromDisk, compact=True), result)
+
 
 def buildSearch():
     suiteSelect = unittest.TestSuite()
@@ -1516,6 +1821,17 @@ def buildSearch():
     suiteSelect.addTest(SearchTests("testSort"))
     suiteSelect.addTest(SearchTests("testReturnExplainMetadata"))
     suiteSelect.addTest(SearchTests("testScoringStrategy"))
+    suiteSelect.addTest(SearchTests("testRequestTemplate"))
+    suiteSelect.addTest(SearchTests("testReturnAllHits"))
+    suiteSelect.addTest(SearchTests("testReturnAllHitsFacets"))
+    suiteSelect.addTest(SearchTests("testSearchMany"))
+    suiteSelect.addTest(SearchTests("testCountMany"))
+    suiteSelect.addTest(SearchTests("testResultCache"))
+    suiteSelect.addTest(SearchTests("testResultCacheIsolation"))
+    suiteSelect.addTest(SearchTests("testResultCacheRows"))
+    suiteSelect.addTest(SearchTests("testQueryOptimizer"))
+    suiteSelect.addTest(SearchTests("testSetQuery"))
+    suiteSelect.addTest(SearchTests("testSetQueryCompactCache"))
     return suiteSelect
 
 
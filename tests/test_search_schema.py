@@ -117,6 +117,27 @@ class SchemaTests(unittest.TestCase):
             attr_details = attrs.get_attribute_details("foo")
             self.assertIsNone(attr_details)
 
+    def testAttributeTypeIndex(self):
+        # Every leaf attribute is indexed, and the index agrees with walking the schema
+        index = attrs._attribute_types
+        self.assertIsNotNone(index)
+        self.assertEqual(set(index), set(attrs.list()))
+        for attr in attrs:
+            self.assertEqual(attrs.get_attribute_type(attr.attribute), attr.type)
+        self.assertEqual(attrs.get_attribute_type("exptl.method"), const.STRUCTURE_ATTRIBUTE_SEARCH_SERVICE)
+        self.assertEqual(attrs.get_attribute_type("rcsb_chem_comp_info.atom_count"), const.CHEMICAL_ATTRIBUTE_SEARCH_SERVICE)
+        self.assertIsInstance(attrs.get_attribute_type("rcsb_id"), list)
+
+        # Unknown or incomplete attributes still fall back to walking the schema and warn
+        with self.assertWarns(UserWarning):
+            self.assertIsNone(attrs.get_attribute_type("foo"))
+        with self.assertWarns(UserWarning):
+            self.assertIsNone(attrs.get_attribute_type("exptl"))
+
+        # Attr methods pass on the service of the attribute
+        self.assertEqual(attrs.rcsb_chem_comp_info.atom_count.exists().service, const.CHEMICAL_ATTRIBUTE_SEARCH_SERVICE)
+        self.assertEqual(attrs.exptl.method.in_(["X-RAY DIFFRACTION"]).service, const.STRUCTURE_ATTRIBUTE_SEARCH_SERVICE)
+
 
 def buildSchema():
     suiteSelect = unittest.TestSuite()
@@ -124,6 +145,7 @@ def buildSchema():
     suiteSelect.addTest(SchemaTests("testSchemaVersion"))
     suiteSelect.addTest(SchemaTests("testFetchSchema"))
     suiteSelect.addTest(SchemaTests("testRcsbAttrs"))
+    suiteSelect.addTest(SchemaTests("testAttributeTypeIndex"))
 
     return suiteSelect
 
@@ -0,0 +1,128 @@
+##
+# File:    test_shared_schema.py
+# Author:
+# Date:
+# Version:
+#
+# Update:
+#
+#
+##
+"""
+Tests for sharing compiled schemas between worker processes.
+"""
+
+__docformat__ = "google en"
+__author__ = ""
+__email__ = ""
+__license__ = ""
+
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from rcsbapi import shared_schema
+from rcsbapi.data import DATA_SCHEMA
+from rcsbapi.search import SEARCH_SCHEMA
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+RETURN_DATA_LIST = ["exptl.method", "polymer_entities.rcsb_id"]
+
+# Runs in a fresh interpreter: attaches the schema file, then imports with requests disabled
+ATTACH_CHILD = r"""
+import json, sys
+import requests
+
+def fail(*args, **kwargs):
+    raise AssertionError("schema was fetched")
+
+requests.get = requests.post = fail
+from rcsbapi import shared_schema
+shared_schema.attach(sys.argv[1])
+from rcsbapi.data import DATA_SCHEMA
+from rcsbapi.search import search_attributes
+print(json.dumps({
+    "query": DATA_SCHEMA.construct_query("entries", ["4HHB"], json.loads(sys.argv[2])),
+    "attribute_type": search_attributes.get_attribute_type("rcsb_entry_info.resolution_combined"),
+}))
+"""
+
+
+def _construct_query(return_data_list):
+    return DATA_SCHEMA.construct_query("entries", ["4HHB"], return_data_list)
+
+
+class SharedSchemaTests(unittest.TestCase):
+    def setUp(self):
+        self.__startTime = time.time()
+        logger.info("Starting %s at %s", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()))
+
+    def tearDown(self):
+        gc.unfreeze()
+        unitS = "MB" if platform.system() == "Darwin" else "GB"
+        rusageMax = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        logger.info("Maximum resident memory size %.4f %s", rusageMax / 10**6, unitS)
+        endTime = time.time()
+        logger.info("Completed %s at %s (%.4f seconds)", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()), endTime - self.__startTime)
+
+    def testPickleDataSchema(self):
+        schema = pickle.loads(pickle.dumps(DATA_SCHEMA))
+        self.assertEqual(schema.find_paths("entries", "id"), DATA_SCHEMA.find_paths("entries", "id"))
+        self.assertEqual(schema.construct_query("entries", ["4HHB"], RETURN_DATA_LIST), _construct_query(RETURN_DATA_LIST))
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "requires the fork start method")
+    def testPreloadFork(self):
+        shared_schema.preload()
+        self.assertGreater(gc.get_freeze_count(), 0)
+        self.assertIsNotNone(DATA_SCHEMA._lazy_client_schema)
+        self.assertEqual(set(DATA_SCHEMA._path_indexes), set(DATA_SCHEMA._root_to_idx.values()))
+        with multiprocessing.get_context("fork").Pool(2) as pool:
+            queries = pool.map(_construct_query, [RETURN_DATA_LIST] * 4)
+        self.assertEqual(queries, [_construct_query(RETURN_DATA_LIST)] * 4)
+
+    def testSaveAttach(self):
+        with tempfile.TemporaryDirectory() as tempDir:
+            schemaPath = os.path.join(tempDir, "schemas.pickle")
+            shared_schema.save(schemaPath)
+            with self.subTest(msg="1. attached schemas are used without fetching"):
+                packageRoot = os.path.dirname(os.path.dirname(os.path.abspath(shared_schema.__file__)))
+                environment = dict(os.environ, PYTHONPATH=os.pathsep.join([packageRoot] + [path for path in [os.environ.get("PYTHONPATH")] if path]))
+                completed = subprocess.run([sys.executable, "-c", ATTACH_CHILD, schemaPath, json.dumps(RETURN_DATA_LIST)], capture_output=True, text=True, env=environment, check=False)
+                self.assertEqual(completed.returncode, 0, completed.stderr)
+                result = json.loads(completed.stdout.strip().splitlines()[-1])
+                self.assertEqual(result["query"], _construct_query(RETURN_DATA_LIST))
+                self.assertEqual(result["attribute_type"], SEARCH_SCHEMA.search_attributes.get_attribute_type("rcsb_entry_info.resolution_combined"))
+            with self.subTest(msg="2. files from other versions are ignored"):
+                with open(schemaPath, "rb") as schemaFile:
+                    sections = pickle.load(schemaFile)
+                sections["version"] = "0.0.0"
+                with open(schemaPath, "wb") as schemaFile:
+                    pickle.dump(sections, schemaFile)
+                with self.assertLogs("rcsbapi.shared_schema", level="WARNING"):
+                    shared_schema.attach(schemaPath)
+                self.assertIsNone(shared_schema.attached("data"))
+
+
+def buildSharedSchema():
+    suiteSelect = unittest.TestSuite()
+    suiteSelect.addTest(SharedSchemaTests("testPickleDataSchema"))
+    suiteSelect.addTest(SharedSchemaTests("testPreloadFork"))
+    suiteSelect.addTest(SharedSchemaTests("testSaveAttach"))
+    return suiteSelect
+
+
+if __name__ == "__main__":
+    mySuite = buildSharedSchema()
+    unittest.TextTestRunner(verbosity=2).run(mySuite)
@@ -0,0 +1,116 @@
+##
+# File:    test_sinks.py
+# Author:
+# Date:
+# Version:
+#
+# Update:
+#
+#
+##
+"""
+Tests for streaming export sinks.
+"""
+
+__docformat__ = "google en"
+__author__ = ""
+__email__ = ""
+__license__ = ""
+
+import gzip
+import json
+import logging
+import os
+import platform
+import re
+import resource
+import tempfile
+import time
+import unittest
+import unittest.mock
+
+from rcsbapi.data import DataQuery
+from rcsbapi.search import AttributeQuery
+from rcsbapi.search.search_query import Session
+from rcsbapi.sinks import NDJSONSink, ParquetSink, RecordSink
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def fakePost(query, index=None):  # pylint: disable=unused-argument
+    """Data API response for the input_ids of a batch query"""
+    inputIds = json.loads(re.search(r"\[[^]]+\]", query).group(0))
+    return {"data": {"entries": [{"rcsb_id": inputId, "exptl": [{"method": "X-RAY DIFFRACTION"}]} for inputId in inputIds]}}
+
+
+class SinkTests(unittest.TestCase):
+    def setUp(self):
+        self.__startTime = time.time()
+        logger.info("Starting %s at %s", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()))
+        self.__tempDir = tempfile.TemporaryDirectory()
+        self.__inputIds = [f"{i % 10}A{i // 10:02d}" for i in range(120)]
+
+    def tearDown(self):
+        self.__tempDir.cleanup()
+        unitS = "MB" if platform.system() == "Darwin" else "GB"
+        rusageMax = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        logger.info("Maximum resident memory size %.4f %s", rusageMax / 10**6, unitS)
+        endTime = time.time()
+        logger.info("Completed %s at %s (%.4f seconds)", self.id(), time.strftime("%Y %m %d %H:%M:%S", time.localtime()), endTime - self.__startTime)
+
+    def testNDJSONSink(self):
+        path = os.path.join(self.__tempDir.name, "entries.ndjson.gz")
+        query = DataQuery(input_type="entries", input_ids=self.__inputIds, return_data_list=["exptl.method"])
+        with unittest.mock.patch.object(query, "_post", side_effect=fakePost) as post:
+            with NDJSONSink(path, flush_size=7, compression="gzip") as sink:
+                self.assertEqual(query.export(sink, batch_size=50), 120)
+            self.assertEqual(post.call_count, 3)
+        self.assertIsNone(query.get_response())
+        with gzip.open(path, "rt") as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual([record["rcsb_id"] for record in records], self.__inputIds)
+        with self.assertRaises(ValueError):
+            sink.write({"rcsb_id": "4HHB"})
+        with self.assertRaises(ValueError):
+            NDJSONSink(path, compression="zip")
+        # The base class doesn't write anywhere
+        with self.assertRaises(TypeError):
+            RecordSink(path, flush_size=1)  # pylint: disable=abstract-class-instantiated
+
+    def testParquetSink(self):
+        try:
+            import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            self.skipTest("pyarrow not installed")
+        with self.subTest(msg="1. DataQuery columns"):
+            path = os.path.join(self.__tempDir.name, "entries.parquet")
+            query = DataQuery(input_type="entries", input_ids=self.__inputIds, return_data_list=["exptl.method"])
+            with unittest.mock.patch.object(query, "_post", side_effect=fakePost):
+                with ParquetSink(path, flush_size=50) as sink:
+                    query.export(sink)
+            parquetFile = pq.ParquetFile(path)
+            self.assertEqual(parquetFile.metadata.num_rows, 120)
+            self.assertEqual(parquetFile.metadata.num_row_groups, 3)
+            self.assertEqual(parquetFile.schema_arrow.names, ["rcsb_id", "exptl.method"])
+        with self.subTest(msg="2. Search results"):
+            path = os.path.join(self.__tempDir.name, "results.parquet")
+            session = Session(AttributeQuery("exptl.method", "exact_match", "X-RAY DIFFRACTION"), rows=3)
+            pages = [{"total_count": 5, "result_set": ["4HHB", "1STP", "2GS2"]}, {"total_count": 5, "result_set": ["5T89", "1TIM"]}]
+            with unittest.mock.patch.object(Session, "_single_query", side_effect=pages):
+                with ParquetSink(path, flush_size=2, compression="zstd") as sink:
+                    self.assertEqual(session.export(sink), 5)
+            self.assertEqual(pq.read_table(path).column("identifier").to_pylist(), ["4HHB", "1STP", "2GS2", "5T89", "1TIM"])
+            self.assertEqual(pq.ParquetFile(path).metadata.num_row_groups, 3)
+
+
+def buildSinks():
+    suiteSelect = unittest.TestSuite()
+    suiteSelect.addTest(SinkTests("testNDJSONSink"))
+    suiteSelect.addTest(SinkTests("testParquetSink"))
+    return suiteSelect
+
+
+if __name__ == "__main__":
+    mySuite = buildSinks()
+    unittest.TextTestRunner(verbosity=2).run(mySuite)